@@ -3,7 +3,7 @@ WanderGuide AI - Backend API
 Main Flask application entry point
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
@@ -16,6 +16,11 @@ from routes.itinerary_routes import itinerary_bp
 from routes.booking_routes import booking_bp
 from routes.recommendation_routes import recommendation_bp
 from routes.weather_routes import weather_bp
+from routes.job_routes import job_bp
+from routes.batch_routes import batch_bp
+from routes.trip_routes import trip_bp
+from services.container import init_services, get_services
+from services.response_pipeline import init_response_pipeline
 
 def create_app():
     """
@@ -25,27 +30,61 @@ def create_app():
     
     # Configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-    app.config['JSON_SORT_KEYS'] = False
+    
+    # orjson-backed jsonify (keys in insertion order) and gzip/brotli for larger responses
+    compressor = init_response_pipeline(app)
     
     # CORS configuration
     cors_origins = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
     CORS(app, resources={r"/api/*": {"origins": cors_origins}})
     
+    # Shared services (LLM client, prompt chains, caches) built once per worker
+    init_services(app)
+    
     # Register blueprints
     app.register_blueprint(itinerary_bp, url_prefix='/api/itinerary')
     app.register_blueprint(booking_bp, url_prefix='/api/bookings')
     app.register_blueprint(recommendation_bp, url_prefix='/api/recommendations')
     app.register_blueprint(weather_bp, url_prefix='/api/weather')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+    app.register_blueprint(batch_bp, url_prefix='/api/batch')
+    app.register_blueprint(trip_bp, url_prefix='/api/trips')
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
     def health_check():
-        """Check if the API is running"""
+        """Check if the API is running and whether the LLM backend is degraded"""
+        services = get_services()
+        circuit = services.circuit_stats()
+        degraded = circuit is None or circuit['state'] != 'closed'
+        
         return jsonify({
-            'status': 'healthy',
+            'status': 'degraded' if degraded else 'healthy',
             'message': 'WanderGuide AI Backend is running'
+                       + (' (LLM unavailable, serving fallback responses)' if degraded else ''),
+            'circuit': circuit,
+            'llm': services.llm_service.stats(),
+            'cache': services.cache.stats(),
+            'jobs': services.jobs.stats(),
+            'fares': services.scraper_service.fares.stats(),
+            'scraper': services.scraper_service.fetcher.stats(),
+            'providers': services.scraper_service.providers.stats(),
+            'hotel_index': services.scraper_service.hotel_indexes.stats(),
+            'compression': compressor.stats() if compressor is not None else None,
+            'batch': services.batch.stats(),
+            'trips': services.trips.stats(),
+            'weather': services.weather.stats()
         }), 200
     
+    # Prometheus scrape endpoint
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        """LLM token and latency histograms in the Prometheus text format"""
+        return Response(
+            get_services().llm_service.metrics.render(),
+            mimetype='text/plain; version=0.0.4'
+        )
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
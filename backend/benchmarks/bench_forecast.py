@@ -0,0 +1,62 @@
+"""
+Forecast Benchmark - Cost of forecast lookups with and without the per-(destination, date) cache
+Compares the first lookup of each city (served by the seeded backend) with repeated
+lookups of the same cities and days (served from the cache)
+
+Usage (from backend/):
+    python -m benchmarks.bench_forecast [--cities 500] [--days 7] [--repeat 5] [--json]
+"""
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+from services.weather_service import ForecastProvider
+
+
+def run(provider: ForecastProvider, cities: List[str], days: int, start: date) -> Dict:
+    started = time.perf_counter()
+    for city in cities:
+        provider.forecast(city, days, start)
+    elapsed = time.perf_counter() - started
+    return {
+        'lookups': len(cities),
+        'seconds': round(elapsed, 4),
+        'us_per_lookup': round(elapsed / len(cities) * 1e6, 2),
+        'us_per_day': round(elapsed / (len(cities) * days) * 1e6, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cities', type=int, default=500, help='Distinct destinations')
+    parser.add_argument('--days', type=int, default=7, help='Days per forecast')
+    parser.add_argument('--repeat', type=int, default=5, help='Warm passes over the same cities')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    cities = [f"City {index}" for index in range(args.cities)]
+    start = date.today() + timedelta(days=1)
+    provider = ForecastProvider()
+
+    results = {'cities': args.cities, 'days': args.days, 'cold': run(provider, cities, args.days, start)}
+    warm = [run(provider, cities, args.days, start) for _ in range(args.repeat)]
+    results['warm'] = min(warm, key=lambda stats: stats['seconds'])
+    results['speedup'] = round(results['cold']['seconds'] / results['warm']['seconds'], 1)
+    results['cache'] = provider.stats()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.cities} destinations x {args.days} days\n")
+    for name in ('cold', 'warm'):
+        stats = results[name]
+        print(f"{name:<5} {stats['us_per_lookup']:>9} us/lookup  {stats['us_per_day']:>7} us/day")
+    print(f"\nspeedup {results['speedup']}x, cache hit rate {results['cache']['hit_rate']}, "
+          f"{results['cache']['backend_calls']} backend calls")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Hotel Index Benchmark - Filtered, sorted and paged hotel queries over a large inventory
+Compares re-filtering and re-sorting the hotel dicts per request (what the hotels endpoint
+did before) with the columnar HotelIndex, for the same queries and the same pages
+
+Usage (from backend/):
+    python -m benchmarks.bench_hotel_index [--hotels 5000] [--queries 500] [--page-size 20] [--json]
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+from services.hotel_index import HotelIndex
+
+AMENITIES = ['Free WiFi', 'Pool', 'Spa', 'Fitness Center', 'Restaurant', 'Bar', 'Room Service',
+             'Parking', 'Airport Shuttle', 'Business Center', 'Concierge', 'Pet Friendly',
+             'Kitchen', 'Beach Access', 'Air Conditioning', 'Laundry', 'EV Charging', 'Kids Club']
+
+
+def make_hotels(count: int, seed: int = 7) -> List[Dict]:
+    """Hotel dicts in the ScraperService shape"""
+    rng = random.Random(seed)
+    hotels = []
+    for index in range(count):
+        nightly = rng.randint(40, 900)
+        hotels.append({
+            'id': f"hotel_{index}",
+            'name': f"Hotel {index}",
+            'rating': rng.randint(2, 5),
+            'review_score': round(rng.uniform(6.0, 9.9), 1),
+            'price': {'nightly_rate': nightly, 'total': nightly * 3, 'currency': 'USD'},
+            'amenities': rng.sample(AMENITIES, rng.randint(3, 10))
+        })
+    return hotels
+
+
+def make_queries(count: int, seed: int = 11) -> List[Dict]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        queries.append({
+            'min_stars': rng.choice([None, 3, 4]),
+            'max_price': rng.choice([None, 200, 400]),
+            'min_review': rng.choice([None, 8.0]),
+            'amenities': rng.sample(AMENITIES, rng.randint(0, 2)),
+            'sort': rng.choice(['recommended', 'price', 'review']),
+            'page': rng.randint(0, 3)
+        })
+    return queries
+
+
+def list_query(hotels: List[Dict], query: Dict, page_size: int) -> Dict:
+    """Baseline: filter, sort and count facets over the dicts on every request"""
+    required = {name.lower() for name in query['amenities']}
+    matches = [
+        hotel for hotel in hotels
+        if (query['min_stars'] is None or hotel['rating'] >= query['min_stars'])
+        and (query['max_price'] is None or hotel['price']['nightly_rate'] <= query['max_price'])
+        and (query['min_review'] is None or hotel['review_score'] >= query['min_review'])
+        and required <= {name.lower() for name in hotel['amenities']}
+    ]
+    if query['sort'] == 'price':
+        matches.sort(key=lambda hotel: (hotel['price']['nightly_rate'], -hotel['review_score']))
+    elif query['sort'] == 'review':
+        matches.sort(key=lambda hotel: (-hotel['review_score'], hotel['price']['nightly_rate']))
+    else:
+        matches.sort(key=lambda hotel: (-hotel['rating'], hotel['price']['total']))
+
+    stars: Dict[int, int] = {}
+    amenities: Dict[str, int] = {}
+    for hotel in matches:
+        stars[hotel['rating']] = stars.get(hotel['rating'], 0) + 1
+        for name in hotel['amenities']:
+            amenities[name] = amenities.get(name, 0) + 1
+    start = query['page'] * page_size
+    return {'hotels': matches[start:start + page_size], 'total': len(matches),
+            'facets': {'stars': stars, 'amenities': amenities}}
+
+
+def index_query(index: HotelIndex, query: Dict, page_size: int) -> Dict:
+    mask = index.mask(query['min_stars'], None, query['max_price'], query['min_review'], query['amenities'])
+    ordered = index.order(mask, query['sort'])
+    start = query['page'] * page_size
+    return {'hotels': [index.records[position] for position in ordered[start:start + page_size]],
+            'total': len(ordered), 'facets': index.facets(mask)}
+
+
+def timed(run, queries: List[Dict]) -> Dict:
+    started = time.perf_counter()
+    results = [run(query) for query in queries]
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': round(elapsed, 4),
+        'queries_per_second': round(len(queries) / elapsed, 1),
+        'mean_ms': round(elapsed / len(queries) * 1000, 3),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hotels', type=int, default=5000, help='Hotels in the inventory')
+    parser.add_argument('--queries', type=int, default=500, help='Filtered queries to run')
+    parser.add_argument('--page-size', type=int, default=20, help='Hotels per page')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    hotels = make_hotels(args.hotels)
+    queries = make_queries(args.queries)
+
+    started = time.perf_counter()
+    index = HotelIndex(hotels)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    baseline = timed(lambda query: list_query(hotels, query, args.page_size), queries)
+    indexed = timed(lambda query: index_query(index, query, args.page_size), queries)
+
+    # Both must agree on the matches and the page
+    mismatches = sum(
+        1 for expected, actual in zip(baseline.pop('results'), indexed.pop('results'))
+        if expected['total'] != actual['total']
+        or [hotel['id'] for hotel in expected['hotels']] != [hotel['id'] for hotel in actual['hotels']]
+    )
+
+    results = {
+        'hotels': args.hotels,
+        'queries': args.queries,
+        'page_size': args.page_size,
+        'index_build_ms': round(build_ms, 2),
+        'list_of_dicts': baseline,
+        'hotel_index': indexed,
+        'speedup': round(baseline['seconds'] / indexed['seconds'], 1),
+        'mismatches': mismatches
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.hotels} hotels, {args.queries} queries, {args.page_size} per page "
+          f"(index built in {results['index_build_ms']} ms)\n")
+    for name in ('list_of_dicts', 'hotel_index'):
+        stats = results[name]
+        print(f"{name:<14} {stats['queries_per_second']:>9} queries/s  {stats['mean_ms']} ms/query")
+    print(f"\nspeedup {results['speedup']}x, {mismatches} mismatched pages")
+
+
+if __name__ == '__main__':
+    main()
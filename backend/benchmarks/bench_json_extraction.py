@@ -0,0 +1,104 @@
+"""
+JSON Extraction Benchmark - Recovery rate and throughput of LLM output parsing
+Compares the previous find('{')/rfind('}') + json.loads approach with the incremental extractor
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_extraction [--corpus recorded.jsonl] [--repeat 50] [--json]
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+from benchmarks.llm_corpus import build_corpus, load_corpus
+from services.llm_schemas import (
+    Activity, BudgetOptimization, CulturalInsights, Itinerary, parse_llm_list, parse_llm_object
+)
+
+
+def legacy_parse(kind: str, raw: str):
+    """The brace-slicing parser LLMService used before the incremental extractor"""
+    if kind == 'chat_update':
+        raw = raw.split('ITINERARY_UPDATE:')[1]
+    opening, closing = ('[', ']') if kind == 'activities' else ('{', '}')
+    try:
+        start_idx = raw.find(opening)
+        end_idx = raw.rfind(closing) + 1
+        if start_idx != -1 and end_idx > start_idx:
+            return json.loads(raw[start_idx:end_idx])
+    except ValueError:
+        pass
+    return None
+
+
+def extractor_parse(kind: str, raw: str):
+    """Current LLMService parsing: incremental extraction plus schema validation"""
+    if kind == 'chat_update':
+        raw = raw.split('ITINERARY_UPDATE:')[1]
+    if kind == 'activities':
+        return parse_llm_list(raw, Activity) or None
+    schema = {'cultural': CulturalInsights, 'budget': BudgetOptimization}.get(kind, Itinerary)
+    return parse_llm_object(raw, schema)
+
+
+def measure(parse: Callable, corpus: List[Dict], repeat: int) -> Dict:
+    """Recovery counts per artifact and parse throughput for one parser"""
+    recovered = defaultdict(int)
+    totals = defaultdict(int)
+    for record in corpus:
+        totals[record['artifact']] += 1
+        if parse(record['kind'], record['raw']):
+            recovered[record['artifact']] += 1
+
+    total_bytes = sum(len(record['raw'].encode('utf-8')) for record in corpus)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for record in corpus:
+            parse(record['kind'], record['raw'])
+    elapsed = time.perf_counter() - started
+
+    count = len(corpus) * repeat
+    return {
+        'recovery_rate': round(sum(recovered.values()) / len(corpus), 4),
+        'recovery_by_artifact': {
+            artifact: round(recovered[artifact] / totals[artifact], 4) for artifact in sorted(totals)
+        },
+        'parses_per_second': round(count / elapsed, 1),
+        'mb_per_second': round(total_bytes * repeat / elapsed / 1e6, 2),
+        'mean_us_per_parse': round(elapsed / count * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='JSONL file of recorded raw responses')
+    parser.add_argument('--repeat', type=int, default=50, help='Passes over the corpus for throughput')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus()
+    results = {
+        'responses': len(corpus),
+        'legacy': measure(legacy_parse, corpus, args.repeat),
+        'extractor': measure(extractor_parse, corpus, args.repeat)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Corpus: {results['responses']} responses\n")
+    print(f"{'artifact':<22}{'legacy':>10}{'extractor':>12}")
+    for artifact, rate in results['legacy']['recovery_by_artifact'].items():
+        new_rate = results['extractor']['recovery_by_artifact'][artifact]
+        print(f"{artifact:<22}{rate:>10.0%}{new_rate:>12.0%}")
+    print(f"{'overall':<22}{results['legacy']['recovery_rate']:>10.0%}{results['extractor']['recovery_rate']:>12.0%}\n")
+    for name in ('legacy', 'extractor'):
+        stats = results[name]
+        print(f"{name:<10} {stats['parses_per_second']:>10} parses/s  {stats['mb_per_second']:>6} MB/s  "
+              f"{stats['mean_us_per_parse']:>8} us/parse")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Response Benchmark - Serialization time and bytes on the wire for representative API payloads
+Compares Flask's default jsonify encoding, sent uncompressed, with the response pipeline
+(orjson when installed, then gzip and brotli when installed) for flight, hotel and itinerary responses
+
+Usage (from backend/):
+    python -m benchmarks.bench_responses [--flights 60] [--hotels 120] [--days 14] [--repeat 200] [--json]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict
+from flask.json.provider import DefaultJSONProvider
+from benchmarks.fixture_site import fixture_page
+from benchmarks.llm_corpus import sample_document
+from services.hotel_index import HotelIndex
+from services.response_pipeline import (BROTLI, ENCODINGS, GZIP, ResponseCompressor, dumps_bytes,
+                                        orjson)
+from services.site_parsers import FLIGHTS, HOTELS, SchemaOrgParser
+
+
+def make_payloads(flights: int, hotels: int, days: int) -> Dict[str, Dict]:
+    """Bodies shaped like the flights, hotels and itinerary endpoint responses"""
+    parser = SchemaOrgParser()
+    flight_query = {'origin': 'NYC', 'destination': 'PAR', 'departure_date': '2026-11-01',
+                    'return_date': '2026-11-08', 'passengers': 2}
+    hotel_query = {'destination': 'Paris', 'check_in': '2026-11-01', 'check_out': '2026-11-04',
+                   'guests': 2, 'rooms': 1}
+    flight_results = parser.parse(FLIGHTS, fixture_page(FLIGHTS, flight_query, flights), flight_query)
+    hotel_results = parser.parse(HOTELS, fixture_page(HOTELS, hotel_query, hotels), hotel_query)
+    coverage = {'partial': False, 'providers': ['fixture'], 'skipped': []}
+    page = HotelIndex(hotel_results, coverage).query()
+    return {
+        'flights': {'success': True, 'count': len(flight_results), 'flights': flight_results,
+                    'coverage': coverage, 'search_params': flight_query},
+        'hotels': {'success': True, 'count': len(page['hotels']), 'total': page['total'],
+                   'hotels': page['hotels'], 'next_cursor': None, 'facets': page['facets'],
+                   'coverage': coverage, 'search_params': hotel_query},
+        'itinerary': {'success': True, 'itinerary': sample_document('itinerary', 'Kyoto', days)}
+    }
+
+
+def flask_default(obj: Dict) -> bytes:
+    """Baseline: what jsonify produced before (sorted keys, ASCII escapes, standard library)"""
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=True,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def mean_us(run: Callable[[], bytes], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return round((time.perf_counter() - started) / repeat * 1e6, 1)
+
+
+def measure(payload: Dict, compressor: ResponseCompressor, repeat: int) -> Dict:
+    before = flask_default(payload)
+    after = dumps_bytes(payload)
+    results = {
+        'before': {'serialize_us': mean_us(lambda: flask_default(payload), repeat), 'bytes': len(before)},
+        'fast_json': {'serialize_us': mean_us(lambda: dumps_bytes(payload), repeat), 'bytes': len(after)}
+    }
+    for encoding in ENCODINGS:
+        compressed = b''.join(compressor._chunks(after, encoding, len(after)))
+        results[encoding] = {
+            'compress_us': mean_us(lambda: b''.join(compressor._chunks(after, encoding, len(after))), repeat),
+            'bytes': len(compressed),
+            'ratio': round(len(compressed) / len(before), 3)
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--flights', type=int, default=60, help='Flights in the flight response')
+    parser.add_argument('--hotels', type=int, default=120, help='Hotels in the hotel response')
+    parser.add_argument('--days', type=int, default=14, help='Itinerary length')
+    parser.add_argument('--repeat', type=int, default=200, help='Timed runs per measurement')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    compressor = ResponseCompressor()
+    payloads = make_payloads(args.flights, args.hotels, args.days)
+    results = {
+        'json_encoder': 'orjson' if orjson is not None else 'json',
+        'encodings': list(ENCODINGS),
+        'payloads': {name: measure(payload, compressor, args.repeat) for name, payload in payloads.items()}
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"encoder: {results['json_encoder']}, encodings: {', '.join(ENCODINGS)}"
+          f"{'' if BROTLI in ENCODINGS else ' (pip install brotli for br)'}\n")
+    for name, stats in results['payloads'].items():
+        before, fast = stats['before'], stats['fast_json']
+        print(f"{name:<10} before     {before['serialize_us']:>9} us  {before['bytes']:>8} bytes")
+        print(f"{'':<10} fast json  {fast['serialize_us']:>9} us  {fast['bytes']:>8} bytes  "
+              f"({before['serialize_us'] / fast['serialize_us']:.1f}x faster)")
+        for encoding in ENCODINGS:
+            entry = stats[encoding]
+            label = 'gzip' if encoding == GZIP else 'brotli'
+            print(f"{'':<10} + {label:<8} {entry['compress_us']:>9} us  {entry['bytes']:>8} bytes  "
+                  f"({entry['ratio'] * 100:.0f}% of before)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Scraper Benchmark - Throughput of the fetch + parse pipeline against the local fixture site
+Measures parsing alone, cold downloads (pooled session vs. a new connection per request),
+ETag revalidation, fresh cache hits, a rate-limited host and retries against a flaky host
+
+Usage (from backend/):
+    python -m benchmarks.bench_scraper [--queries 200] [--concurrency 8] [--items 20]
+                                       [--latency 0.01] [--rate 20] [--failure-rate 0.2] [--json]
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import requests
+from benchmarks.fixture_site import FixtureSite, fixture_page
+from services.fetcher import Fetcher
+from services.scraper_service import ScraperService
+from services.site_parsers import HOTELS, Site, SchemaOrgParser
+
+
+def make_queries(count: int) -> List[Dict]:
+    """Distinct hotel searches (a new page per query)"""
+    return [{
+        'destination': f"City{index % 50}",
+        'check_in': f"2026-11-{1 + index % 20:02d}",
+        'check_out': f"2026-11-{3 + index % 20:02d}",
+        'guests': 2,
+        'rooms': 1 + index // 1000
+    } for index in range(count)]
+
+
+def run_phase(search: Callable[[Dict], List[Dict]], queries: List[Dict], concurrency: int) -> Dict:
+    """Run every query on a thread pool; pages/s, results/s and failures"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(search, queries))
+    elapsed = time.perf_counter() - started
+    items = sum(len(result) for result in results)
+    return {
+        'pages': len(queries),
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(len(queries) / elapsed, 1),
+        'items_per_second': round(items / elapsed, 1),
+        'empty_pages': sum(1 for result in results if not result)
+    }
+
+
+def measure_parse(items: int, repeat: int) -> Dict:
+    parser = SchemaOrgParser()
+    query = make_queries(1)[0]
+    html = fixture_page(HOTELS, query, items)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parser.parse(HOTELS, html, query)
+    elapsed = time.perf_counter() - started
+    return {
+        'page_kb': round(len(html) / 1024, 1),
+        'pages_per_second': round(repeat / elapsed, 1),
+        'mean_ms_per_page': round(elapsed / repeat * 1000, 3)
+    }
+
+
+def scraper_for(site: FixtureSite, kind: str = HOTELS, **fetcher_options) -> ScraperService:
+    fetcher = Fetcher(**dict({'rate_per_host': 0, 'max_per_host': 64, 'backoff': 0.05}, **fetcher_options))
+    return ScraperService(fetcher=fetcher, sites=[Site('fixture', kind, f"{site.url}/{kind}")])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queries', type=int, default=200, help='Distinct searches per phase')
+    parser.add_argument('--concurrency', type=int, default=8, help='Searches in flight')
+    parser.add_argument('--items', type=int, default=20, help='Results per fixture page')
+    parser.add_argument('--latency', type=float, default=0.01, help='Fixture site latency in seconds')
+    parser.add_argument('--rate', type=float, default=20, help='Per-host rate limit for the rate-limited phase')
+    parser.add_argument('--failure-rate', type=float, default=0.2, help='Share of 503s in the flaky phase')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    site = FixtureSite(items=args.items, latency=args.latency).start()
+    results = {'queries': args.queries, 'concurrency': args.concurrency, 'items_per_page': args.items}
+    try:
+        results['parse_only'] = measure_parse(args.items, repeat=max(args.queries // 4, 10))
+
+        parse = SchemaOrgParser()
+
+        def unpooled(query):
+            # Baseline: a new connection per request, as a bare requests.get does
+            response = requests.get(f"{site.url}/{HOTELS}", params=query, timeout=10)
+            return parse.parse(HOTELS, response.text, query)
+
+        results['cold_unpooled'] = run_phase(unpooled, queries, args.concurrency)
+
+        scraper = scraper_for(site, max_per_host=args.concurrency)
+        search = lambda query: scraper.search(HOTELS, query)
+        results['cold_pooled'] = run_phase(search, queries, args.concurrency)
+        results['revalidated'] = run_phase(search, queries, args.concurrency)
+        # The 304s above came back with max-age, so the pages are now fresh in the cache
+        site.max_age = 300
+        run_phase(search, queries, args.concurrency)
+        results['cache_hits'] = run_phase(search, queries, args.concurrency)
+        results['fetcher'] = scraper.fetcher.stats()
+
+        limited = scraper_for(site, rate_per_host=args.rate, burst=1, max_per_host=args.concurrency,
+                              cache_entries=0)
+        sample = queries[:max(int(args.rate * 2), 1)]
+        results['rate_limited'] = dict(run_phase(lambda query: limited.search(HOTELS, query), sample,
+                                                 args.concurrency), limit=args.rate)
+    finally:
+        site.stop()
+
+    flaky_site = FixtureSite(items=args.items, latency=args.latency, failure_rate=args.failure_rate, seed=1).start()
+    try:
+        flaky = scraper_for(flaky_site, max_retries=4, cache_entries=0)
+        results['flaky'] = dict(run_phase(lambda query: flaky.search(HOTELS, query), queries, args.concurrency),
+                                failure_rate=args.failure_rate, retries=flaky.fetcher.stats()['retries'],
+                                failed_fetches=flaky.fetcher.stats()['failures'])
+    finally:
+        flaky_site.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{args.queries} searches, {args.concurrency} in flight, {args.items} results per page "
+          f"({results['parse_only']['page_kb']} KB), {args.latency * 1000:.0f} ms site latency\n")
+    print(f"parse only      {results['parse_only']['pages_per_second']:>9} pages/s  "
+          f"{results['parse_only']['mean_ms_per_page']} ms/page")
+    for name in ('cold_unpooled', 'cold_pooled', 'revalidated', 'cache_hits', 'rate_limited', 'flaky'):
+        stats = results[name]
+        print(f"{name:<15} {stats['pages_per_second']:>9} pages/s  {stats['items_per_second']:>9} results/s  "
+              f"{stats['empty_pages']} empty")
+    print(f"\nrate limit {args.rate}/s; flaky host: {results['flaky']['retries']} retries, "
+          f"{results['flaky']['failed_fetches']} searches failed after retries")
+
+
+if __name__ == '__main__':
+    main()
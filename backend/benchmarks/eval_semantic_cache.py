@@ -0,0 +1,221 @@
+"""
+Semantic Cache Evaluation - Hit rate and false-hit rate of the semantic cache per threshold
+Scores labeled request pairs (same intent or not) and optionally replays a request log
+
+Usage (from backend/):
+    python -m benchmarks.eval_semantic_cache [--pairs pairs.jsonl] [--log requests.jsonl]
+                                             [--thresholds 0.8,0.85,0.9,0.92,0.95] [--embedder hashing] [--json]
+
+pairs.jsonl lines: {"endpoint": "activities", "a": {...fields}, "b": {...fields}, "same": true}
+(activity pairs whose preferences differ after synonym folding never hit, as in the service)
+requests.jsonl lines: {"endpoint": "activities", "fields": {...}, "scope": "", "intent": "paris-food"}
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+import numpy as np
+from services.semantic_cache import HashingEmbedder, OllamaEmbedder, SemanticCache, preference_scope
+
+# Same-intent variants of each request; requests from different groups must not share answers
+ACTIVITY_GROUPS = [
+    [
+        {'location': 'Paris', 'preferences': ['museums', 'food']},
+        {'location': 'Paris, France', 'preferences': ['food', 'museums']},
+        {'location': 'paris', 'preferences': ['Museum', 'Cuisine']},
+        {'location': 'PARIS France', 'preferences': ['food', 'museum']},
+    ],
+    [
+        {'location': 'Paris, Texas', 'preferences': ['museums', 'food']},
+        {'location': 'Paris TX', 'preferences': ['food', 'museums']},
+    ],
+    [
+        {'location': 'Kyoto', 'preferences': ['history', 'temples']},
+        {'location': 'Kyoto, Japan', 'preferences': ['temples', 'historical sites']},
+        {'location': 'kyoto', 'preferences': ['heritage', 'temple']},
+    ],
+    [
+        {'location': 'Kyoto', 'preferences': ['nightlife', 'bars']},
+        {'location': 'Kyoto, Japan', 'preferences': ['clubbing', 'nightlife']},
+    ],
+    [
+        {'location': 'Lisbon', 'preferences': ['food', 'cheap']},
+        {'location': 'Lisbon, Portugal', 'preferences': ['budget', 'dining']},
+    ],
+    [
+        {'location': 'Porto', 'preferences': ['food', 'cheap']},
+        {'location': 'Porto, Portugal', 'preferences': ['affordable', 'cuisine']},
+    ],
+    [
+        {'location': 'Nice', 'preferences': ['beaches', 'art']},
+        {'location': 'Nice, France', 'preferences': ['art galleries', 'beach']},
+    ],
+    [
+        {'location': 'Venice', 'preferences': ['beaches', 'art']},
+        {'location': 'Venice, Italy', 'preferences': ['art', 'beach']},
+    ],
+]
+
+# Requests that differ only in preferences, budget level or which same-named city, and must never share an answer
+ACTIVITY_NEGATIVE_PAIRS = [
+    ({'location': 'Rome', 'preferences': ['italian', '$ budget']},
+     {'location': 'Rome', 'preferences': ['italian', '$$$$ budget']}),
+    ({'location': 'Rome', 'preferences': ['italian', 'low budget']},
+     {'location': 'Rome', 'preferences': ['italian', 'high budget']}),
+    ({'location': 'Paris', 'preferences': ['museums']},
+     {'location': 'Paris', 'preferences': ['museums', 'nightlife']}),
+    ({'location': 'Lisbon', 'preferences': ['food', 'cheap']},
+     {'location': 'Lisbon', 'preferences': ['food', 'upscale']}),
+    # Same city name, different city
+    ({'location': 'Paris', 'preferences': ['museums', 'food']},
+     {'location': 'Paris, Texas', 'preferences': ['museums', 'food']}),
+    ({'location': 'London', 'preferences': ['theatre']},
+     {'location': 'London, Ontario', 'preferences': ['theatre']}),
+    ({'location': 'Rome', 'preferences': ['history']},
+     {'location': 'Rome, Georgia', 'preferences': ['history']}),
+    ({'location': 'Moscow', 'preferences': ['nature']},
+     {'location': 'Moscow, Idaho', 'preferences': ['nature']}),
+]
+
+DESTINATION_GROUPS = [
+    [{'destination': 'Paris'}, {'destination': 'Paris, France'}, {'destination': 'paris france'}],
+    [{'destination': 'Paris, Texas'}, {'destination': 'Paris TX'}],
+    [{'destination': 'New York City'}, {'destination': 'New York, NY'}, {'destination': 'new york city, usa'}],
+    [{'destination': 'York, England'}, {'destination': 'York'}],
+    [{'destination': 'Rome'}, {'destination': 'Rome, Italy'}],
+    [{'destination': 'Romania'}],
+]
+
+
+def builtin_pairs() -> List[Dict]:
+    """Every pair of requests from the built-in groups, labeled same or different intent"""
+    pairs = []
+    for endpoint, groups in (('activities', ACTIVITY_GROUPS), ('cultural_insights', DESTINATION_GROUPS)):
+        requests = [(group_id, fields) for group_id, group in enumerate(groups) for fields in group]
+        for i, (group_a, a) in enumerate(requests):
+            for group_b, b in requests[i + 1:]:
+                pairs.append({'endpoint': endpoint, 'a': a, 'b': b, 'same': group_a == group_b})
+    pairs.extend({'endpoint': 'activities', 'a': a, 'b': b, 'same': False} for a, b in ACTIVITY_NEGATIVE_PAIRS)
+    return pairs
+
+
+def request_scope(endpoint: str, fields: Dict) -> str:
+    """Exact-match scope the service uses for a request (see LLMService._activities_request)"""
+    return preference_scope(fields.get('preferences', [])) if endpoint == 'activities' else ''
+
+
+def embedded_fields(endpoint: str, fields: Dict) -> Dict:
+    """Fields the service embeds for a request (activity preferences only go into the scope)"""
+    return {'location': fields['location']} if endpoint == 'activities' else fields
+
+
+def load_jsonl(path: str) -> List[Dict]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate_pairs(embedder, pairs: List[Dict], thresholds: List[float]) -> Dict:
+    """Recall on same-intent pairs and false-hit rate on different-intent pairs per threshold"""
+    started = time.perf_counter()
+    scores = np.array([
+        float(embedder.embed(embedded_fields(pair['endpoint'], pair['a']))
+              @ embedder.embed(embedded_fields(pair['endpoint'], pair['b'])))
+        if request_scope(pair['endpoint'], pair['a']) == request_scope(pair['endpoint'], pair['b']) else 0.0
+        for pair in pairs
+    ])
+    elapsed = time.perf_counter() - started
+    same = np.array([bool(pair['same']) for pair in pairs])
+
+    rows = []
+    for threshold in thresholds:
+        hit = scores >= threshold
+        rows.append({
+            'threshold': threshold,
+            'hit_rate': round(float(hit[same].mean()), 3) if same.any() else None,
+            'false_hit_rate': round(float(hit[~same].mean()), 3) if (~same).any() else None
+        })
+
+    worst = sorted(
+        ({'score': round(float(score), 3), 'a': pair['a'], 'b': pair['b']}
+         for score, pair, is_same in zip(scores, pairs, same) if not is_same),
+        key=lambda row: -row['score']
+    )[:5]
+    return {
+        'pairs': len(pairs),
+        'same_intent_pairs': int(same.sum()),
+        'embed_ms_per_request': round(elapsed * 1000 / (2 * len(pairs)), 3) if pairs else None,
+        'thresholds': rows,
+        'closest_different_intent': worst
+    }
+
+
+def replay_log(embedder, records: List[Dict], threshold: float) -> Dict:
+    """Replay a request log through a fresh semantic cache and count hits and wrong answers"""
+    cache = SemanticCache(embedder=embedder, threshold=threshold)
+    hits = false_hits = 0
+    for record in records:
+        endpoint, fields, scope = record['endpoint'], record['fields'], record.get('scope', '')
+        intent = record.get('intent', json.dumps(fields, sort_keys=True))
+        found = cache.lookup(endpoint, fields, scope)
+        if found is None:
+            cache.add(endpoint, fields, intent, scope)
+            continue
+        hits += 1
+        if found[0] != intent:
+            false_hits += 1
+    return {
+        'threshold': threshold,
+        'requests': len(records),
+        'hit_rate': round(hits / len(records), 3) if records else None,
+        'false_hit_rate': round(false_hits / hits, 3) if hits else None
+    }
+
+
+def build_embedder(name: str):
+    if name.startswith('ollama:'):
+        import os
+        from services.ollama_client import AsyncOllamaClient
+        client = AsyncOllamaClient(os.getenv('OLLAMA_BASE_URLS', os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')))
+        return OllamaEmbedder(client, name.split(':', 1)[1])
+    return HashingEmbedder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', help='Labeled request pairs (defaults to the built-in set)')
+    parser.add_argument('--log', help='Request log to replay')
+    parser.add_argument('--thresholds', default='0.8,0.85,0.9,0.92,0.95')
+    parser.add_argument('--embedder', default='hashing', help="'hashing' or 'ollama:<embedding model>'")
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args()
+
+    embedder = build_embedder(args.embedder)
+    thresholds = [float(value) for value in args.thresholds.split(',')]
+    pairs = load_jsonl(args.pairs) if args.pairs else builtin_pairs()
+
+    results = {'embedder': embedder.name, 'pairs': evaluate_pairs(embedder, pairs, thresholds)}
+    if args.log:
+        records = load_jsonl(args.log)
+        results['replay'] = [replay_log(embedder, records, threshold) for threshold in thresholds]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    report = results['pairs']
+    print(f"Embedder: {results['embedder']}  ({report['pairs']} pairs, {report['same_intent_pairs']} same intent, "
+          f"{report['embed_ms_per_request']} ms per embedding)")
+    print(f"{'threshold':>10} {'hit rate':>10} {'false hits':>11}")
+    for row in report['thresholds']:
+        print(f"{row['threshold']:>10} {row['hit_rate']!s:>10} {row['false_hit_rate']!s:>11}")
+    print("Closest different-intent pairs:")
+    for row in report['closest_different_intent']:
+        print(f"  {row['score']:.3f}  {row['a']}  vs  {row['b']}")
+    for row in results.get('replay', []):
+        print(f"Replay @ {row['threshold']}: {row['requests']} requests, hit rate {row['hit_rate']}, "
+              f"false hits {row['false_hit_rate']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Fake Ollama Server - Offline stand-in for Ollama's HTTP API in benchmarks and load tests
+Answers /api/generate (streaming and not) with canned responses to our prompts at a configurable
+time-to-first-token and tokens/second, and can serve malformed output at a configurable rate
+
+Usage (from backend/):
+    python -m benchmarks.fake_ollama [--port 11434] [--ttft 0.2] [--tokens-per-second 40]
+                                     [--malformed-rate 0.1] [--seed 1]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from benchmarks.llm_corpus import ARTIFACTS, sample_document
+
+# Characters per token, roughly what llama3's tokenizer averages on English text
+CHARS_PER_TOKEN = 4
+
+# Stream parts are flushed at most this often so fast token rates do not become one write per token
+STREAM_INTERVAL = 0.02
+
+GARBAGE = "I'm sorry, I can't help with planning that trip right now."
+
+
+def classify_prompt(prompt: str) -> Tuple[str, str, int]:
+    """
+    Which of our prompts this is
+
+    Returns:
+        (kind, destination, number) where number is the trip length for
+        itineraries and outlines or the day for day prompts
+    """
+    destination = 'the city'
+    match = re.search(r'Destination: (.+)', prompt) or re.search(r'(?:in|for|to) ([A-Z][^.\n]*?)(?: for someone|\.|$)', prompt, re.M)
+    if match:
+        destination = match.group(1).strip()
+
+    match = re.search(r'Outline a (\d+)-day', prompt)
+    if match:
+        return 'outline', destination, int(match.group(1))
+    match = re.search(r'Plan day (\d+) of a', prompt)
+    if match:
+        return 'day', destination, int(match.group(1))
+    if 'day-by-day itinerary' in prompt:
+        match = re.search(r'Duration: (\d+)', prompt)
+        return 'itinerary', destination, int(match.group(1)) if match else 3
+    if 'Recommend' in prompt:
+        return 'activities', destination, 0
+    if 'cultural insights' in prompt:
+        return 'cultural', destination, 0
+    if 'Optimize this travel itinerary' in prompt:
+        return 'budget', destination, 0
+    if 'running summary' in prompt:
+        return 'chat_summary', destination, 0
+    return 'chat', destination, 0
+
+
+def canned_response(kind: str, destination: str, number: int) -> str:
+    """Well-formed answer text for a classified prompt"""
+    if kind == 'outline':
+        days = sample_document('itinerary', destination, number)['itinerary']
+        return json.dumps({
+            'days': [{'day': day['day'], 'title': day['title'], 'focus': day['morning']} for day in days],
+            'overview': f"A {number}-day trip through {destination}.",
+            'packing_suggestions': ['Comfortable shoes', 'Rain jacket'],
+            'cultural_tips': ['Greet shopkeepers when entering']
+        }, indent=4)
+    if kind == 'day':
+        day = sample_document('itinerary', destination, number)['itinerary'][-1]
+        return json.dumps(day, indent=4)
+    if kind in ('itinerary', 'activities', 'cultural', 'budget'):
+        return json.dumps(sample_document(kind, destination, number or 3), indent=4)
+    if kind == 'chat_summary':
+        return f"The traveller is planning a trip to {destination} and asked about food and museums."
+    return (f"{destination} has plenty to offer! I'd suggest an early start at the main museum "
+            f"and dinner near the old town. ITINERARY_PATCH:\n"
+            f'[{{"op": "replace", "day": 1, "slot": "afternoon", "value": "Museum visit (2 hours)"}}]')
+
+
+class FakeOllama:
+    """
+    Threaded HTTP server speaking the subset of Ollama's API the backend uses
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, ttft: float = 0.2,
+                 tokens_per_second: float = 40, malformed_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the server (call start() to serve)
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            ttft: Seconds before the first token (prompt evaluation)
+            tokens_per_second: Generation speed after the first token (0 answers instantly)
+            malformed_rate: Share of JSON answers served with an artifact (prose, fences,
+                            trailing commas, stray braces, truncation) or as plain prose
+            seed: Random seed for reproducible malformed responses
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.malformed: Dict[str, int] = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeOllama':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-ollama', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'generations': sum(self.requests.values()),
+                'by_kind': dict(self.requests),
+                'malformed': dict(self.malformed)
+            }
+
+    def respond(self, prompt: str) -> str:
+        """Answer text for a prompt, malformed at the configured rate"""
+        kind, destination, number = classify_prompt(prompt)
+        text = canned_response(kind, destination, number)
+        artifact = None
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            if kind not in ('chat', 'chat_summary') and self._random.random() < self.malformed_rate:
+                artifact = self._random.choice([name for name in ARTIFACTS if name != 'clean'] + ['garbage'])
+                self.malformed[artifact] = self.malformed.get(artifact, 0) + 1
+        if artifact == 'garbage':
+            return GARBAGE
+        return ARTIFACTS[artifact](text) if artifact else text
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload: Dict, status: int = 200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/api/tags'):
+                    self._send_json({'models': [{'name': 'llama3:8b'}]})
+                elif self.path.startswith('/api/version'):
+                    self._send_json({'version': '0.0.0-fake'})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not self.path.startswith('/api/generate'):
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+
+                prompt = request.get('prompt', '')
+                if not prompt:
+                    # Warm-up request: load the model, generate nothing
+                    self._send_json({'model': request.get('model'), 'response': '', 'done': True})
+                    return
+
+                started = time.perf_counter()
+                text = fake.respond(prompt)
+                tokens = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+                prompt_tokens = len(prompt) // CHARS_PER_TOKEN + 1
+                token_delay = 1 / fake.tokens_per_second if fake.tokens_per_second > 0 else 0
+
+                def final(extra: Dict) -> Dict:
+                    total = time.perf_counter() - started
+                    return dict(extra, **{
+                        'model': request.get('model'),
+                        'done': True,
+                        'context': list(request.get('context') or []) + [0] * (prompt_tokens + len(tokens)),
+                        'total_duration': int(total * 1e9),
+                        'load_duration': 0,
+                        'prompt_eval_count': prompt_tokens,
+                        'prompt_eval_duration': int(fake.ttft * 1e9),
+                        'eval_count': len(tokens),
+                        'eval_duration': int(max(total - fake.ttft, 1e-6) * 1e9)
+                    })
+
+                time.sleep(fake.ttft)
+                if not request.get('stream', True):
+                    time.sleep(token_delay * len(tokens))
+                    self._send_json(final({'response': text}))
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def write(part: Dict):
+                    data = (json.dumps(part) + '\n').encode('utf-8')
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+
+                try:
+                    # Batch tokens so each write covers about STREAM_INTERVAL seconds of generation
+                    per_part = max(1, int(STREAM_INTERVAL / token_delay)) if token_delay else len(tokens) or 1
+                    for index in range(0, len(tokens), per_part):
+                        write({'model': request.get('model'), 'response': ''.join(tokens[index:index + per_part]),
+                               'done': False})
+                        time.sleep(token_delay * per_part)
+                    write(final({'response': ''}))
+                    self.wfile.write(b'0\r\n\r\n')
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client stopped reading (e.g. the parser already had the whole object)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--ttft', type=float, default=0.2, help='Seconds to the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=40, help='Generation speed (0 = instant)')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of malformed JSON answers')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeOllama(args.host, args.port, args.ttft, args.tokens_per_second, args.malformed_rate, args.seed)
+    print(f"Fake Ollama listening on {fake.url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
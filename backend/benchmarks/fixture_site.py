@@ -0,0 +1,296 @@
+"""
+Fixture Booking Site - Local stand-in for a booking site's search pages
+Serves flight, hotel and activity result pages with schema.org JSON-LD (the markup
+the schema_org parser reads), ETag / Last-Modified validators and optional latency,
+rate limiting and transient failures, so the scraping pipeline runs offline
+
+Usage (from backend/):
+    python -m benchmarks.fixture_site [--port 8800] [--items 20] [--latency 0.05]
+                                      [--failure-rate 0.05] [--max-age 0]
+
+Then scrape it with e.g.
+    SCRAPER_SITES='[{"name": "fixture", "kind": "flights", "url": "http://127.0.0.1:8800/flights"}]'
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+AIRLINES = [("SkyLine Airways", "SKY"), ("Global Wings", "GLW"), ("Pacific Air", "PAC"),
+            ("Euro Express", "EEX"), ("Continental Flights", "CON")]
+
+HOTEL_TYPES = [("Luxury Hotel", 5, 300), ("Boutique Hotel", 4, 200), ("Business Hotel", 4, 150),
+               ("Budget Hotel", 3, 80), ("Resort", 4, 250), ("Apartment", 4, 120)]
+
+ACTIVITY_TYPES = ["City Tour", "Food Tour", "Museum Visit", "Adventure Activity",
+                  "Cultural Experience", "Water Sports", "Day Trip", "Nightlife Experience"]
+
+
+def _flight(rng: random.Random, index: int, query: Dict) -> Dict:
+    name, code = AIRLINES[index % len(AIRLINES)]
+
+    def leg(origin, destination, day):
+        hour, minutes = rng.randint(0, 18), rng.choice([0, 15, 30, 45])
+        length = rng.randint(2, 12)
+        return {
+            "@type": "Flight",
+            "flightNumber": f"{code}{100 + index * 7 % 900}",
+            "provider": {"@type": "Airline", "name": name, "iataCode": code},
+            "departureAirport": {"@type": "Airport", "iataCode": origin},
+            "arrivalAirport": {"@type": "Airport", "iataCode": destination},
+            "departureTime": f"{day}T{hour:02d}:{minutes:02d}:00",
+            "arrivalTime": f"{day}T{(hour + length) % 24:02d}:{minutes:02d}:00",
+            "departureTerminal": str(rng.randint(1, 4)),
+            "arrivalTerminal": str(rng.randint(1, 4)),
+            "estimatedFlightDuration": f"PT{length}H{minutes}M" if minutes else f"PT{length}H",
+            "additionalProperty": [{"@type": "PropertyValue", "name": "stops", "value": rng.choice([0, 0, 0, 1])}]
+        }
+
+    origin, destination = query.get('origin', 'JFK'), query.get('destination', 'CDG')
+    legs = [leg(origin, destination, query.get('departure_date', '2026-01-01'))]
+    if query.get('return_date'):
+        legs.append(leg(destination, origin, query['return_date']))
+    properties = [
+        {"@type": "PropertyValue", "name": "wifi", "value": rng.random() < 0.5},
+        {"@type": "PropertyValue", "name": "meals", "value": rng.random() < 0.7},
+        {"@type": "PropertyValue", "name": "entertainment", "value": rng.random() < 0.7},
+        {"@type": "PropertyValue", "name": "cabin", "value": rng.choice(["Economy", "Economy", "Premium Economy"])},
+        {"@type": "PropertyValue", "name": "checked_baggage", "value": "1 bag(s) included"}
+    ]
+    offer = {"@type": "Offer", "price": rng.randint(150, 1200), "priceCurrency": "USD"}
+    rating = {"@type": "AggregateRating", "ratingValue": round(rng.uniform(3.5, 5.0), 1),
+              "reviewCount": rng.randint(100, 5000)}
+    if len(legs) == 1:
+        return dict(legs[0], offers=offer, aggregateRating=rating,
+                    additionalProperty=legs[0]["additionalProperty"] + properties)
+    return {"@type": "Trip", "subTrip": legs, "offers": offer, "aggregateRating": rating,
+            "additionalProperty": properties}
+
+
+def _hotel(rng: random.Random, index: int, query: Dict) -> Dict:
+    hotel_type, stars, rate = HOTEL_TYPES[index % len(HOTEL_TYPES)]
+    destination = query.get('destination', 'Paris')
+    return {
+        "@type": "Hotel",
+        "identifier": f"h{index + 1}",
+        "name": f"{rng.choice(['The', 'Grand', 'Royal', 'Harbor'])} {destination} {hotel_type} {index + 1}",
+        "starRating": {"@type": "Rating", "ratingValue": stars},
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": round(rng.uniform(7.0, 9.5), 1),
+                            "reviewCount": rng.randint(200, 5000)},
+        "address": {"@type": "PostalAddress", "streetAddress": f"{rng.randint(1, 999)} {destination} Street",
+                    "addressLocality": destination},
+        "image": [f"https://placeholder.com/hotel{index + 1}_{n}.jpg" for n in (1, 2, 3)],
+        "amenityFeature": [{"@type": "LocationFeatureSpecification", "name": name, "value": True}
+                           for name in ["Free WiFi", "Air Conditioning", "Restaurant", "Pool"][:stars - 1]],
+        "makesOffer": {"@type": "Offer", "price": rate + rng.randint(-30, 50), "priceCurrency": "USD"},
+        "numberOfRooms": rng.randint(1, 10),
+        "checkinTime": "15:00",
+        "checkoutTime": "11:00",
+        "petsAllowed": rng.random() < 0.5,
+        "additionalProperty": [
+            {"@type": "PropertyValue", "name": "type", "value": hotel_type},
+            {"@type": "PropertyValue", "name": "district", "value": rng.choice(["Downtown", "Waterfront"])},
+            {"@type": "PropertyValue", "name": "distance_to_center", "value": f"{rng.uniform(0.5, 3.5):.1f} km"},
+            {"@type": "PropertyValue", "name": "taxes", "value": round(rate * 0.15, 2)},
+            {"@type": "PropertyValue", "name": "room_type", "value": "Deluxe Room"},
+            {"@type": "PropertyValue", "name": "cancellation", "value": "Free cancellation until 24 hours before check-in"}
+        ]
+    }
+
+
+def _activity(rng: random.Random, index: int, query: Dict) -> Dict:
+    activity_type = ACTIVITY_TYPES[index % len(ACTIVITY_TYPES)]
+    destination = query.get('destination', 'Paris')
+    return {
+        "@type": "TouristTrip",
+        "identifier": f"a{index + 1}",
+        "name": f"{destination} {activity_type}",
+        "touristType": activity_type,
+        "description": f"Experience the best of {destination} with this {activity_type.lower()}",
+        "duration": f"PT{rng.randint(2, 8)}H",
+        "offers": {"@type": "Offer", "price": rng.randint(30, 200), "priceCurrency": "USD"},
+        "aggregateRating": {"@type": "AggregateRating", "ratingValue": round(rng.uniform(4.0, 5.0), 1),
+                            "reviewCount": rng.randint(50, 1000)},
+        "availableLanguage": ["English", "French"],
+        "additionalProperty": [
+            {"@type": "PropertyValue", "name": "includes", "value": ["Professional guide", "Entry tickets"]},
+            {"@type": "PropertyValue", "name": "group_size", "value": f"Up to {rng.randint(10, 30)} people"}
+        ]
+    }
+
+
+BUILDERS = {'flights': _flight, 'hotels': _hotel, 'activities': _activity}
+
+
+def fixture_page(kind: str, query: Dict, items: int = 20) -> str:
+    """A search result page whose content depends only on the kind and query"""
+    seed = zlib.crc32(json.dumps([kind, query], sort_keys=True).encode('utf-8'))
+    rng = random.Random(seed)
+    results = [BUILDERS[kind](rng, index, query) for index in range(items)]
+    # Real result pages carry far more markup than data; pad each card accordingly
+    cards = '\n'.join(
+        f'<li class="result-card"><div class="title">{result.get("name") or result.get("@type")}</div>'
+        f'<div class="details">{"<span>detail</span>" * 20}</div></li>'
+        for result in results
+    )
+    ld_json = json.dumps({"@context": "https://schema.org", "@type": "ItemList",
+                          "itemListElement": [{"@type": "ListItem", "position": index + 1, "item": result}
+                                              for index, result in enumerate(results)]})
+    return (f'<!DOCTYPE html><html><head><title>{kind.title()} results</title>'
+            f'<script type="application/ld+json">{ld_json}</script></head>'
+            f'<body><nav>{"<a href=#>link</a>" * 50}</nav><ul class="results">{cards}</ul></body></html>')
+
+
+class FixtureSite:
+    """
+    Threaded HTTP server for the fixture pages
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, items: int = 20, latency: float = 0.0,
+                 failure_rate: float = 0.0, rate_limit: Optional[float] = None, max_age: int = 0,
+                 seed: Optional[int] = None):
+        """
+        Initialize the server (call start() to serve)
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            items: Results per page
+            latency: Seconds before each answer (including 304s)
+            failure_rate: Share of requests answered with 503
+            rate_limit: Requests per second above which requests get 429 with Retry-After
+            max_age: Cache-Control max-age of the pages (0: revalidate every time)
+            seed: Random seed for the failures
+        """
+        self.items = items
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rate_limit = rate_limit
+        self.max_age = max_age
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent: List[float] = []
+        self.counters = {'requests': 0, 'pages': 0, 'not_modified': 0, 'failures': 0, 'rate_limited': 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FixtureSite':
+        threading.Thread(target=self.server.serve_forever, name='fixture-site', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def _admit(self) -> Optional[int]:
+        """None to serve the request, or the status to answer instead"""
+        with self._lock:
+            self.counters['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._recent = [moment for moment in self._recent if now - moment < 1.0]
+                if len(self._recent) >= self.rate_limit:
+                    self.counters['rate_limited'] += 1
+                    return 429
+                self._recent.append(now)
+            if self._random.random() < self.failure_rate:
+                self.counters['failures'] += 1
+                return 503
+        return None
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, keep-alive
+            # clients would wait for the delayed ACK on every request
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', headers: Optional[Dict] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if site.latency:
+                    time.sleep(site.latency)
+                parts = urlsplit(self.path)
+                kind = parts.path.strip('/').split('/')[-1]
+                if kind not in BUILDERS:
+                    self._send(404, b'not found')
+                    return
+
+                refused = site._admit()
+                if refused:
+                    self._send(refused, b'try again later', {'Retry-After': '1'} if refused == 429 else None)
+                    return
+
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                body = fixture_page(kind, query, site.items).encode('utf-8')
+                etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+                headers = {
+                    'ETag': etag,
+                    'Last-Modified': site.last_modified,
+                    'Cache-Control': f'max-age={site.max_age}'
+                }
+                if self.headers.get('If-None-Match') == etag:
+                    site._count('not_modified')
+                    self._send(304, b'', headers)
+                    return
+                site._count('pages')
+                self._send(200, body, dict(headers, **{'Content-Type': 'text/html; charset=utf-8'}))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--items', type=int, default=20, help='Results per page')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before each answer')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests/second before answering 429')
+    parser.add_argument('--max-age', type=int, default=0, help='Cache-Control max-age of the pages')
+    args = parser.parse_args()
+
+    site = FixtureSite(args.host, args.port, args.items, args.latency, args.failure_rate,
+                       args.rate_limit, args.max_age)
+    print(f"Fixture site listening on {site.url} (/flights, /hotels, /activities)")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+LLM Response Corpus - Raw model outputs for parser benchmarks
+Builds responses in the shapes llama3 actually returns for our prompts, including the
+artifacts that used to throw generations away (prose, fences, trailing commas, stray braces, cut-offs)
+"""
+
+import json
+import re
+from typing import Dict, List
+
+DESTINATIONS = ['Paris, France', 'Kyoto', 'Lisbon', 'New York City', 'Cape Town']
+
+
+def _itinerary(destination: str, days: int) -> Dict:
+    return {
+        "itinerary": [
+            {
+                "day": day,
+                "title": f"Day {day}: Exploring {destination}",
+                "morning": f"9:00 AM - Visit the old town of {destination} and its main square (2 hours)",
+                "afternoon": "1:00 PM - Lunch at a local market, then a guided museum tour {\"optional\"}",
+                "evening": "7:30 PM - Dinner at a family-run restaurant; try the regional specialty",
+                "estimated_cost": 120 + day * 5,
+                "tips": "Buy the city pass; queues at the museum are shorter after 3 PM."
+            }
+            for day in range(1, days + 1)
+        ],
+        "overview": f"A {days}-day trip through {destination} balancing culture, food and relaxed walks.",
+        "total_estimated_cost": sum(120 + day * 5 for day in range(1, days + 1)),
+        "packing_suggestions": ["Comfortable shoes", "Rain jacket", "Power adapter"],
+        "cultural_tips": ["Greet shopkeepers when entering", "Tipping is modest"]
+    }
+
+
+def _activities(destination: str) -> List[Dict]:
+    return [
+        {
+            "name": f"{destination} {name}",
+            "description": f"A popular {name.lower()} with great reviews",
+            "duration": "2-3 hours",
+            "cost_estimate": "$$",
+            "best_time": best_time,
+            "indoor": indoor
+        }
+        for name, best_time, indoor in [
+            ("Art Museum", "Morning", True),
+            ("Food Market Walk", "Afternoon", False),
+            ("Harbour Cruise", "Evening", False),
+            ("Cooking Class", "Afternoon", True),
+            ("Old Town Walking Tour", "Morning", False)
+        ]
+    ]
+
+
+def _cultural(destination: str) -> Dict:
+    return {
+        "customs": ["Shake hands when meeting", "Meals are long and social"],
+        "etiquette": ["Dress modestly in religious sites", "Do not rush waiters"],
+        "basic_phrases": {"hello": "Bonjour", "thank_you": "Merci"},
+        "tipping_guide": "Service is included; round up for good service.",
+        "safety_tips": ["Watch for pickpockets on the metro"],
+        "local_insights": [f"Locals in {destination} eat dinner late"]
+    }
+
+
+def _budget() -> Dict:
+    return {
+        "optimizations": [
+            {"category": "accommodation", "current_cost": 900, "suggested_cost": 650,
+             "suggestions": ["Stay in a guesthouse", "Book refundable rates early"]},
+            {"category": "food", "current_cost": 400, "suggested_cost": 300,
+             "suggestions": ["Lunch menus instead of dinner"]}
+        ],
+        "estimated_savings": 350,
+        "revised_total": 1650
+    }
+
+
+def _with_trailing_commas(text: str) -> str:
+    return re.sub(r'([\]}"0-9el])(\s*\n\s*)([\]}])', r'\1,\2\3', text)
+
+
+ARTIFACTS = {
+    'clean': lambda text: text,
+    'prose_wrapped': lambda text: f"Here is your plan:\n\n{text}\n\nEnjoy your trip!",
+    'code_fence': lambda text: f"Sure! Here it is:\n```json\n{text}\n```\nLet me know if you need changes.",
+    'trailing_commas': lambda text: _with_trailing_commas(text),
+    'stray_brace_before': lambda text: f"I replaced the {{destination}} placeholder with your city.\n{text}",
+    'stray_brace_after': lambda text: f"{text}\n\nNote: prices are estimates {{subject to change}}.",
+    'truncated': lambda text: text[:int(len(text) * 0.85)],
+}
+
+
+def sample_document(kind: str, destination: str, days: int = 3):
+    """
+    A well-formed answer to one of our prompts
+
+    Args:
+        kind: 'itinerary', 'activities', 'cultural' or 'budget'
+        destination: City the answer is about
+        days: Itinerary length
+    """
+    if kind == 'itinerary':
+        return _itinerary(destination, days)
+    if kind == 'activities':
+        return _activities(destination)
+    if kind == 'cultural':
+        return _cultural(destination)
+    if kind == 'budget':
+        return _budget()
+    raise ValueError(f"Unknown document kind: {kind}")
+
+
+def build_corpus() -> List[Dict]:
+    """
+    Build the benchmark corpus
+
+    Returns:
+        List of {"kind", "artifact", "raw"} records
+    """
+    records = []
+    for destination in DESTINATIONS:
+        documents = {
+            'itinerary': _itinerary(destination, 7),
+            'itinerary_long': _itinerary(destination, 14),
+            'activities': _activities(destination),
+            'cultural': _cultural(destination),
+            'budget': _budget(),
+        }
+        for kind, document in documents.items():
+            text = json.dumps(document, indent=4, ensure_ascii=False)
+            for artifact, transform in ARTIFACTS.items():
+                records.append({'kind': kind, 'artifact': artifact, 'raw': transform(text)})
+
+        update = json.dumps(_itinerary(destination, 3), indent=4)
+        records.append({
+            'kind': 'chat_update',
+            'artifact': 'clean',
+            'raw': f"Great idea! I've added a museum visit to day 2.\n\nITINERARY_UPDATE:\n{update}"
+        })
+    return records
+
+
+def load_corpus(path: str) -> List[Dict]:
+    """Load recorded responses from a JSONL file of {"kind", "raw"[, "artifact"]} records"""
+    records = []
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault('artifact', 'recorded')
+                records.append(record)
+    return records
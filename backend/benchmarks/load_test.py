@@ -0,0 +1,324 @@
+"""
+Load Test - End-to-end latency, throughput and error rate of the Flask app without a real model
+Starts a fake Ollama server and the app on local ports, then drives every blueprint
+(itinerary, bookings, recommendations, weather) from concurrent clients over HTTP
+
+Usage (from backend/):
+    python -m benchmarks.load_test [--concurrency 16] [--duration 20] [--requests N]
+                                   [--scenarios itinerary.generate,bookings.hotels]
+                                   [--ttft 0.05] [--tokens-per-second 400] [--malformed-rate 0.1]
+                                   [--cache] [--json] [--output results.json]
+                                   [--max-error-rate 0.01] [--max-p95-ms 2000]
+
+The response caches are disabled unless --cache is given, so every request reaches the
+(fake) model. With --max-error-rate / --max-p95-ms the exit code is 1 when a gate fails.
+"""
+
+import argparse
+import contextlib
+import http.client
+import importlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+import numpy as np
+from benchmarks.fake_ollama import FakeOllama
+
+DESTINATIONS = ['Paris, France', 'Kyoto', 'Lisbon', 'New York City', 'Cape Town', 'Rome', 'Barcelona',
+                'Bangkok', 'Istanbul', 'Mexico City', 'Sydney', 'Prague']
+INTERESTS = ['Culture & History', 'Food & Dining', 'Adventure', 'Nature & Wildlife', 'Shopping', 'Nightlife']
+
+SAMPLE_ITINERARY = {
+    'itinerary': [
+        {'day': day, 'title': f'Day {day}', 'morning': 'Old town walk', 'afternoon': 'Museum',
+         'evening': 'Dinner', 'estimated_cost': 150, 'tips': 'Book ahead'}
+        for day in (1, 2, 3)
+    ],
+    'overview': 'Three relaxed days',
+    'total_estimated_cost': 450
+}
+
+
+def _trip(rng: random.Random, min_days: int = 3, max_days: int = 7) -> Dict:
+    return {
+        'destination': rng.choice(DESTINATIONS),
+        'duration': rng.randint(min_days, max_days),
+        'budget': rng.randrange(500, 6000, 50),
+        'interests': rng.sample(INTERESTS, 2),
+        'travel_style': rng.choice(['budget', 'balanced', 'comfort', 'luxury'])
+    }
+
+
+def _query(**params) -> str:
+    return urlencode(params)
+
+
+# name -> (weight, builder(rng) -> (method, path, json_body))
+SCENARIOS = {
+    'itinerary.generate': (3, lambda rng: ('POST', '/api/itinerary/generate', _trip(rng))),
+    'itinerary.generate_long': (1, lambda rng: ('POST', '/api/itinerary/generate', _trip(rng, 8, 12))),
+    'itinerary.stream': (2, lambda rng: ('POST', '/api/itinerary/generate/stream', _trip(rng))),
+    'itinerary.chat': (3, lambda rng: ('POST', '/api/itinerary/chat', {
+        'message': rng.choice(['Any good food spots?', 'Add a museum to day 1', 'Is day 2 too packed?']),
+        'trip_context': {'destination': rng.choice(DESTINATIONS)},
+        'current_itinerary': SAMPLE_ITINERARY,
+        'conversation_history': []
+    })),
+    'itinerary.optimize_budget': (1, lambda rng: ('POST', '/api/itinerary/optimize-budget', {
+        'itinerary': SAMPLE_ITINERARY, 'target_budget': rng.randrange(200, 2000, 50)
+    })),
+    'itinerary.cultural_insights': (2, lambda rng: (
+        'GET', '/api/itinerary/cultural-insights?' + _query(destination=rng.choice(DESTINATIONS)), None)),
+    'bookings.flights': (3, lambda rng: ('GET', '/api/bookings/flights?' + _query(
+        origin='JFK', destination=rng.choice(['CDG', 'NRT', 'LIS', 'FCO']), departure_date='2026-06-01',
+        return_date='2026-06-10', passengers=rng.randint(1, 4)), None)),
+    'bookings.hotels': (3, lambda rng: ('GET', '/api/bookings/hotels?' + _query(
+        destination=rng.choice(DESTINATIONS), check_in='2026-06-01', check_out='2026-06-05'), None)),
+    'bookings.activities': (2, lambda rng: ('GET', '/api/bookings/activities?' + _query(
+        destination=rng.choice(DESTINATIONS)), None)),
+    'recommendations.activities': (2, lambda rng: ('POST', '/api/recommendations/activities', {
+        'location': rng.choice(DESTINATIONS), 'preferences': rng.sample(INTERESTS, 2),
+        'weather': rng.choice([None, 'rainy', 'sunny'])
+    })),
+    'recommendations.restaurants': (2, lambda rng: ('GET', '/api/recommendations/restaurants?' + _query(
+        location=rng.choice(DESTINATIONS), cuisine=rng.choice(['any', 'italian', 'local']),
+        budget=rng.choice(['low', 'medium', 'high'])), None)),
+    'weather.forecast': (2, lambda rng: ('GET', '/api/weather/forecast?' + _query(
+        destination=rng.choice(DESTINATIONS), days=rng.randint(3, 14)), None)),
+}
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    """Latency percentiles (ms), throughput and error rate of one group of requests"""
+    count = len(latencies)
+    values = np.array(latencies) * 1000 if count else np.array([0.0])
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else None,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(float(values.mean()), 1),
+            'p50': round(float(np.percentile(values, 50)), 1),
+            'p95': round(float(np.percentile(values, 95)), 1),
+            'p99': round(float(np.percentile(values, 99)), 1),
+            'max': round(float(values.max()), 1)
+        }
+    }
+
+
+class LoadTest:
+    """
+    Closed-loop load generator: each client thread sends its next request when the previous one finishes
+    """
+
+    def __init__(self, host: str, port: int, scenarios: List[str], concurrency: int,
+                 duration: Optional[float], total_requests: Optional[int], seed: int = 1):
+        self.host = host
+        self.port = port
+        self.names = scenarios
+        self.weights = [SCENARIOS[name][0] for name in scenarios]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.total_requests = total_requests
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._issued = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def _next_slot(self) -> bool:
+        with self._lock:
+            if self.total_requests is not None and self._issued >= self.total_requests:
+                return False
+            self._issued += 1
+            return True
+
+    def _client(self, index: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + index)
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=600)
+        while time.perf_counter() < deadline and self._next_slot():
+            name = rng.choices(self.names, self.weights)[0]
+            method, path, body = SCENARIOS[name][1](rng)
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            headers = {'Content-Type': 'application/json'} if payload is not None else {}
+
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                status = response.status
+                # A stream that reports an error event still answers 200
+                failed = status >= 400 or (path.endswith('/stream') and b'event: error' in data)
+            except (OSError, http.client.HTTPException) as e:
+                status, failed = type(e).__name__, True
+                connection.close()
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=600)
+            latency = time.perf_counter() - started
+
+            with self._lock:
+                self.latencies[name].append(latency)
+                self.statuses[name][str(status)] += 1
+                if failed:
+                    self.errors[name] += 1
+        connection.close()
+
+    def run(self) -> Dict:
+        deadline = time.perf_counter() + (self.duration if self.duration else float('inf'))
+        threads = [threading.Thread(target=self._client, args=(index, deadline), daemon=True)
+                   for index in range(self.concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        all_latencies = [latency for values in self.latencies.values() for latency in values]
+        blueprints: Dict[str, Tuple[List[float], int]] = defaultdict(lambda: ([], 0))
+        for name, values in self.latencies.items():
+            blueprint = name.split('.')[0]
+            latencies, errors = blueprints[blueprint]
+            blueprints[blueprint] = (latencies + values, errors + self.errors[name])
+
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'overall': summarize(all_latencies, sum(self.errors.values()), elapsed),
+            'blueprints': {name: summarize(values, errors, elapsed)
+                           for name, (values, errors) in sorted(blueprints.items())},
+            'scenarios': {
+                name: dict(summarize(self.latencies[name], self.errors[name], elapsed),
+                           statuses=dict(self.statuses[name]))
+                for name in sorted(self.latencies)
+            }
+        }
+
+
+def llm_outcomes(metrics_text: str) -> Dict[str, Dict[str, int]]:
+    """Requests per endpoint and outcome from the app's /api/metrics"""
+    outcomes: Dict[str, Dict[str, int]] = defaultdict(dict)
+    pattern = re.compile(r'llm_request_duration_seconds_count\{endpoint="([^"]*)",model="[^"]*",outcome="([^"]*)"\} (\d+)')
+    for endpoint, outcome, count in pattern.findall(metrics_text):
+        outcomes[endpoint][outcome] = outcomes[endpoint].get(outcome, 0) + int(count)
+    return dict(outcomes)
+
+
+def start_app(fake_url: str, cache: bool):
+    """Import and serve the Flask app against the fake Ollama server on a free local port"""
+    os.environ['OLLAMA_BASE_URL'] = fake_url
+    os.environ.pop('OLLAMA_BASE_URLS', None)
+    os.environ['OLLAMA_PROBE_INTERVAL'] = '0'
+    if not cache:
+        os.environ['LLM_CACHE_ENABLED'] = 'false'
+        os.environ['LLM_SEMANTIC_CACHE_ENABLED'] = 'false'
+        os.environ.pop('LLM_CACHE_DB_PATH', None)
+        os.environ.pop('LLM_SEMANTIC_INDEX_PATH', None)
+
+    from werkzeug.serving import make_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = importlib.import_module('app').app
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-app', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run (ignored with --requests)')
+    parser.add_argument('--requests', type=int, help='Total requests to send instead of a fixed duration')
+    parser.add_argument('--scenarios', help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--ttft', type=float, default=0.05, help='Fake model seconds to the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=400, help='Fake model generation speed')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of malformed model answers')
+    parser.add_argument('--cache', action='store_true', help='Keep the response and semantic caches enabled')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    parser.add_argument('--output', help='Also write the JSON results to this file')
+    parser.add_argument('--max-error-rate', type=float, help='Fail (exit 1) above this overall error rate')
+    parser.add_argument('--max-p95-ms', type=float, help='Fail (exit 1) above this overall p95 latency')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',')] if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    fake = FakeOllama(ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                      malformed_rate=args.malformed_rate, seed=args.seed).start()
+
+    # The app logs every request with print(); keep the report readable
+    app_output = io.StringIO()
+    with contextlib.redirect_stdout(app_output):
+        server = start_app(fake.url, args.cache)
+        host, port = server.server_address[:2]
+        test = LoadTest(host, port, scenarios, args.concurrency,
+                        None if args.requests else args.duration, args.requests, args.seed)
+        results = test.run()
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        connection.request('GET', '/api/metrics')
+        metrics_text = connection.getresponse().read().decode('utf-8')
+        connection.close()
+        server.shutdown()
+    fake.stop()
+
+    results = {
+        'config': {
+            'concurrency': args.concurrency,
+            'duration': None if args.requests else args.duration,
+            'requests': args.requests,
+            'scenarios': scenarios,
+            'ttft': args.ttft,
+            'tokens_per_second': args.tokens_per_second,
+            'malformed_rate': args.malformed_rate,
+            'cache': args.cache
+        },
+        **results,
+        'llm_outcomes': llm_outcomes(metrics_text),
+        'fake_ollama': fake.stats()
+    }
+
+    gates = []
+    overall = results['overall']
+    if args.max_error_rate is not None and (overall['error_rate'] or 0) > args.max_error_rate:
+        gates.append(f"error rate {overall['error_rate']} > {args.max_error_rate}")
+    if args.max_p95_ms is not None and overall['latency_ms']['p95'] > args.max_p95_ms:
+        gates.append(f"p95 {overall['latency_ms']['p95']} ms > {args.max_p95_ms} ms")
+    results['gates_failed'] = gates
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{overall['requests']} requests in {results['elapsed_seconds']}s "
+              f"({overall['throughput_rps']} req/s, concurrency {args.concurrency}), "
+              f"error rate {overall['error_rate']}")
+        print(f"{'scenario':<30}{'reqs':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, stats in results['scenarios'].items():
+            latency = stats['latency_ms']
+            print(f"{name:<30}{stats['requests']:>7}{stats['errors']:>6}"
+                  f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}")
+        print(f"LLM outcomes: {json.dumps(results['llm_outcomes'])}")
+        for gate in gates:
+            print(f"❌ Gate failed: {gate}")
+
+    return 1 if gates else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
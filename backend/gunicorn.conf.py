@@ -0,0 +1,18 @@
+"""
+Gunicorn configuration for WanderGuide AI
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# Threaded workers: a request waiting on Ollama only parks its thread on a
+# future while the worker's event loop drives the HTTP call, so threads are cheap
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 128))
+
+# Must exceed OLLAMA_WAIT_TIMEOUT so queued generations are not killed mid-flight
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 330))
+graceful_timeout = 30
+keepalive = 5
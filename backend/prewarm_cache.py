@@ -0,0 +1,266 @@
+"""
+Cache Pre-warming - Generates the LLM answers for popular destinations ahead of traffic
+Fills the response cache with cultural insights, activity and restaurant recommendations
+so the first visitor of the day for a popular city gets a cached answer
+
+Usage (from backend/, with LLM_CACHE_DB_PATH set so the server sees the entries):
+    python prewarm_cache.py Paris Rome "New York City"
+    python prewarm_cache.py --file destinations.txt --concurrency 4
+    python prewarm_cache.py --from-log access.log --top 100 --resume
+
+Destinations from logs are ranked by how often they appear as a `destination=` or
+`location=` query parameter (access logs) or as a destination/location field (JSON lines).
+Progress is appended to a state file; --resume skips the tasks a previous run finished.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Set
+from urllib.parse import unquote_plus
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.cache_service import get_response_cache, normalize_list, normalize_text
+from services.llm_service import LLMService
+
+QUERY_PATTERN = re.compile(r'[?&](?:destination|location)=([^&\s"]+)')
+FIELD_NAMES = ('destination', 'location')
+
+
+def read_destination_file(path: str) -> List[str]:
+    """One destination per line; blank lines and # comments are ignored"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def _log_destinations(line: str) -> Iterable[str]:
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        if isinstance(record, dict):
+            for fields in (record, record.get('fields'), record.get('trip_data')):
+                if isinstance(fields, dict):
+                    for name in FIELD_NAMES:
+                        if isinstance(fields.get(name), str):
+                            yield fields[name]
+            return
+    for match in QUERY_PATTERN.finditer(line):
+        yield unquote_plus(match.group(1))
+
+
+def destinations_from_logs(paths: List[str], top: int) -> List[str]:
+    """
+    Most requested destinations across request logs
+
+    Spellings that normalize to the same text are counted together and
+    reported under their most frequent form.
+
+    Args:
+        paths: Access logs or JSON-lines request logs
+        top: Number of destinations to return
+    """
+    counts = Counter()
+    spellings: Dict[str, Counter] = defaultdict(Counter)
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                for destination in _log_destinations(line):
+                    destination = destination.strip()
+                    key = normalize_text(destination)
+                    if key:
+                        counts[key] += 1
+                        spellings[key][destination] += 1
+    return [spellings[key].most_common(1)[0][0] for key, _ in counts.most_common(top)]
+
+
+def build_tasks(destinations: List[str], preference_sets: List[List[str]],
+                cuisines: List[str], budgets: List[str]) -> List[Dict]:
+    """
+    Expand destinations into cache requests
+
+    Inputs mirror the routes exactly (restaurants are activity requests with
+    [cuisine, "<budget> budget"] preferences) so the warmed keys match real traffic.
+    """
+    tasks = []
+    seen = set()
+    for destination in destinations:
+        requests = [('cultural_insights', {'destination': destination})]
+        requests += [('activities', {'location': destination, 'preferences': preferences})
+                     for preferences in preference_sets]
+        requests += [('activities', {'location': destination, 'preferences': [cuisine, f"{budget} budget"]})
+                     for cuisine in cuisines for budget in budgets]
+        for endpoint, inputs in requests:
+            task_id = json.dumps([endpoint, normalize_text(destination), normalize_list(inputs.get('preferences', []))])
+            if task_id not in seen:
+                seen.add(task_id)
+                tasks.append({'id': task_id, 'endpoint': endpoint, 'inputs': inputs})
+    return tasks
+
+
+def load_finished(path: str) -> Set[str]:
+    """Task ids a previous run cached or generated"""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial last line of an interrupted run
+            if record.get('status') in ('cached', 'generated'):
+                finished.add(record['id'])
+    return finished
+
+
+def _describe(task: Dict) -> str:
+    inputs = task['inputs']
+    if task['endpoint'] == 'cultural_insights':
+        return f"cultural insights for {inputs['destination']}"
+    preferences = ', '.join(inputs['preferences']) or 'no preferences'
+    return f"activities for {inputs['location']} ({preferences})"
+
+
+def run(service: LLMService, tasks: List[Dict], concurrency: int, state_path: str,
+        refresh: bool = False, max_failures: int = 10) -> Dict[str, int]:
+    """
+    Warm the cache for every task with bounded concurrency
+
+    Args:
+        service: LLM service whose cache is filled
+        tasks: Output of build_tasks (minus the finished ones when resuming)
+        concurrency: Generations in flight at once
+        state_path: JSON-lines file every finished task is appended to
+        refresh: Regenerate entries that are already cached
+        max_failures: Stop starting new tasks after this many failures
+
+    Returns:
+        Count of tasks per status ('cached', 'generated', 'failed', 'skipped')
+    """
+    counts = Counter()
+    lock = threading.Lock()
+    stop = threading.Event()
+    started = time.time()
+
+    state_dir = os.path.dirname(state_path)
+    if state_dir:
+        os.makedirs(state_dir, exist_ok=True)
+    state = open(state_path, 'a', encoding='utf-8')
+
+    def warm(task: Dict):
+        if stop.is_set():
+            with lock:
+                counts['skipped'] += 1
+            return
+
+        task_started = time.time()
+        error = None
+        try:
+            status = service.prewarm(task['endpoint'], task['inputs'], refresh=refresh)
+        except Exception as e:
+            status, error = 'failed', str(e)
+        elapsed = time.time() - task_started
+
+        with lock:
+            counts[status] += 1
+            state.write(json.dumps({'id': task['id'], 'status': status, 'seconds': round(elapsed, 2),
+                                    'error': error, 'at': time.time()}) + '\n')
+            state.flush()
+            done = sum(counts.values())
+            if counts['failed'] >= max_failures and not stop.is_set():
+                print(f"⚠️ {counts['failed']} failures, not starting the remaining tasks")
+                stop.set()
+            icon = {'cached': '⚡', 'generated': '✅'}.get(status, '❌')
+            suffix = f": {error}" if error else ''
+            print(f"[{done}/{len(tasks)}] {icon} {status} {_describe(task)} ({elapsed:.1f}s){suffix}", flush=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(warm, tasks))
+    finally:
+        state.close()
+
+    total = time.time() - started
+    print(f"🏁 Done in {total:.1f}s: {counts['generated']} generated, {counts['cached']} already cached, "
+          f"{counts['failed']} failed, {counts['skipped']} skipped")
+    return dict(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('destinations', nargs='*', help='Destinations to warm')
+    parser.add_argument('--file', help='File with one destination per line')
+    parser.add_argument('--from-log', action='append', default=[], metavar='PATH',
+                        help='Request log to rank destinations from (repeatable)')
+    parser.add_argument('--top', type=int, default=50, help='Destinations taken from the logs (default 50)')
+    parser.add_argument('--preferences', action='append', default=[], metavar='LIST',
+                        help='Comma-separated activity preferences to warm (repeatable, default: none)')
+    parser.add_argument('--cuisines', default='any', help='Comma-separated restaurant cuisines (default: any)')
+    parser.add_argument('--budgets', default='medium', help='Comma-separated restaurant budgets (default: medium)')
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('OLLAMA_MAX_CONCURRENCY', 4)),
+                        help='Generations in flight at once (default OLLAMA_MAX_CONCURRENCY)')
+    parser.add_argument('--state', default='cache/prewarm_state.jsonl', help='Progress file')
+    parser.add_argument('--resume', action='store_true', help='Skip tasks finished by the previous run')
+    parser.add_argument('--refresh', action='store_true', help='Regenerate cached entries to restart their TTL')
+    parser.add_argument('--max-failures', type=int, default=10, help='Stop after this many failed tasks')
+    args = parser.parse_args()
+
+    destinations = list(args.destinations)
+    if args.file:
+        destinations += read_destination_file(args.file)
+    if args.from_log:
+        destinations += destinations_from_logs(args.from_log, args.top)
+    if not destinations:
+        parser.error('give destinations, --file or --from-log')
+
+    cache = get_response_cache()
+    if not cache.enabled:
+        print("❌ The response cache is disabled (LLM_CACHE_ENABLED=false)")
+        return 2
+    if cache.disk is None:
+        print("❌ LLM_CACHE_DB_PATH is not set: warmed entries would only live in this process")
+        return 2
+
+    preference_sets = [
+        [item.strip() for item in value.split(',') if item.strip()] for value in args.preferences
+    ] or [[]]
+    tasks = build_tasks(
+        destinations,
+        preference_sets,
+        [item.strip() for item in args.cuisines.split(',') if item.strip()],
+        [item.strip() for item in args.budgets.split(',') if item.strip()]
+    )
+
+    if args.resume:
+        finished = load_finished(args.state)
+        tasks = [task for task in tasks if task['id'] not in finished]
+        print(f"↩️ Resuming: {len(finished)} tasks already finished")
+    elif os.path.exists(args.state):
+        os.remove(args.state)
+
+    print(f"🔥 Warming {len(tasks)} cache entries for {len(destinations)} destinations "
+          f"(concurrency {args.concurrency})")
+    service = LLMService(cache=cache)
+    if service.llm is None:
+        print("❌ Ollama is not available")
+        return 1
+
+    counts = run(service, tasks, args.concurrency, args.state, refresh=args.refresh,
+                 max_failures=args.max_failures)
+    service.semantic_cache.save()
+    return 1 if counts.get('failed') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Batch Routes - Run several API calls in one round trip
+"""
+
+from flask import Blueprint, current_app, request, jsonify
+from services.batch_runner import BatchError, parse_batch
+from services.container import get_batch_runner
+from routes.sse import sse_response
+
+batch_bp = Blueprint('batch', __name__)
+
+
+@batch_bp.route('', methods=['POST'])
+def run_batch():
+    """
+    Execute sub-requests against the other API routes concurrently
+
+    Expected JSON body:
+    {
+        "requests": [
+            {"id": "flights", "path": "/api/bookings/flights", "params": {"origin": "JFK", ...}},
+            {"id": "insights", "path": "/api/itinerary/cultural-insights?destination=Paris"},
+            {"id": "plan", "method": "POST", "path": "/api/itinerary/generate", "body": {...},
+             "depends_on": ["flights"]}
+        ],
+        "stream": false (optional),
+        "timeout": 30 (optional, seconds)
+    }
+
+    Every sub-request gets `{"id", "status", "body", "elapsed_ms"}`, in request
+    order, or with "stream": true as an `item` event each as it completes and a
+    final `complete` event.
+    """
+    data = request.get_json(silent=True) or {}
+    runner = get_batch_runner()
+
+    try:
+        items = parse_batch(data.get('requests'), runner.max_requests)
+        timeout = float(data['timeout']) if data.get('timeout') is not None else None
+    except (BatchError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    results = runner.run(current_app._get_current_object(), items, request.host_url, timeout)
+
+    if data.get('stream'):
+        def events():
+            completed = 0
+            failed = 0
+            for result in results:
+                completed += 1
+                failed += result['status'] >= 400
+                yield 'item', result
+            yield 'complete', {'count': completed, 'failed': failed}
+
+        return sse_response(events())
+
+    order = {item['id']: position for position, item in enumerate(items)}
+    responses = sorted(results, key=lambda result: order[result['id']])
+    return jsonify({
+        'success': True,
+        'count': len(responses),
+        'failed': sum(1 for result in responses if result['status'] >= 400),
+        'responses': responses
+    }), 200
@@ -3,10 +3,16 @@ Booking Routes - Handles flight and hotel searches
 """
 
 from flask import Blueprint, request, jsonify
-from services.scraper_service import ScraperService
+from services.container import get_scraper_service
+from services.hotel_index import InvalidCursorError
 
 booking_bp = Blueprint('booking', __name__)
-scraper_service = ScraperService()
+
+# Widest flexible-date window: +/- this many days (15 x 15 grid)
+MAX_FLEX_DAYS = 7
+
+# Largest hotel page
+MAX_PAGE_SIZE = 200
 
 @booking_bp.route('/flights', methods=['GET'])
 def search_flights():
@@ -34,7 +40,7 @@ def search_flights():
             }), 400
         
         # Search flights
-        flights = scraper_service.search_flights(
+        flights = get_scraper_service().search_flights(
             origin=origin,
             destination=destination,
             departure_date=departure_date,
@@ -46,6 +52,7 @@ def search_flights():
             'success': True,
             'count': len(flights),
             'flights': flights,
+            'coverage': flights.coverage(),
             'search_params': {
                 'origin': origin,
                 'destination': destination,
@@ -56,7 +63,68 @@ def search_flights():
         }), 200
         
     except ValueError:
-        return jsonify({'error': 'Invalid passenger count'}), 400
+        return jsonify({'error': 'Invalid passenger count or date (use YYYY-MM-DD)'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@booking_bp.route('/flights/calendar', methods=['GET'])
+def flight_calendar():
+    """
+    Flexible-date fare matrix: the cheapest fare for every departure x return
+    day around the requested dates, in one call
+    
+    Query params:
+    - origin: Departure airport code
+    - destination: Arrival airport code
+    - departure_date: Preferred departure date (YYYY-MM-DD)
+    - return_date: Preferred return date (optional, one-way without it)
+    - flex_days: Days either side of each date to price (default: 3, max: 7)
+    - passengers: Number of passengers (default: 1)
+    - top: Number of cheapest date combinations to list (default: 5)
+    """
+    try:
+        origin = request.args.get('origin')
+        destination = request.args.get('destination')
+        departure_date = request.args.get('departure_date')
+        return_date = request.args.get('return_date')
+        flex_days = int(request.args.get('flex_days', 3))
+        passengers = int(request.args.get('passengers', 1))
+        top = int(request.args.get('top', 5))
+        
+        # Validate required parameters
+        if not all([origin, destination, departure_date]):
+            return jsonify({
+                'error': 'Missing required parameters: origin, destination, departure_date'
+            }), 400
+        if not 0 <= flex_days <= MAX_FLEX_DAYS:
+            return jsonify({'error': f'flex_days must be between 0 and {MAX_FLEX_DAYS}'}), 400
+        
+        calendar = get_scraper_service().fare_calendar(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            return_date=return_date,
+            flex_days=flex_days,
+            passengers=passengers,
+            top=max(top, 0)
+        )
+        
+        return jsonify({
+            'success': True,
+            **calendar,
+            'search_params': {
+                'origin': origin,
+                'destination': destination,
+                'departure_date': departure_date,
+                'return_date': return_date,
+                'flex_days': flex_days,
+                'passengers': passengers
+            }
+        }), 200
+        
+    except ValueError:
+        return jsonify({'error': 'Invalid number or date (use YYYY-MM-DD)'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -72,6 +140,12 @@ def search_hotels():
     - check_out: Check-out date (YYYY-MM-DD)
     - guests: Number of guests (default: 2)
     - rooms: Number of rooms (default: 1)
+    - min_stars, min_price, max_price, min_review: Filters (prices are nightly rates)
+    - amenities: Comma-separated amenities every hotel must have
+    - sort: recommended (default), price, price_desc, review or stars
+    - limit: Page size (default: every match)
+    - cursor: next_cursor of the previous page
+    - facets: Include facet counts (default: true)
     """
     try:
         destination = request.args.get('destination')
@@ -86,34 +160,67 @@ def search_hotels():
                 'error': 'Missing required parameters: destination, check_in, check_out'
             }), 400
         
-        # Search hotels
-        hotels = scraper_service.search_hotels(
+        filters = {
+            'min_stars': _optional(int, 'min_stars'),
+            'min_price': _optional(float, 'min_price'),
+            'max_price': _optional(float, 'max_price'),
+            'min_review': _optional(float, 'min_review'),
+            'amenities': [name.strip() for name in request.args.get('amenities', '').split(',') if name.strip()]
+        }
+        sort = request.args.get('sort', 'recommended')
+        limit = _optional(int, 'limit')
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+        
+        # Search hotels (the indexed search is reused for further pages and filters)
+        index = get_scraper_service().hotel_index(
             destination=destination,
             check_in=check_in,
             check_out=check_out,
             guests=guests,
             rooms=rooms
         )
+        page = index.query(
+            sort=sort,
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            include_facets=request.args.get('facets', 'true').lower() != 'false',
+            **filters
+        )
         
         return jsonify({
             'success': True,
-            'count': len(hotels),
-            'hotels': hotels,
+            'count': len(page['hotels']),
+            'total': page['total'],
+            'hotels': page['hotels'],
+            'next_cursor': page['next_cursor'],
+            'facets': page['facets'],
+            'coverage': index.coverage,
             'search_params': {
                 'destination': destination,
                 'check_in': check_in,
                 'check_out': check_out,
                 'guests': guests,
-                'rooms': rooms
+                'rooms': rooms,
+                'sort': sort,
+                **filters
             }
         }), 200
         
-    except ValueError:
-        return jsonify({'error': 'Invalid guests or rooms count'}), 400
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except ValueError as e:
+        return jsonify({'error': f'Invalid hotel search parameter: {e}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _optional(convert, name):
+    """Query param converted with convert, None when absent (raises ValueError when malformed)"""
+    value = request.args.get(name)
+    return convert(value) if value not in (None, '') else None
+
+
 @booking_bp.route('/activities', methods=['GET'])
 def search_activities():
     """
@@ -128,12 +235,13 @@ def search_activities():
         if not destination:
             return jsonify({'error': 'Destination parameter required'}), 400
         
-        activities = scraper_service.get_activity_deals(destination)
+        activities = get_scraper_service().get_activity_deals(destination)
         
         return jsonify({
             'success': True,
             'count': len(activities),
             'activities': activities,
+            'coverage': activities.coverage(),
             'destination': destination
         }), 200
         
@@ -141,3 +249,15 @@ def search_activities():
         return jsonify({'error': str(e)}), 500
 
 
+@booking_bp.route('/providers', methods=['GET'])
+def provider_stats():
+    """
+    Per-provider search outcomes: calls, errors, timeouts (searches that
+    answered without the provider), p50/p95 latency and a `slow` flag for
+    providers that chronically miss the deadline
+    """
+    fan_out = get_scraper_service().providers
+    return jsonify({
+        'deadline_seconds': fan_out.deadline,
+        'providers': fan_out.stats()
+    }), 200
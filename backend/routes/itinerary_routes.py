@@ -3,10 +3,10 @@ Itinerary Routes - Handles trip planning and itinerary generation
 """
 
 from flask import Blueprint, request, jsonify
-from services.llm_service import LLMService
+from services.container import get_llm_service
+from routes.sse import sse_response
 
 itinerary_bp = Blueprint('itinerary', __name__)
-llm_service = LLMService()
 
 @itinerary_bp.route('/generate', methods=['POST'])
 def generate_itinerary():
@@ -33,22 +33,61 @@ def generate_itinerary():
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
         # Generate itinerary using LLM
-        itinerary = llm_service.generate_itinerary(data)
+        itinerary = get_llm_service().generate_itinerary(data)
         
-        return jsonify({
-            'success': True,
-            'itinerary': itinerary,
-            'metadata': {
-                'generated_at': data,
-                'destination': data['destination'],
-                'duration': data['duration']
-            }
-        }), 200
+        return jsonify(itinerary_payload(data, itinerary)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@itinerary_bp.route('/generate/stream', methods=['POST'])
+def stream_itinerary():
+    """
+    Generate an itinerary and stream it as Server-Sent Events
+    
+    Accepts the same JSON body as /generate. Emits one `day` event per
+    itinerary day, then `overview`, `total_estimated_cost`,
+    `packing_suggestions` and `cultural_tips` events as each field is
+    completed, and finally a `complete` event carrying the same payload
+    the blocking endpoint returns.
+    """
+    data = request.get_json(silent=True) or {}
+    
+    # Validate required fields
+    required_fields = ['destination', 'duration', 'budget']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+    
+    llm_service = get_llm_service()
+    
+    def events():
+        try:
+            for event, value in llm_service.stream_itinerary(data):
+                if event == 'itinerary':
+                    yield 'complete', itinerary_payload(data, value)
+                else:
+                    yield event, value
+        except Exception as e:
+            yield 'error', {'error': str(e)}
+    
+    return sse_response(events())
+
+
+def itinerary_payload(data, itinerary):
+    """Response body shared by the blocking and streaming generate endpoints"""
+    return {
+        'success': True,
+        'itinerary': itinerary,
+        'metadata': {
+            'generated_at': data,
+            'destination': data['destination'],
+            'duration': data['duration']
+        }
+    }
+
+
 @itinerary_bp.route('/optimize-budget', methods=['POST'])
 def optimize_budget():
     """
@@ -66,7 +105,7 @@ def optimize_budget():
         if 'itinerary' not in data or 'target_budget' not in data:
             return jsonify({'error': 'Missing itinerary or target_budget'}), 400
         
-        optimizations = llm_service.optimize_budget(
+        optimizations = get_llm_service().optimize_budget(
             data['itinerary'],
             data['target_budget']
         )
@@ -93,7 +132,7 @@ def get_cultural_insights():
         if not destination:
             return jsonify({'error': 'Destination parameter required'}), 400
         
-        insights = llm_service.generate_cultural_insights(destination)
+        insights = get_llm_service().generate_cultural_insights(destination)
         
         return jsonify({
             'success': True,
@@ -115,7 +154,8 @@ def chat_assistant():
         "message": "Can you add a museum visit to day 2?",
         "trip_context": {...},
         "current_itinerary": {...},
-        "conversation_history": [...]
+        "conversation_history": [...],
+        "conversation_id": "..."  (optional, returned by the previous reply)
     }
     """
     try:
@@ -129,24 +169,22 @@ def chat_assistant():
         trip_context = data.get('trip_context', {})
         current_itinerary = data.get('current_itinerary', {})
         conversation_history = data.get('conversation_history', [])
+        conversation_id = data.get('conversation_id')
         
         print(f"🤖 Processing chat with context: {trip_context.get('destination', 'Unknown')}")
         
         # Use LLM to generate response and potentially update itinerary
-        response = llm_service.chat_with_assistant(
+        response = get_llm_service().chat_with_assistant(
             message=message,
             trip_context=trip_context,
             current_itinerary=current_itinerary,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            conversation_id=conversation_id
         )
         
         print(f"✅ Chat response generated successfully")
         
-        return jsonify({
-            'success': True,
-            'response': response['response'],
-            'itinerary_update': response.get('itinerary_update')
-        }), 200
+        return jsonify(chat_payload(response)), 200
         
     except Exception as e:
         print(f"❌ Error in chat endpoint: {str(e)}")
@@ -155,3 +193,11 @@ def chat_assistant():
         return jsonify({'error': str(e)}), 500
 
 
+def chat_payload(response):
+    """Response body shared by the chat endpoint and chat jobs"""
+    return {
+        'success': True,
+        'response': response['response'],
+        'itinerary_update': response.get('itinerary_update'),
+        'conversation_id': response.get('conversation_id')
+    }
@@ -0,0 +1,181 @@
+"""
+Job Routes - Queue slow LLM requests as background jobs and poll or stream their results
+"""
+
+from flask import Blueprint, request, jsonify, url_for
+from services.container import get_job_queue, get_llm_service
+from services.job_queue import (
+    PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, SUCCEEDED, QueueFullError, job_key
+)
+from routes.itinerary_routes import chat_payload, itinerary_payload
+from routes.sse import sse_response
+
+job_bp = Blueprint('jobs', __name__)
+
+# Seconds between status heartbeats on an idle event stream
+HEARTBEAT_SECONDS = 15
+
+
+@job_bp.route('/itinerary', methods=['POST'])
+def submit_itinerary_job():
+    """
+    Queue itinerary generation (bulk priority)
+
+    Accepts the same JSON body as /api/itinerary/generate. The job emits the
+    same `day`, `overview`, ... events as /api/itinerary/generate/stream and its
+    result is the body /api/itinerary/generate returns.
+    """
+    data = request.get_json(silent=True) or {}
+
+    # Validate required fields
+    required_fields = ['destination', 'duration', 'budget']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+
+    llm_service = get_llm_service()
+
+    def run(emit):
+        for event, value in llm_service.stream_itinerary(data):
+            if event == 'itinerary':
+                return itinerary_payload(data, value)
+            emit(event, value)
+
+    return _submit('itinerary', data, run, PRIORITY_BULK)
+
+
+@job_bp.route('/optimize-budget', methods=['POST'])
+def submit_budget_job():
+    """
+    Queue budget optimization
+
+    Accepts the same JSON body as /api/itinerary/optimize-budget
+    """
+    data = request.get_json(silent=True) or {}
+
+    if 'itinerary' not in data or 'target_budget' not in data:
+        return jsonify({'error': 'Missing itinerary or target_budget'}), 400
+
+    llm_service = get_llm_service()
+
+    def run(emit):
+        return {
+            'success': True,
+            'optimizations': llm_service.optimize_budget(data['itinerary'], data['target_budget'])
+        }
+
+    return _submit('optimize_budget', data, run, PRIORITY_NORMAL)
+
+
+@job_bp.route('/chat', methods=['POST'])
+def submit_chat_job():
+    """
+    Queue a chat message (interactive priority, runs ahead of queued itineraries)
+
+    Accepts the same JSON body as /api/itinerary/chat
+    """
+    data = request.get_json(silent=True) or {}
+
+    if 'message' not in data:
+        return jsonify({'error': 'Message is required'}), 400
+
+    llm_service = get_llm_service()
+
+    def run(emit):
+        return chat_payload(llm_service.chat_with_assistant(
+            message=data['message'],
+            trip_context=data.get('trip_context', {}),
+            current_itinerary=data.get('current_itinerary', {}),
+            conversation_history=data.get('conversation_history', []),
+            conversation_id=data.get('conversation_id')
+        ))
+
+    # Never deduplicated: identical first messages from different users would share one conversation
+    return _submit('chat', data, run, PRIORITY_INTERACTIVE, dedupe=False)
+
+
+@job_bp.route('/metrics', methods=['GET'])
+def job_metrics():
+    """Queue depth per priority, throughput, average wait/run times and the drain estimate"""
+    return jsonify(get_job_queue().stats()), 200
+
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status; finished jobs include `result` (or `error`)"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@job_bp.route('/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a job that has not started yet"""
+    jobs = get_job_queue()
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if not jobs.cancel(job_id):
+        return jsonify({'error': f'Job is already {job.status}'}), 409
+    return jsonify(job.to_dict()), 200
+
+
+@job_bp.route('/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    """
+    Stream a job as Server-Sent Events
+
+    Sends a `status` event on connect, whenever the job starts and as a
+    heartbeat, replays the job's progress events, then ends with `complete`
+    (carrying the result) or `failed`/`cancelled`.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        seen = 0
+        status = job.status
+        yield 'status', job.to_dict(include_result=False)
+        while True:
+            updated = job.wait_for_update(seen, HEARTBEAT_SECONDS)
+            # Read finished before the events: everything emitted before finishing is then included
+            finished = job.finished
+            new_events = job.events[seen:]
+            seen += len(new_events)
+            if job.status != status or not updated:
+                status = job.status
+                yield 'status', job.to_dict(include_result=False)
+            yield from new_events
+            if finished:
+                yield ('complete' if job.status == SUCCEEDED else job.status), job.to_dict()
+                return
+
+    return sse_response(events())
+
+
+def _submit(kind, data, run, priority, dedupe=True):
+    """
+    Queue a job and answer 202 with its URLs, or 429 with Retry-After when the backlog is too long
+
+    With `dedupe`, a submit identical to an unfinished job returns that job.
+    """
+    try:
+        key = job_key(kind, data) if dedupe else None
+        job = get_job_queue().submit(kind, run, priority=priority, key=key)
+    except QueueFullError as e:
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+
+    status_url = url_for('jobs.get_job', job_id=job.id)
+    response = jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url,
+        'events_url': url_for('jobs.stream_job', job_id=job.id)
+    })
+    response.headers['Location'] = status_url
+    return response, 202
@@ -3,10 +3,10 @@ Recommendation Routes - Handles activity and restaurant recommendations
 """
 
 from flask import Blueprint, request, jsonify
-from services.llm_service import LLMService
+from services.container import get_llm_service
+from services.llm_service import ACTIVITY_RECOMMENDATIONS
 
 recommendation_bp = Blueprint('recommendation', __name__)
-llm_service = LLMService()
 
 @recommendation_bp.route('/activities', methods=['POST'])
 def get_activity_recommendations():
@@ -17,8 +17,13 @@ def get_activity_recommendations():
     {
         "location": "Paris",
         "preferences": ["museums", "food", "culture"],
-        "weather": "rainy" (optional)
+        "weather": "rainy" (optional),
+        "time_of_day": "evening" (optional),
+        "limit": 7 (optional)
     }
+    
+    Weather and time of day re-rank the cached activities for the location
+    and preferences (indoor options first when it rains, ...) without a new generation
     """
     try:
         data = request.get_json()
@@ -26,14 +31,23 @@ def get_activity_recommendations():
         location = data.get('location')
         preferences = data.get('preferences', [])
         weather = data.get('weather')
+        time_of_day = data.get('time_of_day')
+        try:
+            limit = int(data.get('limit', ACTIVITY_RECOMMENDATIONS))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit must be a number'}), 400
         
         if not location:
             return jsonify({'error': 'Location is required'}), 400
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
         
-        recommendations = llm_service.get_activity_recommendations(
+        recommendations = get_llm_service().get_activity_recommendations(
             location=location,
             preferences=preferences,
-            weather=weather
+            weather=weather,
+            time_of_day=time_of_day,
+            limit=limit
         )
         
         return jsonify({
@@ -67,7 +81,7 @@ def get_restaurant_recommendations():
         
         # Use LLM to generate restaurant recommendations
         preferences = [cuisine, f"{budget} budget"]
-        recommendations = llm_service.get_activity_recommendations(
+        recommendations = get_llm_service().get_activity_recommendations(
             location=location,
             preferences=preferences
         )
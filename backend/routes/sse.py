@@ -0,0 +1,32 @@
+"""
+Server-Sent Events helpers shared by streaming routes
+"""
+
+from typing import Any, Iterable, Tuple
+from flask import Response, stream_with_context
+from services.response_pipeline import dumps_text
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Encode one SSE message with a JSON payload"""
+    return f"event: {event}\ndata: {dumps_text(data)}\n\n"
+
+
+def sse_response(events: Iterable[Tuple[str, Any]]) -> Response:
+    """
+    Stream (event, data) pairs to the client as text/event-stream
+
+    Proxy buffering is disabled so each event is flushed as soon as it is produced.
+    """
+    def generate():
+        for event, data in events:
+            yield format_sse(event, data)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,58 @@
+"""
+Trip Routes - Plan a whole trip (itinerary, bookings, weather, insights) in one request
+"""
+
+from flask import Blueprint, request, jsonify
+from services.container import get_trip_planner
+from routes.sse import sse_response
+
+trip_bp = Blueprint('trips', __name__)
+
+
+@trip_bp.route('/plan', methods=['POST'])
+def plan_trip():
+    """
+    Run every planning stage concurrently and stream each result as it finishes
+
+    Expected JSON body: the /api/itinerary/generate body plus optional
+    "origin" (adds a flight search), "start_date" (YYYY-MM-DD, default: 30
+    days from now), "rooms" and "stream" (default: true).
+
+    Streams one `stage` event per stage (`itinerary`, `flights`, `hotels`,
+    `activities`, `weather`, `cultural_insights`, then `recommendations` once
+    the weather is in) with its status, result and timings, and a final
+    `complete` event with the per-stage timings, the serial sum and the
+    critical path. With "stream": false the same is returned as one body.
+    """
+    data = request.get_json(silent=True) or {}
+
+    # Validate required fields
+    required_fields = ['destination', 'duration', 'budget']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+
+    # Numeric fields must be JSON numbers ("budget": "mid" would only fail inside a stage)
+    numbers = {'duration': (int, 'whole number'), 'budget': ((int, float), 'number'),
+               'travelers': (int, 'whole number'), 'rooms': (int, 'whole number')}
+    for field, (types, kind) in numbers.items():
+        value = data.get(field)
+        if field in data and (isinstance(value, bool) or not isinstance(value, types) or value <= 0):
+            return jsonify({'error': f'{field} must be a positive {kind}'}), 400
+
+    try:
+        events = get_trip_planner().plan(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid trip request: {e}'}), 400
+
+    if data.get('stream', True):
+        return sse_response(events)
+
+    stages = {}
+    timings = {}
+    for event, value in events:
+        if event == 'stage':
+            stages[value['stage']] = value
+        else:
+            timings = value['timings']
+    return jsonify({'success': True, 'stages': stages, 'timings': timings}), 200
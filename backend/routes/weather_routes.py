@@ -2,12 +2,16 @@
 Weather Routes - Handles weather-based recommendations
 """
 
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-import random
-from datetime import datetime, timedelta
+from services.container import get_forecast_provider
+from services.weather_service import MAX_FORECAST_DAYS
 
 weather_bp = Blueprint('weather', __name__)
 
+# Forecasts per bulk request at most
+MAX_BULK_FORECASTS = 50
+
 @weather_bp.route('/forecast', methods=['GET'])
 def get_weather_forecast():
     """
@@ -16,37 +20,20 @@ def get_weather_forecast():
     Query params:
     - destination: City name
     - days: Number of days (default: 7, max: 14)
+    - start_date: First day (YYYY-MM-DD, default: today)
     
-    Note: This is mock data. In production, integrate with weather API like OpenWeatherMap
+    Note: Forecasts come from the WEATHER_BACKEND (seeded mock data by default)
+    and are cached per destination and day until the next forecast refresh
     """
     try:
         destination = request.args.get('destination')
-        days = min(int(request.args.get('days', 7)), 14)
+        days = min(int(request.args.get('days', 7)), MAX_FORECAST_DAYS)
+        start = _start_date(request.args.get('start_date'))
         
         if not destination:
             return jsonify({'error': 'Destination parameter required'}), 400
         
-        # Generate mock weather data
-        weather_conditions = ['Sunny', 'Partly Cloudy', 'Cloudy', 'Rainy', 'Clear']
-        forecast = []
-        
-        for i in range(days):
-            date = (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d')
-            condition = random.choice(weather_conditions)
-            
-            forecast.append({
-                'date': date,
-                'condition': condition,
-                'temperature': {
-                    'high': random.randint(20, 30),
-                    'low': random.randint(10, 20),
-                    'unit': 'C'
-                },
-                'precipitation': random.randint(0, 80) if 'Rain' in condition else random.randint(0, 20),
-                'humidity': random.randint(40, 80),
-                'wind_speed': random.randint(5, 25),
-                'icon': self._get_weather_icon(condition)
-            })
+        forecast = get_forecast_provider().forecast(destination, days, start)
         
         return jsonify({
             'success': True,
@@ -55,20 +42,61 @@ def get_weather_forecast():
         }), 200
         
     except ValueError:
-        return jsonify({'error': 'Invalid days parameter'}), 400
+        return jsonify({'error': 'Invalid days or start_date parameter (use YYYY-MM-DD)'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-def _get_weather_icon(condition: str) -> str:
-    """Map weather condition to icon identifier"""
-    icons = {
-        'Sunny': '☀️',
-        'Partly Cloudy': '⛅',
-        'Cloudy': '☁️',
-        'Rainy': '🌧️',
-        'Clear': '🌤️'
+@weather_bp.route('/forecast/bulk', methods=['POST'])
+def get_bulk_forecasts():
+    """
+    Get forecasts for several destinations and date ranges in one call
+    
+    Expected JSON body:
+    {
+        "requests": [
+            {"destination": "Paris", "start_date": "2026-11-01", "days": 5},
+            {"destination": "Rome", "days": 3}
+        ]
     }
-    return icons.get(condition, '🌤️')
+    
+    Each entry answers with its own forecast or error, in request order
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('requests')
+    
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(entries) > MAX_BULK_FORECASTS:
+        return jsonify({'error': f'At most {MAX_BULK_FORECASTS} forecasts per request'}), 400
+    
+    provider = get_forecast_provider()
+    forecasts = []
+    for entry in entries:
+        destination = entry.get('destination') if isinstance(entry, dict) else None
+        if not destination:
+            forecasts.append({'destination': destination, 'error': 'Destination required'})
+            continue
+        try:
+            days = min(int(entry.get('days', 7)), MAX_FORECAST_DAYS)
+            start = _start_date(entry.get('start_date'))
+            forecasts.append({
+                'destination': destination,
+                'forecast': provider.forecast(destination, days, start)
+            })
+        except (TypeError, ValueError):
+            forecasts.append({'destination': destination,
+                              'error': 'Invalid days or start_date (use YYYY-MM-DD)'})
+        except Exception as e:
+            forecasts.append({'destination': destination, 'error': str(e)})
+    
+    return jsonify({
+        'success': True,
+        'count': len(forecasts),
+        'forecasts': forecasts
+    }), 200
 
 
+def _start_date(value):
+    """YYYY-MM-DD to a date, None when absent (raises ValueError when malformed)"""
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
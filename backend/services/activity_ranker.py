@@ -0,0 +1,110 @@
+"""
+Activity Ranker - Orders a cached activity pool for the weather and time of day
+The model tags every activity with `indoor` and `best_time`, so weather and time variants of a
+request are answered by scoring the one weather-agnostic pool locally instead of a new generation
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# Weather words by the kind of day they describe (the first match wins, so wet beats warm)
+WEATHER_KINDS = (
+    ('wet', ('rain', 'shower', 'storm', 'thunder', 'drizzle', 'snow', 'sleet', 'hail')),
+    ('hot', ('hot', 'heat', 'scorching', 'humid')),
+    ('cold', ('cold', 'freezing', 'frost', 'icy')),
+    ('fair', ('sun', 'clear', 'fair', 'fine', 'warm', 'partly')),
+    ('grey', ('cloud', 'overcast', 'fog', 'mist', 'grey', 'gray', 'wind'))
+)
+
+# Score for an (indoor, outdoor) activity per kind of day
+WEATHER_SCORES = {
+    'wet': (2.0, -2.0),
+    'hot': (1.0, -0.5),
+    'cold': (1.0, -1.0),
+    'fair': (0.0, 1.0),
+    'grey': (0.5, 0.0)
+}
+
+TIMES_OF_DAY = ('morning', 'afternoon', 'evening')
+
+# Outdoor activities in the heat of the afternoon score lower; mornings and evenings are cooler
+HOT_AFTERNOON_PENALTY = 1.0
+
+# Score when best_time names the requested time, says any time, or names other times
+TIME_MATCH = 1.5
+TIME_ANY = 0.5
+TIME_MISMATCH = -1.0
+
+
+def weather_kind(weather: Optional[str]) -> Optional[str]:
+    """'wet', 'hot', 'cold', 'fair' or 'grey' for a free-text condition, None when unknown"""
+    text = (weather or '').lower()
+    for kind, words in WEATHER_KINDS:
+        if any(word in text for word in words):
+            return kind
+    return None
+
+
+def time_of_day(value: Optional[str]) -> Optional[str]:
+    """Normalize 'Morning', 'night', ... to one of TIMES_OF_DAY, None when unknown"""
+    text = (value or '').lower()
+    if 'night' in text:
+        return 'evening'
+    return next((slot for slot in TIMES_OF_DAY if slot in text), None)
+
+
+def activity_times(activity: Dict) -> Optional[set]:
+    """Times of day an activity's best_time names; None when it suits any time"""
+    text = str(activity.get('best_time') or '').lower()
+    if not text or re.search(r'\b(any|anytime|all day|flexible)\b', text):
+        return None
+    times = {slot for slot in TIMES_OF_DAY if slot in text}
+    if 'night' in text:
+        times.add('evening')
+    return times or None
+
+
+def score_activity(activity: Dict, kind: Optional[str], slot: Optional[str]) -> float:
+    """Fit of one activity for a kind of day and time of day (higher is better)"""
+    score = 0.0
+    indoor = activity.get('indoor')
+    if kind is not None and indoor is not None:
+        score += WEATHER_SCORES[kind][0 if indoor else 1]
+        if kind == 'hot' and not indoor and slot == 'afternoon':
+            score -= HOT_AFTERNOON_PENALTY
+
+    if slot is not None:
+        times = activity_times(activity)
+        if times is None:
+            score += TIME_ANY
+        else:
+            score += TIME_MATCH if slot in times else TIME_MISMATCH
+    return score
+
+
+def rank_activities(activities: List[Dict], weather: Optional[str] = None,
+                    time: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Order activities by fit for the weather and time of day
+
+    Ties keep the model's order. Without a recognizable weather or time the
+    pool is returned in the model's order.
+
+    Args:
+        activities: Activity pool (dicts with `indoor` and `best_time`)
+        weather: Condition such as 'Rainy' or 'sunny and hot' (optional)
+        time: 'morning', 'afternoon', 'evening' or 'night' (optional)
+        limit: Activities to return at most (default: all)
+
+    Returns:
+        The best fitting activities, best first
+    """
+    kind = weather_kind(weather)
+    slot = time_of_day(time)
+    if kind is None and slot is None:
+        ranked = list(activities)
+    else:
+        scores = [score_activity(activity, kind, slot) for activity in activities]
+        order = sorted(range(len(activities)), key=lambda index: -scores[index])
+        ranked = [activities[index] for index in order]
+    return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,236 @@
+"""
+Batch Runner - Executes several API sub-requests inside one HTTP request
+Each sub-request is dispatched through the Flask app in-process (same routing, hooks and
+error handlers as a real request) on a bounded thread pool, so a page that needs several
+endpoints pays for one round trip, bounded by its slowest call rather than the sum
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+from flask import Flask
+from werkzeug.test import EnvironBuilder
+
+# Methods a sub-request may use
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Only API routes can be batched, and never the batch endpoint itself
+API_PREFIX = '/api/'
+BATCH_PATH = '/api/batch'
+
+
+class BatchError(ValueError):
+    """Raised for a batch that cannot run as submitted"""
+
+
+def parse_batch(items, max_requests: int) -> List[Dict]:
+    """
+    Validate sub-request specs and normalize them
+
+    Each item is `{"id", "method", "path", "params", "body", "depends_on"}`; only
+    `path` is required (`id` defaults to the item's position, `method` to GET).
+
+    Returns:
+        Items with `id`, `method`, `path`, `query`, `body` and `depends_on`
+
+    Raises:
+        BatchError: For malformed items, duplicate or unknown ids and dependency cycles
+    """
+    if not isinstance(items, list) or not items:
+        raise BatchError('requests must be a non-empty list')
+    if len(items) > max_requests:
+        raise BatchError(f'At most {max_requests} requests per batch')
+
+    parsed = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'Request {position} needs a path')
+        item_id = str(item.get('id', position))
+        method = str(item.get('method', 'GET')).upper()
+        url = urlsplit(item['path'])
+        if method not in METHODS:
+            raise BatchError(f"Request {item_id}: method must be one of {', '.join(METHODS)}")
+        if not url.path.startswith(API_PREFIX) or url.path.rstrip('/') == BATCH_PATH or url.netloc:
+            raise BatchError(f'Request {item_id}: path must be an API route other than {BATCH_PATH}')
+        params = item.get('params') or {}
+        if not isinstance(params, dict):
+            raise BatchError(f'Request {item_id}: params must be an object')
+        depends_on = item.get('depends_on') or []
+        if not isinstance(depends_on, list):
+            raise BatchError(f'Request {item_id}: depends_on must be a list of ids')
+        parsed.append({
+            'id': item_id,
+            'method': method,
+            'path': url.path,
+            'query': parse_qsl(url.query, keep_blank_values=True) + [
+                (key, str(value)) for key, value in params.items()],
+            'body': item.get('body'),
+            'depends_on': [str(dependency) for dependency in depends_on]
+        })
+
+    ids = [item['id'] for item in parsed]
+    if len(set(ids)) != len(ids):
+        raise BatchError('Request ids must be unique')
+    for item in parsed:
+        unknown = [dependency for dependency in item['depends_on'] if dependency not in ids]
+        if unknown:
+            raise BatchError(f"Request {item['id']} depends on unknown request {unknown[0]}")
+    _check_acyclic(parsed)
+    return parsed
+
+
+def _check_acyclic(items: List[Dict]):
+    remaining = {item['id']: set(item['depends_on']) for item in items}
+    while remaining:
+        ready = [item_id for item_id, dependencies in remaining.items() if not dependencies]
+        if not ready:
+            raise BatchError(f"Dependency cycle between requests {', '.join(sorted(remaining))}")
+        for item_id in ready:
+            del remaining[item_id]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+
+
+class BatchRunner:
+    """
+    Runs batches of sub-requests on a shared, bounded thread pool
+    """
+
+    def __init__(self, workers: int = 8, max_requests: int = 20, timeout: float = 60.0):
+        """
+        Initialize the runner
+
+        Args:
+            workers: Sub-requests running at once across all batches
+            max_requests: Sub-requests allowed per batch
+            timeout: Seconds a batch waits before answering 504 for unfinished sub-requests
+        """
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.timeouts = 0
+
+    def run(self, app: Flask, items: List[Dict], base_url: str,
+            timeout: Optional[float] = None) -> Iterator[Dict]:
+        """
+        Execute parsed sub-requests, yielding each result as it completes
+
+        Independent sub-requests run concurrently; one with `depends_on` starts once
+        those have finished, and is answered 424 without running if any of them failed.
+
+        Args:
+            app: Application to dispatch to
+            items: Output of parse_batch
+            base_url: Scheme and host of the outer request
+            timeout: Seconds to wait (default: the runner's timeout)
+
+        Yields:
+            `{"id", "status", "body", "elapsed_ms"}` per sub-request, in completion order
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        expires = time.perf_counter() + timeout
+        with self._lock:
+            self.batches += 1
+            self.requests += len(items)
+
+        waiting = {item['id']: item for item in items}
+        statuses: Dict[str, int] = {}
+        running: Dict[Future, str] = {}
+
+        while waiting or running:
+            # Start everything whose dependencies are settled
+            for item_id, item in list(waiting.items()):
+                dependencies = item['depends_on']
+                if any(dependency not in statuses for dependency in dependencies):
+                    continue
+                del waiting[item_id]
+                failed = [dependency for dependency in dependencies if statuses[dependency] >= 400]
+                if failed:
+                    statuses[item_id] = 424
+                    yield _result(item_id, 424, {'error': f'Dependency {failed[0]} failed'}, 0.0)
+                    continue
+                running[self._executor.submit(self._dispatch, app, item, base_url)] = item_id
+
+            if not running:
+                continue
+            done, _ = wait(running, timeout=max(expires - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                item_id = running.pop(future)
+                result = future.result()
+                statuses[item_id] = result['status']
+                yield result
+
+        # Past the deadline: still running (left to finish in the background) or never started
+        unfinished = list(running.values()) + list(waiting)
+        for future in running:
+            future.cancel()  # Only succeeds for sub-requests still queued behind other batches
+        if unfinished:
+            with self._lock:
+                self.timeouts += len(unfinished)
+            print(f"⚠️  Batch timed out after {timeout}s on {', '.join(unfinished)}")
+        for item_id in unfinished:
+            yield _result(item_id, 504, {'error': f'Not finished within {timeout} seconds'}, timeout * 1000)
+
+    def _dispatch(self, app: Flask, item: Dict, base_url: str) -> Dict:
+        """Run one sub-request through the app's full dispatch (hooks and error handlers included)"""
+        started = time.perf_counter()
+        builder = EnvironBuilder(
+            path=item['path'],
+            base_url=base_url,
+            method=item['method'],
+            query_string=item['query'],
+            json=item['body'] if item['body'] is not None and item['method'] != 'GET' else None
+        )
+        try:
+            with app.request_context(builder.get_environ()):
+                try:
+                    response = app.full_dispatch_request()
+                except Exception as e:
+                    print(f"❌ Batch request {item['id']} failed: {e}")
+                    return _result(item['id'], 500, {'error': 'Internal server error'}, _elapsed_ms(started))
+                try:
+                    if response.is_streamed:
+                        return _result(item['id'], 400, {'error': 'Streaming endpoints cannot be batched'},
+                                       _elapsed_ms(started))
+                    body = response.get_json(silent=True)
+                    if body is None:
+                        body = response.get_data(as_text=True)
+                    return _result(item['id'], response.status_code, body, _elapsed_ms(started))
+                finally:
+                    response.close()
+        finally:
+            builder.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'timeouts': self.timeouts,
+                'max_requests': self.max_requests
+            }
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _result(item_id: str, status: int, body, elapsed_ms: float) -> Dict:
+    return {'id': item_id, 'status': status, 'body': body, 'elapsed_ms': elapsed_ms}
+
+
+def batch_runner_from_env() -> BatchRunner:
+    """Build a runner from BATCH_WORKERS, BATCH_MAX_REQUESTS and BATCH_TIMEOUT"""
+    return BatchRunner(
+        workers=int(os.getenv('BATCH_WORKERS', 8)),
+        max_requests=int(os.getenv('BATCH_MAX_REQUESTS', 20)),
+        timeout=float(os.getenv('BATCH_TIMEOUT', 60))
+    )
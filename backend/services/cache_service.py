@@ -0,0 +1,335 @@
+"""
+Cache Service - Tiered response cache for LLM generations
+Keeps recent answers in an in-process LRU (with TTL) backed by an optional SQLite tier that survives restarts
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Default time-to-live per endpoint, in seconds
+DEFAULT_TTLS = {
+    'itinerary': 6 * 3600,
+    'activities': 24 * 3600,
+    'cultural_insights': 7 * 24 * 3600,
+    'budget': 6 * 3600,
+}
+
+DEFAULT_TTL = 3600
+
+
+def normalize_text(value: Any) -> str:
+    """Lower-case, trim and collapse whitespace so 'Paris ' and 'paris' share a key"""
+    text = " ".join(str(value or "").split()).lower()
+    return text.strip(" .,;")
+
+
+def normalize_list(values: Any) -> list:
+    """Normalize, de-duplicate and sort a list of free-text values"""
+    if isinstance(values, str):
+        values = values.split(',')
+    return sorted({normalize_text(v) for v in (values or []) if normalize_text(v)})
+
+
+def bucket(value: Any, size: float) -> float:
+    """Round a numeric value to the nearest bucket of the given size"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    if size <= 0:
+        return number
+    return round(number / size) * size
+
+
+def template_version(template: str) -> str:
+    """Short fingerprint of a prompt template; editing the prompt invalidates its cache entries"""
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()[:10]
+
+
+def make_cache_key(endpoint: str, model: str, version: str, inputs: Dict) -> str:
+    """
+    Build a content-addressed cache key from canonicalized prompt inputs
+
+    Args:
+        endpoint: Logical endpoint name (itinerary, activities, ...)
+        model: Model name the answer was generated with
+        version: Prompt template version
+        inputs: Already-normalized prompt inputs
+
+    Returns:
+        Hex digest identifying the generation
+    """
+    canonical = json.dumps(
+        {'endpoint': endpoint, 'model': model, 'version': version, 'inputs': inputs},
+        sort_keys=True,
+        separators=(',', ':'),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class MemoryTier:
+    """
+    In-process LRU cache with per-entry expiry
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[str, float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, expires_at: float, endpoint: str = ''):
+        with self._lock:
+            self._entries[key] = (value, expires_at, endpoint)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """
+    On-disk cache tier backed by a single SQLite table
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache ('
+            'key TEXT PRIMARY KEY, endpoint TEXT, value TEXT, expires_at REAL)'
+        )
+        self._conn.commit()
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+                self._conn.commit()
+                self.expirations += 1
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, expires_at: float, endpoint: str = ''):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO llm_cache (key, endpoint, value, expires_at) VALUES (?, ?, ?, ?)',
+                (key, endpoint, value, expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Remove expired rows, returning how many were deleted"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM llm_cache')
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses with per-endpoint TTLs and hit/miss counters
+    """
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[str] = None,
+                 ttls: Optional[Dict[str, int]] = None, enabled: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Capacity of the in-memory LRU tier
+            db_path: SQLite file for the persistent tier (optional)
+            ttls: Per-endpoint TTL overrides in seconds
+            enabled: When False every lookup misses and nothing is stored
+        """
+        self.enabled = enabled
+        self.memory = MemoryTier(max_entries)
+        self.disk = SQLiteTier(db_path) if db_path else None
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def ttl_for(self, endpoint: str) -> int:
+        """TTL in seconds for entries written by an endpoint"""
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        """
+        Look up a cached response
+
+        Returns:
+            The decoded response, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(endpoint, 'memory_hits')
+            return json.loads(value)
+
+        if self.disk is not None:
+            row = self.disk.get(key)
+            if row is not None:
+                value, expires_at = row
+                # Promote to the memory tier for the remaining lifetime
+                self.memory.set(key, value, expires_at, endpoint)
+                self._count(endpoint, 'disk_hits')
+                return json.loads(value)
+
+        self._count(endpoint, 'misses')
+        return None
+
+    def set(self, endpoint: str, key: str, value: Any, ttl: Optional[int] = None):
+        """Store a response in every configured tier"""
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        encoded = json.dumps(value)
+        expires_at = time.time() + ttl
+        self.memory.set(key, encoded, expires_at, endpoint)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, encoded, expires_at, endpoint)
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not write to cache database: {e}")
+        self._count(endpoint, 'sets')
+
+    def invalidate(self, key: str):
+        """Drop a single entry from every tier"""
+        self.memory.delete(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def clear(self):
+        """Drop every cached entry"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict:
+        """Snapshot of cache counters, suitable for JSON responses"""
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self._counters.items()}
+
+        totals = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0}
+        for counts in endpoints.values():
+            for name in totals:
+                totals[name] += counts.get(name, 0)
+
+        lookups = totals['memory_hits'] + totals['disk_hits'] + totals['misses']
+        hits = totals['memory_hits'] + totals['disk_hits']
+
+        return {
+            'enabled': self.enabled,
+            **totals,
+            'hits': hits,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.memory.evictions,
+            'expirations': self.memory.expirations + (self.disk.expirations if self.disk else 0),
+            'memory_entries': len(self.memory),
+            'memory_capacity': self.memory.max_entries,
+            'disk_enabled': self.disk is not None,
+            'ttls': dict(self.ttls),
+            'endpoints': endpoints
+        }
+
+    def _count(self, endpoint: str, name: str):
+        with self._lock:
+            counts = self._counters.setdefault(endpoint, {})
+            counts[name] = counts.get(name, 0) + 1
+
+
+def cache_from_env() -> ResponseCache:
+    """
+    Build a ResponseCache from environment variables
+
+    LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_DB_PATH and
+    LLM_CACHE_TTL_<ENDPOINT> (e.g. LLM_CACHE_TTL_CULTURAL_INSIGHTS=604800)
+    """
+    ttls = {}
+    for endpoint in DEFAULT_TTLS:
+        override = os.getenv(f'LLM_CACHE_TTL_{endpoint.upper()}')
+        if override:
+            ttls[endpoint] = int(override)
+
+    return ResponseCache(
+        max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 512)),
+        db_path=os.getenv('LLM_CACHE_DB_PATH') or None,
+        ttls=ttls,
+        enabled=os.getenv('LLM_CACHE_ENABLED', 'true').lower() != 'false'
+    )
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache shared by every LLMService instance"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = cache_from_env()
+        return _default_cache
@@ -0,0 +1,228 @@
+"""
+Circuit Breaker - Fails fast while the Ollama backend is down or wedged
+Tracks closed/open/half-open state from call outcomes and a background health probe
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+import httpx
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Thread-safe three-state circuit breaker
+
+    closed: calls pass through; `failure_threshold` consecutive failures, or as many
+            consecutive failed health probes, open the circuit
+    open: calls are rejected immediately until `recovery_timeout` elapses
+          or the health probe sees the backend answer again
+    half_open: up to `half_open_max_calls` trial calls pass; a success closes
+               the circuit, a failure re-opens it
+    """
+
+    def __init__(self, name: str = 'ollama', failure_threshold: int = 3,
+                 recovery_timeout: float = 30, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_probe_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self._half_open_calls = 0
+
+    def allow(self):
+        """
+        Check whether a call may proceed
+
+        Raises:
+            CircuitOpenError: If the circuit is open (or half-open with its trial slots taken)
+        """
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.recovery_timeout:
+                self._transition(HALF_OPEN)
+
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is {self.state}: {self.last_error}")
+
+    def available(self) -> bool:
+        """Whether allow() would let a call through right now (claims nothing)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.time() - self.opened_at >= self.recovery_timeout
+            return self._half_open_calls < self.half_open_max_calls
+
+    def record_success(self):
+        """Record a successful call"""
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._half_open_calls = max(0, self._half_open_calls - 1)
+                self._transition(CLOSED)
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """Record a failed call"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error) if error is not None else self.last_error
+            if self.state == HALF_OPEN:
+                self._half_open_calls = max(0, self._half_open_calls - 1)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """Give back a half-open trial slot without recording an outcome (e.g. cancelled call)"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_calls = max(0, self._half_open_calls - 1)
+
+    def probe_succeeded(self):
+        """Backend answered the health probe: let trial calls through again"""
+        with self._lock:
+            self.consecutive_probe_failures = 0
+            if self.state == OPEN:
+                self._transition(HALF_OPEN)
+
+    def probe_failed(self, error: Optional[BaseException] = None):
+        """
+        Backend did not answer the health probe: stop sending it traffic
+
+        A closed circuit only opens after `failure_threshold` consecutive failed
+        probes, so one slow reply while the model is busy does not reject all calls.
+        """
+        with self._lock:
+            self.consecutive_probe_failures += 1
+            self.last_error = str(error) if error is not None else 'health probe failed'
+            if self.state == CLOSED:
+                if self.consecutive_probe_failures >= self.failure_threshold:
+                    self._open()
+            elif self.state == HALF_OPEN:
+                self._open()
+            else:
+                # Keep the circuit open for another full recovery window
+                self.opened_at = time.time()
+
+    def stats(self) -> Dict:
+        """Breaker state and transition counters"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'consecutive_probe_failures': self.consecutive_probe_failures,
+                'failure_threshold': self.failure_threshold,
+                'recovery_timeout': self.recovery_timeout,
+                'opened_at': self.opened_at,
+                'last_error': self.last_error,
+                'rejected': self.rejected,
+                'transitions': dict(self.transitions)
+            }
+
+    def _open(self):
+        self.opened_at = time.time()
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        name = f"{self.state}->{state}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        print(f"⚡ Circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        if state != HALF_OPEN:
+            self._half_open_calls = 0
+
+
+class HealthProbe:
+    """
+    Background thread that polls the Ollama API and feeds the circuit breaker
+    """
+
+    def __init__(self, base_url: str, breaker: CircuitBreaker,
+                 interval: float = 10, timeout: float = 2):
+        """
+        Initialize the probe
+
+        Args:
+            base_url: Ollama server URL
+            breaker: Breaker to update
+            interval: Seconds between probes
+            timeout: Probe request timeout in seconds
+        """
+        self.url = base_url.rstrip('/') + '/api/tags'
+        self.breaker = breaker
+        self.interval = interval
+        self.timeout = timeout
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_ok: Optional[bool] = None
+        self.last_latency_ms: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start probing in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='ollama-health-probe', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def probe(self) -> bool:
+        """Run one probe and update the breaker"""
+        started = time.perf_counter()
+        try:
+            response = httpx.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, e
+
+        self.last_probe_at = time.time()
+        self.last_probe_ok = ok
+        self.last_latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if ok:
+            self.breaker.probe_succeeded()
+        else:
+            self.breaker.probe_failed(error)
+        return ok
+
+    def stats(self) -> Dict:
+        return {
+            'url': self.url,
+            'interval': self.interval,
+            'last_probe_at': self.last_probe_at,
+            'last_probe_ok': self.last_probe_ok,
+            'last_latency_ms': self.last_latency_ms
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
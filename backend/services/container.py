@@ -0,0 +1,163 @@
+"""
+Service Container - Process-wide registry of backend services
+Built once by create_app() so every blueprint shares the same LLM client, chains and caches
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional
+from flask import Flask, current_app
+from services.batch_runner import BatchRunner, batch_runner_from_env
+from services.cache_service import ResponseCache, get_response_cache
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, HealthProbe
+from services.job_queue import JobQueue, job_queue_from_env
+from services.llm_service import LLMService
+from services.scraper_service import ScraperService
+from services.trip_planner import TripPlanner, trip_planner_from_env
+from services.weather_service import ForecastProvider, forecast_provider_from_env
+
+EXTENSION_KEY = 'wanderguide_services'
+
+
+class ServiceContainer:
+    """
+    Holds the long-lived service instances for one worker process
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None,
+                 llm_service: Optional[LLMService] = None,
+                 scraper_service: Optional[ScraperService] = None,
+                 jobs: Optional[JobQueue] = None,
+                 batch: Optional[BatchRunner] = None,
+                 weather: Optional[ForecastProvider] = None):
+        """
+        Initialize the container, constructing any service not supplied
+
+        Args:
+            cache: Response cache shared by the LLM service
+            llm_service: Pre-built LLM service (optional)
+            scraper_service: Pre-built scraper service (optional)
+            jobs: Background job queue (optional)
+            batch: Runner for /api/batch sub-requests (optional)
+            weather: Cached forecast provider (optional)
+        """
+        self.cache = cache if cache is not None else get_response_cache()
+        self.llm_service = llm_service if llm_service is not None else LLMService(cache=self.cache)
+        self.scraper_service = scraper_service if scraper_service is not None else ScraperService()
+        self.jobs = jobs if jobs is not None else job_queue_from_env()
+        self.batch = batch if batch is not None else batch_runner_from_env()
+        self.weather = weather if weather is not None else forecast_provider_from_env()
+        self.trips = trip_planner_from_env(self.llm_service, self.scraper_service, self.weather)
+        self.warmup_thread: Optional[threading.Thread] = None
+        self.health_probes: List[HealthProbe] = []
+
+    def warm_up(self, background: bool = True):
+        """
+        Load the model before the first user request
+
+        Args:
+            background: Run in a daemon thread so startup is not blocked
+        """
+        if not background:
+            self.llm_service.warm_up()
+            return
+
+        self.warmup_thread = threading.Thread(
+            target=self.llm_service.warm_up,
+            name='ollama-warmup',
+            daemon=True
+        )
+        self.warmup_thread.start()
+
+    def start_health_probe(self, interval: float):
+        """Poll every Ollama backend in the background and feed its circuit breaker"""
+        llm = self.llm_service.llm
+        if llm is None or self.health_probes:
+            return
+        for backend in llm.client.backends:
+            probe = HealthProbe(backend.base_url, backend.breaker, interval=interval)
+            probe.start()
+            self.health_probes.append(probe)
+
+    def circuit_stats(self) -> Optional[Dict]:
+        """
+        Circuit breaker and health probe state per backend, None when the LLM is unavailable
+
+        The pool is closed while any backend is closed, half-open while any
+        backend is on trial, and open only when every backend is ejected.
+        """
+        llm = self.llm_service.llm
+        if llm is None:
+            return None
+
+        probes = {probe.url: probe for probe in self.health_probes}
+        backends = []
+        for backend in llm.client.backends:
+            stats = backend.breaker.stats()
+            probe = probes.get(backend.base_url.rstrip('/') + '/api/tags')
+            stats['probe'] = probe.stats() if probe else None
+            backends.append(stats)
+
+        states = {stats['state'] for stats in backends}
+        state = CLOSED if CLOSED in states else HALF_OPEN if HALF_OPEN in states else OPEN
+        return {
+            'state': state,
+            'healthy_backends': sum(1 for stats in backends if stats['state'] == CLOSED),
+            'rejected': llm.client.rejected,
+            'backends': backends
+        }
+
+
+def init_services(app: Flask, container: Optional[ServiceContainer] = None) -> ServiceContainer:
+    """
+    Attach a service container to the Flask app, warm up the model and start health probing
+
+    Warm-up can be disabled with OLLAMA_WARMUP=false (e.g. for tests or CLI tools)
+    and probing with OLLAMA_PROBE_INTERVAL=0.
+    """
+    container = container or ServiceContainer()
+    app.extensions[EXTENSION_KEY] = container
+
+    if os.getenv('OLLAMA_WARMUP', 'true').lower() != 'false':
+        container.warm_up()
+
+    probe_interval = float(os.getenv('OLLAMA_PROBE_INTERVAL', 10))
+    if probe_interval > 0:
+        container.start_health_probe(probe_interval)
+
+    return container
+
+
+def get_services() -> ServiceContainer:
+    """Service container of the current Flask app"""
+    return current_app.extensions[EXTENSION_KEY]
+
+
+def get_llm_service() -> LLMService:
+    """Shared LLM service of the current Flask app"""
+    return get_services().llm_service
+
+
+def get_scraper_service() -> ScraperService:
+    """Shared scraper service of the current Flask app"""
+    return get_services().scraper_service
+
+
+def get_job_queue() -> JobQueue:
+    """Background job queue of the current Flask app"""
+    return get_services().jobs
+
+
+def get_batch_runner() -> BatchRunner:
+    """Sub-request runner of the current Flask app"""
+    return get_services().batch
+
+
+def get_trip_planner() -> TripPlanner:
+    """Trip planner of the current Flask app"""
+    return get_services().trips
+
+
+def get_forecast_provider() -> ForecastProvider:
+    """Cached forecast provider of the current Flask app"""
+    return get_services().weather
@@ -0,0 +1,194 @@
+"""
+Conversation Store - Per-conversation state for the chat assistant
+Keeps a rolling summary of older turns and the Ollama context of the last reply so
+a continuing conversation only sends the new message instead of re-sending its history
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text or '') // 4 + 1
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """Trim text to a token budget, preferring to cut at a sentence end"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = cut.rfind('. ')
+    return cut[:end + 1] if end > max_chars // 2 else cut
+
+
+def prefix_key(destination: str, itinerary_summary: str) -> str:
+    """Fingerprint of the stable part of the chat prompt"""
+    return hashlib.sha1(f"{destination}\n{itinerary_summary}".encode('utf-8')).hexdigest()[:16]
+
+
+class ConversationState:
+    """
+    Chat state for one conversation
+
+    `turns` holds the messages not yet folded into `summary`. `context` is the
+    token state Ollama returned for the last reply; it is only valid while the
+    prompt prefix (destination and itinerary) stays the same.
+    """
+
+    def __init__(self, conversation_id: str, turns: Optional[List[Dict]] = None):
+        self.conversation_id = conversation_id
+        self.turns: List[Dict] = list(turns or [])
+        self.summary = ''
+        self.context: Optional[List[int]] = None
+        self.prefix_key: Optional[str] = None
+        self.backend: Optional[str] = None
+        self.summarizing = False
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    def add_turn(self, role: str, content: str):
+        self.turns.append({'role': role, 'content': content})
+        self.updated_at = time.time()
+
+    def reset_context(self):
+        self.context = None
+        self.prefix_key = None
+        self.backend = None
+
+    def history_text(self) -> str:
+        """Summary of older turns followed by the recent turns, for a full prompt"""
+        lines = []
+        if self.summary:
+            lines.append(f"Summary of earlier conversation: {self.summary}")
+        lines.extend(f"{turn['role']}: {turn['content']}" for turn in self.turns)
+        return "\n".join(lines)
+
+
+class ConversationStore:
+    """
+    Bounded, thread-safe registry of conversation states (LRU with idle expiry)
+    """
+
+    def __init__(self, max_conversations: int = 1000, ttl: float = 3600,
+                 recent_turns: int = 6, context_tokens: int = 3000, summary_tokens: int = 300):
+        """
+        Initialize the store
+
+        Args:
+            max_conversations: Conversations kept before the least recently used is dropped
+            ttl: Seconds an idle conversation is kept
+            recent_turns: Messages kept verbatim; older ones are folded into the summary
+            context_tokens: Largest Ollama context reused before starting a fresh prompt
+            summary_tokens: Token budget for the rolling summary
+        """
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.recent_turns = recent_turns
+        self.context_tokens = context_tokens
+        self.summary_tokens = summary_tokens
+
+        self._lock = threading.Lock()
+        self._states: 'OrderedDict[str, ConversationState]' = OrderedDict()
+
+        self.created = 0
+        self.expired = 0
+        self.evictions = 0
+        self.context_reuses = 0
+        self.full_prompts = 0
+        self.summaries = 0
+        self.prompt_eval_ms = {'reused': [0.0, 0], 'full': [0.0, 0]}
+
+    def get_or_create(self, conversation_id: Optional[str], seed_turns: Optional[List[Dict]] = None) -> ConversationState:
+        """
+        Look up a conversation, starting a new one if the id is unknown or missing
+
+        Args:
+            conversation_id: Id returned by a previous chat reply (optional)
+            seed_turns: Client-side history used when the server has no state
+                        (e.g. after a restart or when another worker served earlier turns)
+        """
+        now = time.time()
+        with self._lock:
+            state = self._states.get(conversation_id) if conversation_id else None
+            if state is not None and now - state.updated_at > self.ttl:
+                del self._states[conversation_id]
+                self.expired += 1
+                state = None
+            if state is not None:
+                self._states.move_to_end(conversation_id)
+                return state
+
+            state = ConversationState(conversation_id or uuid.uuid4().hex, [
+                {'role': msg.get('role', 'user'), 'content': msg.get('content', '')}
+                for msg in (seed_turns or [])[-self.recent_turns:]
+            ])
+            self._states[state.conversation_id] = state
+            self.created += 1
+            while len(self._states) > self.max_conversations:
+                self._states.popitem(last=False)
+                self.evictions += 1
+            return state
+
+    def can_reuse_context(self, state: ConversationState, key: str) -> bool:
+        """Whether the conversation's Ollama context still matches the prompt prefix and fits the budget"""
+        return (
+            state.context is not None
+            and state.prefix_key == key
+            and len(state.context) < self.context_tokens
+        )
+
+    def turns_to_fold(self, state: ConversationState) -> List[Dict]:
+        """Turns older than the recent window that should go into the summary"""
+        if len(state.turns) <= self.recent_turns:
+            return []
+        return state.turns[:len(state.turns) - self.recent_turns]
+
+    def record_turn(self, reused: bool, prompt_eval_ns: Optional[int]):
+        """Count a turn and its prompt evaluation time so context reuse can be compared with full prompts"""
+        with self._lock:
+            if reused:
+                self.context_reuses += 1
+            else:
+                self.full_prompts += 1
+            if prompt_eval_ns:
+                totals = self.prompt_eval_ms['reused' if reused else 'full']
+                totals[0] += prompt_eval_ns / 1e6
+                totals[1] += 1
+
+    def record_summary(self):
+        with self._lock:
+            self.summaries += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'conversations': len(self._states),
+                'created': self.created,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'context_reuses': self.context_reuses,
+                'full_prompts': self.full_prompts,
+                'summaries': self.summaries,
+                'avg_prompt_eval_ms': {
+                    mode: round(total / count, 1) if count else None
+                    for mode, (total, count) in self.prompt_eval_ms.items()
+                }
+            }
+
+
+def conversation_store_from_env() -> ConversationStore:
+    """Build a conversation store from LLM_CHAT_* environment variables"""
+    return ConversationStore(
+        max_conversations=int(os.getenv('LLM_CHAT_MAX_CONVERSATIONS', 1000)),
+        ttl=float(os.getenv('LLM_CHAT_TTL', 3600)),
+        recent_turns=int(os.getenv('LLM_CHAT_RECENT_TURNS', 6)),
+        context_tokens=int(os.getenv('LLM_CHAT_CONTEXT_TOKENS', 3000)),
+        summary_tokens=int(os.getenv('LLM_CHAT_SUMMARY_TOKENS', 300))
+    )
@@ -0,0 +1,237 @@
+"""
+Fare Calendar - Flexible-date flight prices for a route
+Generates the per-airline fare of many travel days in one vectorized batch, caches them
+per route and day, and combines outbound and return fares into a departure x return grid
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Airlines quoted on every route, in fare-column order
+AIRLINES = [
+    {"name": "SkyLine Airways", "code": "SKY"},
+    {"name": "Global Wings", "code": "GLW"},
+    {"name": "Pacific Air", "code": "PAC"},
+    {"name": "Euro Express", "code": "EEX"},
+    {"name": "Continental Flights", "code": "CON"}
+]
+
+# Price multiplier per weekday (Monday first): Friday and Sunday flights are the busiest
+WEEKDAY_FACTORS = np.array([1.0, 0.9, 0.9, 1.0, 1.15, 1.05, 1.15])
+
+# Last-minute fares cost up to this much more, fading over LAST_MINUTE_DAYS
+LAST_MINUTE_PREMIUM = 0.5
+LAST_MINUTE_DAYS = 14
+
+DEFAULT_TTL = 15 * 60
+
+_HASH_MULTIPLIERS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+def parse_date(value: str) -> date:
+    """YYYY-MM-DD to a date (raises ValueError)"""
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def date_window(center: str, flex_days: int) -> List[date]:
+    """The days from center - flex_days to center + flex_days"""
+    middle = parse_date(center)
+    return [middle + timedelta(days=offset) for offset in range(-flex_days, flex_days + 1)]
+
+
+def _uniform(keys: np.ndarray) -> np.ndarray:
+    """
+    Deterministic uniform [0, 1) noise per key (splitmix64 finalizer)
+
+    The same route, day and airline always hash to the same value, so a day's
+    fares do not depend on which other days were generated in the same batch.
+    """
+    mixed = keys * _HASH_MULTIPLIERS[0]
+    mixed = (mixed ^ (mixed >> np.uint64(30))) * _HASH_MULTIPLIERS[1]
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * _HASH_MULTIPLIERS[2]
+    mixed = mixed ^ (mixed >> np.uint64(31))
+    return (mixed >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def route_seed(origin: str, destination: str) -> int:
+    """Stable 32-bit seed of a one-way route"""
+    return zlib.crc32(f"{origin}-{destination}".encode('utf-8'))
+
+
+def generate_fares(origin: str, destination: str, days: Sequence[date],
+                   today: Optional[date] = None) -> np.ndarray:
+    """
+    Per-person fares of every airline on a one-way route
+
+    Args:
+        origin: Departure airport/city code
+        destination: Arrival airport/city code
+        days: Travel days
+        today: Booking day the last-minute premium counts from (default: today)
+
+    Returns:
+        Integer USD fares, shape (len(days), len(AIRLINES))
+    """
+    seed = route_seed(origin, destination)
+    ordinals = np.array([day.toordinal() for day in days], dtype=np.int64)
+    weekdays = np.array([day.weekday() for day in days], dtype=np.int64)
+    days_ahead = np.maximum(ordinals - (today or date.today()).toordinal(), 0)
+
+    # Base fare between 200 and 800, fixed per route (in production: distance and demand)
+    base = 200 + seed % 601
+    day_price = base * WEEKDAY_FACTORS[weekdays] * (1 + LAST_MINUTE_PREMIUM * np.exp(-days_ahead / LAST_MINUTE_DAYS))
+
+    airlines = np.arange(len(AIRLINES), dtype=np.uint64)
+    keys = (np.uint64(seed) << np.uint64(32)) ^ (ordinals.astype(np.uint64)[:, None] << np.uint64(3)) ^ airlines[None, :]
+    noise = _uniform(keys) * 400 - 100
+
+    return np.rint(day_price[:, None] + airlines.astype(np.float64)[None, :] * 50 + noise).astype(np.int64)
+
+
+class FareCalendar:
+    """
+    Per-route, per-day fare cache with batch generation of the missing days
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = 20000):
+        """
+        Initialize the calendar
+
+        Args:
+            ttl: Seconds a day's fares are reused before they are quoted again
+            max_entries: Route-days kept at most (least recently used are evicted)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, str, date], Tuple[np.ndarray, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def daily_fares(self, origin: str, destination: str, days: Sequence[date]) -> np.ndarray:
+        """
+        Fares of every airline for each day, shape (len(days), len(AIRLINES))
+
+        Days not cached (or expired) are generated together in one batch.
+        """
+        origin, destination = origin.strip().upper(), destination.strip().upper()
+        fares = np.empty((len(days), len(AIRLINES)), dtype=np.int64)
+        missing = []
+        now = time.time()
+        with self._lock:
+            for index, day in enumerate(days):
+                entry = self._entries.get((origin, destination, day))
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end((origin, destination, day))
+                    fares[index] = entry[0]
+                else:
+                    missing.append(index)
+            self.hits += len(days) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            generated = generate_fares(origin, destination, [days[index] for index in missing])
+            fares[missing] = generated
+            with self._lock:
+                for index, row in zip(missing, generated):
+                    self._entries[(origin, destination, days[index])] = (row, now + self.ttl)
+                    self._entries.move_to_end((origin, destination, days[index]))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return fares
+
+    def matrix(self, origin: str, destination: str, departure_days: Sequence[date],
+               return_days: Optional[Sequence[date]] = None, top: int = 5) -> Dict:
+        """
+        Cheapest fare for every departure day (x return day for round trips)
+
+        Args:
+            origin: Departure airport/city code
+            destination: Arrival airport/city code
+            departure_days: Outbound travel days (grid rows)
+            return_days: Return travel days (grid columns); None for one-way
+            top: Number of cheapest cells to list
+
+        Returns:
+            Dict with per-person `prices` (a list per departure day for round trips,
+            None where the return is before the departure) and the `cheapest` cells
+        """
+        outbound = self.daily_fares(origin, destination, departure_days)
+
+        if return_days is None:
+            airline = outbound.argmin(axis=1)
+            price = outbound.min(axis=1)
+            order = np.argsort(price, kind='stable')[:top]
+            return {
+                'prices': price.tolist(),
+                'cheapest': [
+                    {
+                        'departure_date': departure_days[row].isoformat(),
+                        'return_date': None,
+                        'price': int(price[row]),
+                        'airline': AIRLINES[airline[row]]['code']
+                    }
+                    for row in order
+                ]
+            }
+
+        inbound = self.daily_fares(destination, origin, return_days)
+
+        # Round trips are quoted per airline (as search_flights does): every
+        # departure x return x airline total at once, then the cheapest airline
+        totals = outbound[:, None, :] + inbound[None, :, :]
+        airline = totals.argmin(axis=2)
+        grid = totals.min(axis=2)
+
+        departures = np.array([day.toordinal() for day in departure_days])
+        returns = np.array([day.toordinal() for day in return_days])
+        valid = returns[None, :] >= departures[:, None]
+        grid = np.where(valid, grid, np.iinfo(np.int64).max)
+
+        # Partial sort of the flattened grid, then order just the selected cells
+        count = min(top, int(valid.sum()))
+        flat = grid.ravel()
+        selected = np.argpartition(flat, count - 1)[:count] if count else np.array([], dtype=np.int64)
+        selected = selected[np.argsort(flat[selected], kind='stable')]
+
+        cheapest = []
+        for cell in selected:
+            row, column = divmod(int(cell), len(return_days))
+            cheapest.append({
+                'departure_date': departure_days[row].isoformat(),
+                'return_date': return_days[column].isoformat(),
+                'nights': int(returns[column] - departures[row]),
+                'price': int(grid[row, column]),
+                'airline': AIRLINES[airline[row, column]]['code']
+            })
+
+        return {
+            'prices': [[int(price) if ok else None for price, ok in zip(prices, oks)]
+                       for prices, oks in zip(grid.tolist(), valid.tolist())],
+            'cheapest': cheapest
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'ttl': self.ttl
+            }
+
+
+def fare_calendar_from_env() -> FareCalendar:
+    """Build a fare calendar from FARE_CACHE_* environment variables"""
+    return FareCalendar(
+        ttl=float(os.getenv('FARE_CACHE_TTL', DEFAULT_TTL)),
+        max_entries=int(os.getenv('FARE_CACHE_MAX_ENTRIES', 20000))
+    )
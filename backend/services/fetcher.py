@@ -0,0 +1,371 @@
+"""
+Fetcher - HTTP layer for scraping booking sites
+Pooled keep-alive sessions, per-host concurrency and rate limits, retries with backoff
+and an HTTP cache that revalidates repeat queries with ETag / Last-Modified
+"""
+
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.8'
+}
+
+# Statuses worth retrying: rate limited or a transient server/gateway failure
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """Raised when a page could not be fetched (after retries for transient failures)"""
+
+    def __init__(self, message: str, url: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.url = url
+        self.status = status
+
+
+class FetchResult:
+    """
+    A fetched page
+
+    `source` is 'network' for a full download, 'revalidated' when the server
+    answered 304 and the cached body was reused, or 'cache' for a fresh cache hit.
+    """
+
+    def __init__(self, url: str, status: int, text: str, source: str, elapsed: float):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.source = source
+        self.elapsed = elapsed
+
+
+class HostLimiter:
+    """
+    Concurrency cap plus token-bucket rate limit for one host
+    """
+
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        """
+        Args:
+            rate: Requests per second (0 disables rate limiting)
+            burst: Requests that may be sent back to back after an idle period
+            concurrency: Requests in flight at once
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._slots = threading.BoundedSemaphore(max(concurrency, 1))
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._not_before = 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a concurrency slot and a rate token are available
+
+        Args:
+            timeout: Seconds to wait at most (None waits as long as it takes)
+
+        Returns:
+            False, holding nothing, if both were not available within the timeout
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        if not self._slots.acquire(timeout=None if timeout is None else max(timeout, 0)):
+            return False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.rate > 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                wait = self._not_before - now
+                if wait <= 0:
+                    if self.rate <= 0 or self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+            if expires is not None and now + wait > expires:
+                self._slots.release()
+                return False
+            time.sleep(wait)
+
+    def release(self):
+        self._slots.release()
+
+    def back_off(self, seconds: float):
+        """Send nothing to this host for the next seconds (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
+
+
+class CachedPage:
+    """Body and validators of a cached response"""
+
+    def __init__(self, text: str, status: int, etag: Optional[str], last_modified: Optional[str],
+                 expires_at: float):
+        self.text = text
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+def _max_age(headers) -> Optional[float]:
+    """Freshness lifetime from Cache-Control; None when the response must not be stored"""
+    directives = {}
+    for part in headers.get('Cache-Control', '').split(','):
+        name, _, value = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = value.strip('"')
+    if 'no-store' in directives or 'private' in directives:
+        return None
+    if 'no-cache' in directives:
+        return 0.0
+    try:
+        return float(directives.get('s-maxage', directives.get('max-age', 0)))
+    except ValueError:
+        return 0.0
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or an HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Fetcher:
+    """
+    Thread-safe page fetcher shared by every scraper
+    """
+
+    def __init__(self, rate_per_host: float = 2.0, burst: int = 4, max_per_host: int = 4,
+                 max_retries: int = 3, backoff: float = 0.5, max_backoff: float = 10.0,
+                 timeout: float = 10.0, pool_size: int = 32, cache_entries: int = 1024,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the fetcher
+
+        Args:
+            rate_per_host: Requests per second sent to any one host (0 = unlimited)
+            burst: Requests per host that may go out back to back
+            max_per_host: Requests in flight per host
+            max_retries: Retries after a connection error, timeout, 429 or 5xx
+            backoff: First retry delay in seconds, doubled per attempt (with jitter)
+            max_backoff: Longest retry delay
+            timeout: Connect and read timeout per attempt, in seconds
+            pool_size: Keep-alive connections kept per host
+            cache_entries: Pages kept in the HTTP cache (0 disables it)
+            headers: Request headers (default: browser-like headers)
+        """
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache_entries = cache_entries
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._host_limits: Dict[str, Dict] = {}
+        self._cache: 'OrderedDict[str, CachedPage]' = OrderedDict()
+        self._counters = {
+            'requests': 0, 'downloads': 0, 'cache_hits': 0, 'revalidated': 0,
+            'retries': 0, 'failures': 0, 'bytes': 0
+        }
+
+    def configure_host(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None,
+                       concurrency: Optional[int] = None):
+        """Override the rate limit and concurrency for one host[:port] (e.g. a site's published crawl rate)"""
+        with self._lock:
+            self._host_limits[host.lower()] = {'rate': rate, 'burst': burst, 'concurrency': concurrency}
+            self._limiters.pop(host.lower(), None)
+
+    def fetch(self, url: str, params: Optional[Dict] = None, timeout: Optional[float] = None) -> FetchResult:
+        """
+        GET a page, from the cache when it is still fresh
+
+        Args:
+            url: Page URL
+            params: Query parameters
+            timeout: Seconds for the whole fetch, retries included (default: no overall limit).
+                     Each attempt's timeout is capped to what is left, and a retry that
+                     could not start before it runs out is not made
+
+        Returns:
+            The page
+
+        Raises:
+            FetchError: On a non-retryable error status, once retries are exhausted or
+                        when the timeout runs out
+        """
+        url = requests.Request('GET', url, params=params).prepare().url
+        started = time.perf_counter()
+        expires = None if timeout is None else started + timeout
+
+        def remaining() -> Optional[float]:
+            return None if expires is None else expires - time.perf_counter()
+        cached = self._cache_get(url)
+        if cached is not None and cached.fresh():
+            self._count('cache_hits')
+            return FetchResult(url, cached.status, cached.text, 'cache', time.perf_counter() - started)
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        limiter = self._limiter(urlsplit(url).netloc)
+        error, status = None, None
+        attempts = 0
+        for attempt in range(self.max_retries + 1):
+            budget = remaining()
+            if budget is not None and budget <= 0:
+                error = f"{error}, then out of time" if error else "out of time"
+                break
+            if not limiter.acquire(budget):
+                error = f"{error}, then no request slot in time" if error else "no request slot in time"
+                break
+            if attempt:
+                self._count('retries')
+            attempts += 1
+            delay = None
+            try:
+                self._count('requests')
+                budget = remaining()
+                attempt_timeout = self.timeout if budget is None else max(min(self.timeout, budget), 0.001)
+                response = self.session.get(url, headers=headers, timeout=attempt_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, status = e, None
+            else:
+                status = response.status_code
+                if status == 304 and cached is not None:
+                    self._count('revalidated')
+                    self._store(url, response, cached.text, cached.status, cached)
+                    return FetchResult(url, cached.status, cached.text, 'revalidated', time.perf_counter() - started)
+                if status < 400:
+                    self._count('downloads')
+                    self._count('bytes', len(response.content))
+                    self._store(url, response, response.text, status)
+                    return FetchResult(url, status, response.text, 'network', time.perf_counter() - started)
+                if status not in RETRY_STATUSES:
+                    self._count('failures')
+                    raise FetchError(f"GET {url} returned {status}", url, status)
+                error = f"status {status}"
+                delay = _retry_after(response.headers.get('Retry-After'))
+                if delay is not None:
+                    # A long Retry-After must not stall every request to the host for that long
+                    delay = min(delay, self.max_backoff)
+                if status == 429:
+                    limiter.back_off(delay if delay is not None else self.backoff)
+            finally:
+                limiter.release()
+
+            if attempt < self.max_retries:
+                # Full jitter so retries from parallel searches do not arrive together
+                backoff = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                pause = delay if delay is not None else backoff
+                budget = remaining()
+                if budget is not None and pause >= budget:
+                    break  # The retry could not even start in time
+                time.sleep(pause)
+
+        self._count('failures')
+        raise FetchError(f"GET {url} failed after {attempts} attempts: {error}", url, status)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, cached_pages=len(self._cache), hosts=len(self._limiters))
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        self.session.close()
+
+    def _limiter(self, host: str) -> HostLimiter:
+        host = host.lower()
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limits = self._host_limits.get(host, {})
+                limiter = self._limiters[host] = HostLimiter(
+                    rate=limits.get('rate') if limits.get('rate') is not None else self.rate_per_host,
+                    burst=limits.get('burst') or self.burst,
+                    concurrency=limits.get('concurrency') or self.max_per_host
+                )
+            return limiter
+
+    def _cache_get(self, url: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._cache.get(url)
+            if page is not None:
+                self._cache.move_to_end(url)
+            return page
+
+    def _store(self, url: str, response: requests.Response, text: str, status: int,
+               previous: Optional[CachedPage] = None):
+        """Cache a response that is storable and either fresh for a while or revalidatable"""
+        if self.cache_entries <= 0:
+            return
+        max_age = _max_age(response.headers)
+        # A 304 may leave out validators that did not change
+        etag = response.headers.get('ETag') or (previous.etag if previous else None)
+        last_modified = response.headers.get('Last-Modified') or (previous.last_modified if previous else None)
+        with self._lock:
+            if max_age is None or (max_age <= 0 and not etag and not last_modified):
+                self._cache.pop(url, None)
+                return
+            self._cache[url] = CachedPage(text, status, etag, last_modified, time.time() + max_age)
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+
+def fetcher_from_env() -> Fetcher:
+    """Build a fetcher from SCRAPER_* environment variables"""
+    return Fetcher(
+        rate_per_host=float(os.getenv('SCRAPER_RATE_PER_HOST', 2.0)),
+        burst=int(os.getenv('SCRAPER_BURST', 4)),
+        max_per_host=int(os.getenv('SCRAPER_MAX_PER_HOST', 4)),
+        max_retries=int(os.getenv('SCRAPER_MAX_RETRIES', 3)),
+        backoff=float(os.getenv('SCRAPER_BACKOFF', 0.5)),
+        timeout=float(os.getenv('SCRAPER_TIMEOUT', 10)),
+        cache_entries=int(os.getenv('SCRAPER_CACHE_ENTRIES', 1024))
+    )
@@ -0,0 +1,290 @@
+"""
+Hotel Index - Columnar in-memory inventory for server-side hotel filtering and paging
+A search's hotels are indexed once into numpy columns (prices, stars, review scores)
+and amenity bitsets; filters, sorts and facet counts then run as array operations and
+only the hotels on the returned page are touched as dicts
+"""
+
+import base64
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from services.singleflight import SingleFlight
+
+# Sort orders accepted by HotelIndex.query; 'recommended' is the original
+# search_hotels order (stars descending, then total price)
+SORTS = ('recommended', 'price', 'price_desc', 'review', 'stars')
+
+# Nightly-rate facet buckets (USD)
+PRICE_BUCKETS = (0, 100, 200, 300, 500)
+
+# Amenities listed in the facets at most (the most common first)
+MAX_AMENITY_FACETS = 20
+
+# Seconds an index built from a partial search (a provider was skipped) is reused
+PARTIAL_TTL = 30
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a pagination cursor that was not issued by this API"""
+
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _amenity_key(name: str) -> str:
+    return ' '.join(str(name).lower().split())
+
+
+def encode_cursor(index_id: str, offset: int, last_id: Optional[str]) -> str:
+    payload = json.dumps({'i': index_id, 'o': offset, 'l': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return {'index': str(payload['i']), 'offset': int(payload['o']), 'last_id': payload.get('l')}
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+
+class HotelIndex:
+    """
+    Immutable columnar index over one search's hotels
+    """
+
+    def __init__(self, hotels: Sequence[Dict], coverage: Optional[Dict] = None):
+        """
+        Build the columns
+
+        Args:
+            hotels: Hotel dicts in the ScraperService shape
+            coverage: Provider coverage of the search the hotels came from
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.created_at = time.time()
+        self.coverage = coverage
+        self.records = list(hotels)
+        self.ids = [str(hotel.get('id', position)) for position, hotel in enumerate(self.records)]
+        self._positions = {hotel_id: position for position, hotel_id in enumerate(self.ids)}
+
+        prices = [hotel.get('price') or {} for hotel in self.records]
+        self.nightly = np.array([_number(price.get('nightly_rate'), np.inf) for price in prices], dtype=np.float64)
+        self.total = np.array([_number(price.get('total'), np.inf) for price in prices], dtype=np.float64)
+        self.stars = np.array([int(_number(hotel.get('rating'))) for hotel in self.records], dtype=np.int64)
+        self.review = np.array([_number(hotel.get('review_score')) for hotel in self.records], dtype=np.float64)
+
+        # Amenity vocabulary of this search, one bit per amenity in 64-bit words
+        vocabulary: Dict[str, int] = {}
+        self.amenity_names: List[str] = []
+        per_hotel = []
+        for hotel in self.records:
+            bits = []
+            for name in hotel.get('amenities') or []:
+                key = _amenity_key(name)
+                if key not in vocabulary:
+                    vocabulary[key] = len(vocabulary)
+                    self.amenity_names.append(str(name))
+                bits.append(vocabulary[key])
+            per_hotel.append(bits)
+        self._vocabulary = vocabulary
+        words = max(1, -(-len(vocabulary) // 64))
+        self.amenity_bits = np.zeros((len(self.records), words), dtype=np.uint64)
+        for row, bits in enumerate(per_hotel):
+            for bit in bits:
+                self.amenity_bits[row, bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def mask(self, min_stars: Optional[int] = None, min_price: Optional[float] = None,
+             max_price: Optional[float] = None, min_review: Optional[float] = None,
+             amenities: Iterable[str] = ()) -> np.ndarray:
+        """Boolean mask of the hotels matching every given filter (prices are nightly rates)"""
+        mask = np.ones(len(self.records), dtype=bool)
+        if min_stars is not None:
+            mask &= self.stars >= min_stars
+        if min_price is not None:
+            mask &= self.nightly >= min_price
+        if max_price is not None:
+            mask &= self.nightly <= max_price
+        if min_review is not None:
+            mask &= self.review >= min_review
+
+        required = np.zeros(self.amenity_bits.shape[1], dtype=np.uint64)
+        for name in amenities:
+            bit = self._vocabulary.get(_amenity_key(name))
+            if bit is None:
+                return np.zeros(len(self.records), dtype=bool)  # No hotel in this search has it
+            required[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        if required.any():
+            mask &= np.all((self.amenity_bits & required) == required, axis=1)
+        return mask
+
+    def order(self, mask: np.ndarray, sort: str = 'recommended') -> np.ndarray:
+        """Positions of the matching hotels in sort order (ties keep the search order)"""
+        positions = np.flatnonzero(mask)
+        if sort == 'price':
+            keys = (-self.review[positions], self.nightly[positions])
+        elif sort == 'price_desc':
+            keys = (-self.review[positions], -self.nightly[positions])
+        elif sort == 'review':
+            keys = (self.nightly[positions], -self.review[positions])
+        else:
+            # 'recommended' and 'stars': the original search_hotels order
+            keys = (self.total[positions], -self.stars[positions])
+        # np.lexsort sorts by the last key first and is stable
+        return positions[np.lexsort(keys)]
+
+    def facets(self, mask: np.ndarray) -> Dict:
+        """Star, price bucket and amenity counts among the matching hotels"""
+        stars = np.bincount(np.clip(self.stars[mask], 0, 5), minlength=6)
+        edges = np.array(PRICE_BUCKETS[1:], dtype=np.float64)
+        buckets = np.bincount(np.searchsorted(edges, self.nightly[mask], side='right'),
+                              minlength=len(PRICE_BUCKETS))
+        labels = [f"{low}-{high}" for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])] + [f"{PRICE_BUCKETS[-1]}+"]
+
+        counts = np.zeros(len(self.amenity_names), dtype=np.int64)
+        if len(self.amenity_names):
+            bits = self.amenity_bits[mask]
+            for word in range(bits.shape[1]):
+                shifts = np.arange(min(64, len(self.amenity_names) - word * 64), dtype=np.uint64)
+                counts[word * 64:word * 64 + len(shifts)] = (
+                    (bits[:, word][:, None] >> shifts[None, :]) & np.uint64(1)
+                ).sum(axis=0)
+        top = np.argsort(-counts, kind='stable')[:MAX_AMENITY_FACETS]
+
+        return {
+            'stars': {str(value): int(count) for value, count in enumerate(stars) if count},
+            'price': {label: int(count) for label, count in zip(labels, buckets)},
+            'amenities': {self.amenity_names[bit]: int(counts[bit]) for bit in top if counts[bit]}
+        }
+
+    def query(self, min_stars: Optional[int] = None, min_price: Optional[float] = None,
+              max_price: Optional[float] = None, min_review: Optional[float] = None,
+              amenities: Iterable[str] = (), sort: str = 'recommended', limit: Optional[int] = None,
+              cursor: Optional[str] = None, include_facets: bool = True) -> Dict:
+        """
+        Filter, sort and page the hotels
+
+        Args:
+            min_stars: Minimum star rating
+            min_price: Minimum nightly rate
+            max_price: Maximum nightly rate
+            min_review: Minimum review score
+            amenities: Amenities every hotel must have (case-insensitive)
+            sort: One of SORTS
+            limit: Page size (None returns every match)
+            cursor: next_cursor of the previous page
+            include_facets: Whether to count facets among the matches
+
+        Returns:
+            Dict with `hotels` (the page), `total` matches, `next_cursor` (None on the
+            last page) and `facets`
+
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+            ValueError: For an unknown sort order
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort '{sort}' (expected one of {', '.join(SORTS)})")
+        mask = self.mask(min_stars, min_price, max_price, min_review, amenities)
+        ordered = self.order(mask, sort)
+
+        start = 0
+        if cursor:
+            position = decode_cursor(cursor)
+            start = position['offset']
+            if position['index'] != self.id and position['last_id'] in self._positions:
+                # The inventory was rebuilt since the previous page: continue after the last hotel shown
+                matches = np.flatnonzero(ordered == self._positions[position['last_id']])
+                if len(matches):
+                    start = int(matches[0]) + 1
+        start = min(max(start, 0), len(ordered))
+        end = len(ordered) if limit is None else min(start + max(limit, 0), len(ordered))
+
+        page = [self.records[position] for position in ordered[start:end]]
+        next_cursor = None
+        if end < len(ordered) and page:
+            next_cursor = encode_cursor(self.id, end, page[-1].get('id'))
+
+        return {
+            'hotels': page,
+            'total': int(len(ordered)),
+            'next_cursor': next_cursor,
+            'facets': self.facets(mask) if include_facets else None
+        }
+
+
+class HotelIndexCache:
+    """
+    Recently built indexes by search key, so paging and re-filtering skip the search
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        """
+        Args:
+            ttl: Seconds an index answers before the search runs again
+            max_entries: Indexes kept at most (least recently used are evicted)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, HotelIndex]' = OrderedDict()
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.builds = 0
+
+    def get_or_build(self, key: str, build: Callable[[], HotelIndex]) -> HotelIndex:
+        """Cached index for the key, building it once even when requested concurrently"""
+        index = self._get(key)
+        if index is not None:
+            return index
+
+        def build_and_store() -> str:
+            index = build()
+            with self._lock:
+                self.builds += 1
+                self._entries[key] = index
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return index.id
+
+        # Followers of the single-flight get a copy of the id only, then share the stored index
+        index_id = self._flight.do(key, build_and_store)
+        with self._lock:
+            index = self._entries.get(key)
+        if index is None or index.id != index_id:
+            return self.get_or_build(key, build)  # Evicted or replaced in between
+        return index
+
+    def _get(self, key: str) -> Optional[HotelIndex]:
+        with self._lock:
+            index = self._entries.get(key)
+            ttl = PARTIAL_TTL if index is not None and (index.coverage or {}).get('partial') else self.ttl
+            if index is None or time.time() - index.created_at > min(ttl, self.ttl):
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return index
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'indexes': len(self._entries),
+                'hotels': sum(len(index) for index in self._entries.values()),
+                'hits': self.hits,
+                'builds': self.builds,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,114 @@
+"""
+Itinerary Patch - Applies the chat assistant's day-level edit operations
+Lets the model describe a change in a few operations instead of re-emitting the whole itinerary
+"""
+
+import copy
+from typing import Dict, List
+from services.llm_schemas import Itinerary, ItineraryDay, validate_output
+
+ACTIVITY_SLOTS = ('morning', 'afternoon', 'evening')
+
+
+class PatchError(ValueError):
+    """Raised when a patch does not apply cleanly to the itinerary"""
+
+
+def _day_cost(day: Dict) -> float:
+    cost = day.get('estimated_cost', 0)
+    return cost if isinstance(cost, (int, float)) and not isinstance(cost, bool) else 0
+
+
+def _new_day(value, day_num: int) -> Dict:
+    """Validate a whole day supplied by an add/replace operation"""
+    if not isinstance(value, dict):
+        raise PatchError(f"Day {day_num} must be an object")
+    day = validate_output(ItineraryDay, {'title': f"Day {day_num}", **value, 'day': day_num})
+    if day is None:
+        raise PatchError(f"Day {day_num} has no activities")
+    return day
+
+
+def apply_patch(itinerary: Dict, operations: List[Dict]) -> Dict:
+    """
+    Apply validated patch operations to a copy of an itinerary
+
+    Day numbers refer to the itinerary as it was before the patch, so removing
+    day 2 and editing day 3 in the same patch both work. Days are renumbered
+    afterwards and total_estimated_cost moves by the change in day costs.
+
+    Args:
+        itinerary: Current itinerary (left unchanged)
+        operations: PatchOperation dicts, e.g.
+                    {"op": "replace", "day": 2, "slot": "afternoon", "value": "..."}
+
+    Returns:
+        The patched itinerary
+
+    Raises:
+        PatchError: If an operation targets a missing day or the result is invalid
+    """
+    result = copy.deepcopy(itinerary or {})
+    days = result.get('itinerary')
+    if not isinstance(days, list) or not days:
+        raise PatchError("There is no itinerary to update")
+
+    by_number = {}
+    for index, day in enumerate(days):
+        try:
+            by_number[int(day.get('day', index + 1))] = day
+        except (TypeError, ValueError):
+            by_number[index + 1] = day
+    cost_before = sum(_day_cost(day) for day in days)
+
+    removed = set()
+    inserted: Dict[int, List[Dict]] = {}
+    for operation in operations:
+        kind, day_num, slot, value = operation['op'], int(operation['day']), operation.get('slot'), operation.get('value')
+
+        if kind == 'add' and slot is None:
+            inserted.setdefault(day_num, []).append(_new_day(value, day_num))
+            continue
+
+        day = by_number.get(day_num)
+        if day is None or day_num in removed:
+            raise PatchError(f"Day {day_num} does not exist")
+
+        if kind == 'set_cost':
+            day['estimated_cost'] = value
+        elif slot is None:
+            if kind == 'remove':
+                removed.add(day_num)
+            else:
+                replacement = _new_day(value, day_num)
+                day.clear()
+                day.update(replacement)
+        elif kind == 'remove':
+            day[slot] = 'Free time' if slot in ACTIVITY_SLOTS else ''
+        elif kind == 'add' and day.get(slot):
+            day[slot] = f"{day[slot]}; {value}"
+        else:
+            day[slot] = value
+
+    patched = []
+    for day_num in sorted(by_number):
+        patched.extend(inserted.pop(day_num, []))
+        if day_num not in removed:
+            patched.append(by_number[day_num])
+    for day_num in sorted(inserted):
+        patched.extend(inserted[day_num])
+    for index, day in enumerate(patched):
+        day['day'] = index + 1
+
+    result['itinerary'] = patched
+    cost_after = sum(_day_cost(day) for day in patched)
+    total = result.get('total_estimated_cost')
+    if isinstance(total, (int, float)) and not isinstance(total, bool):
+        result['total_estimated_cost'] = total + cost_after - cost_before
+    else:
+        result['total_estimated_cost'] = cost_after
+
+    validated = validate_output(Itinerary, result)
+    if validated is None or len(validated['itinerary']) != len(patched):
+        raise PatchError("Patched itinerary is not valid")
+    return validated
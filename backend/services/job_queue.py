@@ -0,0 +1,351 @@
+"""
+Job Queue - Background execution of slow LLM requests
+Requests are queued as jobs with a priority, drained by a pool of worker threads and
+polled or streamed by id, so generations no longer run inside the HTTP request
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Lower runs first: interactive chat ahead of budget tweaks ahead of bulk itinerary generation
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 10
+
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_NORMAL: 'normal', PRIORITY_BULK: 'bulk'}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFullError(Exception):
+    """Raised when a job would not start within the SLO; retry_after is in seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def job_key(kind: str, payload: Any) -> str:
+    """Fingerprint of a job request, used to attach retries to the job already in flight"""
+    encoded = json.dumps([kind, payload], sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+class Job:
+    """
+    One queued request and its outcome
+
+    A job's handler receives an `emit(event, data)` callback for progress
+    events (e.g. itinerary days); they are kept on the job so SSE clients that
+    connect late replay them from the start.
+    """
+
+    def __init__(self, kind: str, handler: Callable, priority: int, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.handler = handler
+        self.priority = priority
+        self.key = key
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: List[Tuple[str, Any]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def emit(self, event: str, data: Any):
+        with self.changed:
+            self.events.append((event, data))
+            self.changed.notify_all()
+
+    def _set_status(self, status: str, result: Any = None, error: Optional[str] = None):
+        with self.changed:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            elif status in FINISHED:
+                self.finished_at = time.time()
+                self.result = result
+                self.error = error
+                self.handler = None  # Drop the request payload held by the closure
+            self.changed.notify_all()
+
+    def wait_for_update(self, seen_events: int, timeout: float) -> bool:
+        """Block until there are more than seen_events events or the job finishes; False on timeout"""
+        with self.changed:
+            return self.changed.wait_for(lambda: len(self.events) > seen_events or self.finished, timeout)
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        data = {
+            'job_id': self.id,
+            'type': self.kind,
+            'status': self.status,
+            'priority': PRIORITY_NAMES.get(self.priority, self.priority),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'wait_ms': round(((self.started_at or time.time()) - self.created_at) * 1000)
+                       if self.status != CANCELLED else None,
+            'run_ms': round(((self.finished_at or time.time()) - self.started_at) * 1000) if self.started_at else None
+        }
+        if include_result and self.finished:
+            data['result'] = self.result
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Priority queue of jobs drained by a fixed pool of worker threads
+
+    Admission control: a job is rejected with QueueFullError when the work
+    queued ahead of it (jobs of equal or higher priority, costed with the
+    running average duration of their type) would not drain within the SLO.
+    Interactive jobs are therefore still admitted while a bulk backlog waits.
+    """
+
+    def __init__(self, workers: int = 4, slo_seconds: float = 120, max_queued: int = 1000,
+                 ttl: float = 3600, default_estimate: float = 30, max_jobs: int = 10000):
+        """
+        Initialize the queue (workers start with the first submitted job)
+
+        Args:
+            workers: Jobs run at once
+            slo_seconds: Longest acceptable queue wait plus run time for a new job
+            max_queued: Hard cap on queued jobs regardless of the estimate
+            ttl: Seconds a finished job's result is kept for polling
+            default_estimate: Assumed job duration in seconds until a type has been timed
+            max_jobs: Jobs (queued, running and finished) remembered at most
+        """
+        self.workers = workers
+        self.slo_seconds = slo_seconds
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.default_estimate = default_estimate
+        self.max_jobs = max_jobs
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._heap: List[Tuple[int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._inflight_keys: Dict[str, Job] = {}
+        self._threads: List[threading.Thread] = []
+        self._running_jobs: Dict[str, Job] = {}
+        self._queued = 0
+
+        # Exponentially weighted average run time per job type, in seconds
+        self._durations: Dict[str, float] = {}
+        self._wait_ms = [0.0, 0]
+
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def submit(self, kind: str, handler: Callable[[Callable], Any], priority: int = PRIORITY_NORMAL,
+               key: Optional[str] = None) -> Job:
+        """
+        Queue a job
+
+        Args:
+            kind: Job type, e.g. 'itinerary' (duration estimates are kept per type)
+            handler: Called as handler(emit) on a worker thread; its return value is the result
+            priority: PRIORITY_INTERACTIVE, PRIORITY_NORMAL or PRIORITY_BULK
+            key: Request fingerprint; a submit matching an unfinished job returns that job
+
+        Returns:
+            The new job, or the unfinished job with the same key
+
+        Raises:
+            QueueFullError: If the backlog ahead of the job would not drain within the SLO
+        """
+        with self._lock:
+            existing = self._inflight_keys.get(key) if key else None
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+
+            if self._queued >= self.max_queued:
+                self.rejected += 1
+                raise QueueFullError(f"Job queue is full ({self._queued} queued)",
+                                     retry_after=self._retry_after(self._queued_work(priority) + self._estimate(kind)))
+
+            # An idle queue always admits, even a job type that alone runs longer than the SLO
+            wait = self._queued_work(priority)
+            expected = wait + self._estimate(kind)
+            if wait > 0 and expected > self.slo_seconds:
+                self.rejected += 1
+                raise QueueFullError(
+                    f"Job would take about {expected:.0f}s to finish (SLO {self.slo_seconds:.0f}s)",
+                    retry_after=self._retry_after(expected)
+                )
+
+            job = Job(kind, handler, priority, key)
+            self._prune()
+            self._jobs[job.id] = job
+            if key:
+                self._inflight_keys[key] = job
+            heapq.heappush(self._heap, (priority, next(self._sequence), job))
+            self._queued += 1
+            self.submitted += 1
+            self._ensure_workers()
+            self._available.notify()
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started; running jobs cannot be interrupted"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            # The heap entry is skipped when a worker pops it
+            self._queued -= 1
+            self.cancelled += 1
+            self._release_key(job)
+            job._set_status(CANCELLED)
+        return True
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and timing counters, suitable for JSON responses"""
+        with self._lock:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, job in self._heap:
+                if job.status == QUEUED:
+                    name = PRIORITY_NAMES.get(priority, str(priority))
+                    depth[name] = depth.get(name, 0) + 1
+            total_wait, waits = self._wait_ms
+            return {
+                'workers': self.workers,
+                'running': len(self._running_jobs),
+                'queued': self._queued,
+                'depth': depth,
+                'submitted': self.submitted,
+                'deduplicated': self.deduplicated,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'avg_wait_ms': round(total_wait / waits, 1) if waits else None,
+                'avg_run_seconds': {kind: round(seconds, 2) for kind, seconds in self._durations.items()},
+                'estimated_drain_seconds': round(self._queued_work(PRIORITY_BULK), 1),
+                'slo_seconds': self.slo_seconds
+            }
+
+    def _estimate(self, kind: str) -> float:
+        return self._durations.get(kind, self.default_estimate)
+
+    def _queued_work(self, priority: int) -> float:
+        """
+        Seconds until a new job of this priority starts
+
+        The estimated work of the queued jobs ahead of it plus what is left of
+        the running ones, spread over the workers.
+        """
+        ahead = [job for job_priority, _, job in self._heap if job_priority <= priority and job.status == QUEUED]
+        if not ahead and len(self._running_jobs) < self.workers:
+            return 0.0
+        now = time.time()
+        work = sum(self._estimate(job.kind) for job in ahead)
+        work += sum(max(self._estimate(job.kind) - (now - job.started_at), 0) for job in self._running_jobs.values())
+        return work / max(self.workers, 1)
+
+    def _retry_after(self, expected: float) -> int:
+        return max(1, math.ceil(expected - self.slo_seconds))
+
+    def _release_key(self, job: Job):
+        if job.key and self._inflight_keys.get(job.key) is job:
+            del self._inflight_keys[job.key]
+
+    def _prune(self):
+        """Forget finished jobs past their TTL, then the oldest finished ones beyond max_jobs"""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and now - job.finished_at > self.ttl]:
+            del self._jobs[job_id]
+        if len(self._jobs) >= self.max_jobs:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished]:
+                del self._jobs[job_id]
+                if len(self._jobs) < self.max_jobs:
+                    break
+
+    def _ensure_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'job-worker-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self) -> Job:
+        with self._lock:
+            while True:
+                while not self._heap:
+                    self._available.wait()
+                _, _, job = heapq.heappop(self._heap)
+                if job.status != QUEUED:
+                    continue  # Cancelled while queued
+                self._queued -= 1
+                self._running_jobs[job.id] = job
+                self._wait_ms[0] += (time.time() - job.created_at) * 1000
+                self._wait_ms[1] += 1
+                job._set_status(RUNNING)
+                return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            try:
+                result = job.handler(job.emit)
+                status, error = SUCCEEDED, None
+            except Exception as e:
+                print(f"❌ Job {job.id} ({job.kind}) failed: {e}")
+                result, status, error = None, FAILED, str(e)
+
+            with self._lock:
+                seconds = time.time() - job.started_at
+                previous = self._durations.get(job.kind)
+                self._durations[job.kind] = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+                del self._running_jobs[job.id]
+                if status == SUCCEEDED:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._release_key(job)
+            job._set_status(status, result, error)
+
+
+def job_queue_from_env() -> JobQueue:
+    """Build a job queue from LLM_JOB_* environment variables"""
+    return JobQueue(
+        workers=int(os.getenv('LLM_JOB_WORKERS', 4)),
+        slo_seconds=float(os.getenv('LLM_JOB_SLO_SECONDS', 120)),
+        max_queued=int(os.getenv('LLM_JOB_MAX_QUEUED', 1000)),
+        ttl=float(os.getenv('LLM_JOB_TTL', 3600)),
+        default_estimate=float(os.getenv('LLM_JOB_DEFAULT_ESTIMATE', 30))
+    )
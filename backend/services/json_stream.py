@@ -0,0 +1,324 @@
+"""
+Incremental JSON Parser - Extracts JSON from LLM output in a single pass
+Emits values from a token stream as soon as they close and repairs common LLM artifacts
+(surrounding prose or code fences, trailing commas, stray braces, truncated tails)
+"""
+
+import json
+import re
+from bisect import bisect_left
+from typing import Any, List, Optional, Tuple
+
+STRUCTURAL = re.compile(r'[{}\[\]",:]')
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a single JSON document embedded in free text
+
+    Text before the document is ignored. Every value whose path from the
+    root is at most `max_depth` long is decoded and reported the moment its
+    closing character arrives, e.g. with max_depth=2 the object
+    {"itinerary": [{...}, {...}], "overview": "..."} yields
+    (('itinerary', 0), {...}), (('itinerary', 1), {...}),
+    (('itinerary',), [...]), (('overview',), '...') and finally ((), {...}).
+
+    Trailing commas are dropped while scanning. If a candidate root does not
+    decode (e.g. a stray '{' in the prose), scanning resumes after it. When
+    the stream ends early, finish() closes the document at the last
+    complete value.
+    """
+
+    def __init__(self, max_depth: int = 2, expect: str = '{['):
+        """
+        Initialize the parser
+
+        Args:
+            max_depth: Deepest path reported as an event
+            expect: Characters allowed to open the root ('{', '[' or both)
+        """
+        self.max_depth = max_depth
+        self.expect = expect
+        self.buffer = ''
+        self.done = False
+        self.root = None
+        self.truncated = False
+        self._pos = 0
+        self._reset()
+
+    def _reset(self):
+        self._stack: List[dict] = []
+        self._closers = ''
+        self._root_start: Optional[int] = None
+        self._string_start: Optional[int] = None
+        self._string_is_key = False
+        self._string_escaped = False
+        self._escape = False
+        self._scalar_start: Optional[int] = None
+        self._last_significant: Optional[int] = None
+        self._dead_commas: List[int] = []
+        self._safe_end: Optional[int] = None
+        self._safe_closers = ''
+        self._restart_at: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, Any]]:
+        """
+        Consume a chunk of text
+
+        Args:
+            chunk: Next piece of the streamed response
+
+        Returns:
+            List of (path, value) pairs completed by this chunk
+        """
+        events: List[Tuple[Tuple, Any]] = []
+        if self.done or not chunk:
+            return events
+
+        self.buffer += chunk
+        self._scan(events)
+        return events
+
+    def finish(self) -> Any:
+        """
+        Signal the end of the stream
+
+        Returns:
+            The root value, repaired from the last complete value if the
+            document was cut off, or None if nothing could be recovered
+        """
+        if self.done:
+            return self.root
+
+        if self._scalar_start is not None and self._string_start is None:
+            # A number or literal at the very end of the stream counts if it decodes
+            try:
+                json.loads(self.buffer[self._scalar_start:])
+                self._note_value_end(len(self.buffer))
+            except ValueError:
+                pass
+
+        if self._root_start is not None and self._safe_end is not None:
+            text = self._slice(self._root_start, self._safe_end) + self._safe_closers[::-1]
+            try:
+                self.root = json.loads(text)
+                self.truncated = True
+            except ValueError:
+                # The candidate root may have been a stray brace in the prose
+                retry = IncrementalJSONParser(max_depth=0, expect=self.expect)
+                retry.feed(self.buffer[self._root_start + 1:])
+                self.root = retry.finish()
+                self.truncated = retry.truncated
+
+        self.done = True
+        return self.root
+
+    @property
+    def path(self) -> Tuple:
+        """Path of the container currently being filled"""
+        return tuple(
+            frame['key'] if frame['type'] == 'object' else frame['index']
+            for frame in self._stack
+        )
+
+    def _scan(self, events: list):
+        buf = self.buffer
+        i = self._pos
+        end = len(buf)
+
+        while i < end and not self.done:
+            if self._string_start is not None:
+                i = self._scan_string(buf, i, events)
+                continue
+
+            if self._root_start is None:
+                openers = [index for index in (buf.find(c, i) for c in self.expect) if index != -1]
+                if not openers:
+                    i = end
+                    break
+                i = self._root_start = min(openers)
+
+            # Everything between structural characters is whitespace or part of a scalar
+            match = STRUCTURAL.search(buf, i)
+            j = match.start() if match else end
+            if j > i:
+                segment = buf[i:j]
+                stripped = segment.rstrip()
+                if stripped.strip():
+                    if self._scalar_start is None:
+                        self._scalar_start = i + len(segment) - len(segment.lstrip())
+                    self._last_significant = i + len(stripped) - 1
+            if match is None:
+                i = end
+                break
+
+            if self._scalar_start is not None:
+                scalar_end = self._last_significant + 1
+                self._complete(self._scalar_start, scalar_end, events)
+                self._scalar_start = None
+                self._note_value_end(scalar_end)
+
+            c = buf[j]
+            if c in '{[':
+                self._stack.append({
+                    'type': 'object' if c == '{' else 'array',
+                    'start': j,
+                    'key': None,
+                    'index': 0,
+                    'expect_key': c == '{'
+                })
+                self._closers += '}' if c == '{' else ']'
+                self._safe_end = j + 1
+                self._safe_closers = self._closers
+            elif c in '}]':
+                if not self._stack:
+                    self.done = True
+                    break
+                if self._last_significant is not None and buf[self._last_significant] == ',':
+                    self._dead_commas.append(self._last_significant)
+                frame = self._stack.pop()
+                self._closers = self._closers[:-1]
+                self._complete(frame['start'], j + 1, events)
+                if self._restart_at is not None:
+                    i = self._restart()
+                    continue
+                self._note_value_end(j + 1)
+            elif c == '"':
+                top = self._stack[-1] if self._stack else None
+                self._string_start = j
+                self._string_is_key = bool(top and top['type'] == 'object' and top['expect_key'])
+                self._string_escaped = False
+                self._escape = False
+            elif c == ':':
+                if self._stack:
+                    self._stack[-1]['expect_key'] = False
+            elif c == ',':
+                if self._stack:
+                    top = self._stack[-1]
+                    if top['type'] == 'object':
+                        top['expect_key'] = True
+                    else:
+                        top['index'] += 1
+
+            self._last_significant = j
+            i = j + 1
+
+        self._pos = i
+
+    def _scan_string(self, buf: str, i: int, events: list) -> int:
+        """Advance through a string literal, returning the next scan position"""
+        end = len(buf)
+        while i < end:
+            if self._escape:
+                self._escape = False
+                i += 1
+                continue
+            if i == self._string_start:
+                i += 1
+                continue
+
+            # Jump straight to the next character that can end or escape the string
+            quote = buf.find('"', i)
+            backslash = buf.find('\\', i, end if quote == -1 else quote)
+            if quote == -1 and backslash == -1:
+                return end
+            if backslash != -1:
+                self._escape = True
+                self._string_escaped = True
+                i = backslash + 1
+                continue
+
+            start = self._string_start
+            self._string_start = None
+            self._last_significant = quote
+            if self._string_is_key:
+                key = buf[start + 1:quote]
+                if self._string_escaped:
+                    try:
+                        key = json.loads(buf[start:quote + 1])
+                    except ValueError:
+                        pass
+                self._stack[-1]['key'] = key
+            else:
+                self._complete(start, quote + 1, events)
+                self._note_value_end(quote + 1)
+            return quote + 1
+        return end
+
+    def _note_value_end(self, end: int):
+        """Remember the last position where the document could be cleanly closed"""
+        if self._stack:
+            self._safe_end = end
+            self._safe_closers = self._closers
+
+    def _slice(self, start: int, end: int) -> str:
+        """buffer[start:end] without the trailing commas found while scanning"""
+        commas = self._dead_commas
+        first = bisect_left(commas, start)
+        if first == len(commas) or commas[first] >= end:
+            return self.buffer[start:end]
+
+        parts = []
+        cursor = start
+        for index in commas[first:]:
+            if index >= end:
+                break
+            parts.append(self.buffer[cursor:index])
+            cursor = index + 1
+        parts.append(self.buffer[cursor:end])
+        return ''.join(parts)
+
+    def _complete(self, start: int, end: int, events: list):
+        """Record a finished value spanning buffer[start:end]"""
+        if len(self._stack) > self.max_depth:
+            return
+
+        try:
+            value = json.loads(self._slice(start, end))
+        except ValueError:
+            # A malformed fragment is skipped; a malformed root means it was not the document
+            if not self._stack:
+                self._restart_at = start + 1
+            return
+
+        if not self._stack:
+            self.root = value
+            self.done = True
+        events.append((self.path, value))
+
+    def _restart(self) -> int:
+        """Discard a false root and resume scanning just after its opening character"""
+        position = self._restart_at
+        self._reset()
+        return position
+
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str, expect: str = '{[') -> Any:
+    """
+    Extract the first JSON document from LLM output
+
+    Args:
+        text: Raw model output
+        expect: Characters allowed to open the document
+
+    Returns:
+        The decoded (and if necessary repaired) value, or None
+    """
+    if not text:
+        return None
+
+    # Fast path: a well-formed document after the first opener decodes in one C-level pass
+    openers = [index for index in (text.find(c) for c in expect) if index != -1]
+    if not openers:
+        return None
+    try:
+        return _decoder.raw_decode(text, min(openers))[0]
+    except ValueError:
+        pass
+
+    parser = IncrementalJSONParser(max_depth=0, expect=expect)
+    parser.feed(text)
+    return parser.finish()
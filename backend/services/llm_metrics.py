@@ -0,0 +1,247 @@
+"""
+LLM Metrics - Token and latency histograms for every Ollama generation
+Exposed in the Prometheus text format so Ollama hosts can be capacity-planned
+and prompt changes that slow generation down show up as regressions
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SUCCESS = 'success'
+PARSE_FAILURE = 'parse_failure'
+FALLBACK = 'fallback'
+CANCELLED = 'cancelled'
+
+LABEL_NAMES = ('endpoint', 'model', 'outcome')
+
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+SHORT_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LONG_SECONDS_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+RATE_BUCKETS = (1, 2.5, 5, 10, 20, 40, 80, 160)
+
+# LLM request being served by the current thread or asyncio task (copied into
+# coroutines submitted to the Ollama client loop, so parallel calls are attributed too)
+_current_request: contextvars.ContextVar[Optional['LLMRequest']] = contextvars.ContextVar(
+    'llm_request', default=None
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """
+    Thread-safe Prometheus histogram with a fixed set of label names
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 label_names: Sequence[str] = LABEL_NAMES):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Exposition lines: cumulative buckets, _sum and _count per label set"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels in sorted(series):
+            counts, total, count = series[labels]
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{_format_number(bound)}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {_format_number(round(total, 6))}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class LLMRequest:
+    """
+    One service-level LLM request (e.g. an itinerary) and the generations it made
+
+    Generation samples are held until the request's outcome is known, then
+    observed with it; samples arriving after that are observed straight away.
+    """
+
+    def __init__(self, metrics: 'LLMMetrics', endpoint: str, model: str):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.model = model
+        self.outcome = SUCCESS
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._samples: List[Dict[str, float]] = []
+        self._closed = False
+
+    def add_sample(self, sample: Dict[str, float]):
+        with self._lock:
+            if not self._closed:
+                self._samples.append(sample)
+                return
+        self.metrics.observe_generation((self.endpoint, self.model, self.outcome), sample)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            samples, self._samples = self._samples, []
+        labels = (self.endpoint, self.model, self.outcome)
+        for sample in samples:
+            self.metrics.observe_generation(labels, sample)
+        self.metrics.request_duration.observe(labels, time.perf_counter() - self.started)
+
+
+class _Tracking:
+    """Context manager returned by LLMMetrics.track"""
+
+    def __init__(self, request: LLMRequest):
+        self.request = request
+        self._token = None
+
+    def __enter__(self) -> LLMRequest:
+        self._token = _current_request.set(self.request)
+        return self.request
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            _current_request.reset(self._token)
+        except ValueError:
+            pass  # A generator closed from another context; nothing left to restore
+        if exc_type is not None:
+            # Exceptions make the service serve its fallback answer
+            self.request.outcome = FALLBACK if issubclass(exc_type, Exception) else CANCELLED
+        self.request.close()
+        return False
+
+
+class LLMMetrics:
+    """
+    Per-generation and per-request histograms labelled by endpoint, model and outcome
+    """
+
+    def __init__(self):
+        self.prompt_tokens = Histogram(
+            'llm_prompt_tokens', 'Prompt tokens evaluated per generation', TOKEN_BUCKETS)
+        self.generated_tokens = Histogram(
+            'llm_generated_tokens', 'Tokens generated per generation', TOKEN_BUCKETS)
+        self.prompt_eval_seconds = Histogram(
+            'llm_prompt_eval_seconds', 'Prompt evaluation time per generation', SHORT_SECONDS_BUCKETS)
+        self.time_to_first_token = Histogram(
+            'llm_time_to_first_token_seconds',
+            'Time until the first generated token (measured when streaming, model load plus prompt evaluation otherwise)',
+            SHORT_SECONDS_BUCKETS)
+        self.tokens_per_second = Histogram(
+            'llm_tokens_per_second', 'Generation speed per generation', RATE_BUCKETS)
+        self.generation_duration = Histogram(
+            'llm_generation_duration_seconds', 'Total duration of one Ollama generation', LONG_SECONDS_BUCKETS)
+        self.request_duration = Histogram(
+            'llm_request_duration_seconds',
+            'Wall-clock time of a service request including all of its generations', LONG_SECONDS_BUCKETS)
+
+        self._generation_histograms = {
+            'prompt_tokens': self.prompt_tokens,
+            'generated_tokens': self.generated_tokens,
+            'prompt_eval_seconds': self.prompt_eval_seconds,
+            'time_to_first_token': self.time_to_first_token,
+            'tokens_per_second': self.tokens_per_second,
+            'duration': self.generation_duration
+        }
+
+    def track(self, endpoint: str, model: str) -> _Tracking:
+        """
+        Attribute the generations made inside the block to one service request
+
+        Usage:
+            with metrics.track('activities', model) as request:
+                ...
+                if result is None:
+                    request.outcome = PARSE_FAILURE
+        """
+        return _Tracking(LLMRequest(self, endpoint, model))
+
+    def record_outcome(self, endpoint: str, model: str, outcome: str):
+        """Count a request that made no generation (e.g. a fallback while Ollama is unavailable)"""
+        self.request_duration.observe((endpoint, model, outcome), 0.0)
+
+    def observe_generation(self, labels: Tuple[str, str, str], sample: Dict[str, float]):
+        for field, value in sample.items():
+            self._generation_histograms[field].observe(labels, value)
+
+    def render(self) -> str:
+        """All histograms in the Prometheus text exposition format"""
+        lines = []
+        for histogram in list(self._generation_histograms.values()) + [self.request_duration]:
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+def generation_sample(response: Dict, wall_seconds: float,
+                      first_token_seconds: Optional[float] = None) -> Dict[str, float]:
+    """
+    Metrics of one Ollama generation from its final response
+
+    Ollama reports durations in nanoseconds; fields it leaves out (e.g.
+    prompt_eval_count when the whole prompt was cached) are skipped.
+    """
+    sample = {'duration': response.get('total_duration', 0) / 1e9 or wall_seconds}
+    if response.get('prompt_eval_count') is not None:
+        sample['prompt_tokens'] = response['prompt_eval_count']
+    if response.get('eval_count') is not None:
+        sample['generated_tokens'] = response['eval_count']
+    if response.get('prompt_eval_duration'):
+        sample['prompt_eval_seconds'] = response['prompt_eval_duration'] / 1e9
+    if response.get('eval_count') and response.get('eval_duration'):
+        sample['tokens_per_second'] = response['eval_count'] / (response['eval_duration'] / 1e9)
+    if first_token_seconds is not None:
+        sample['time_to_first_token'] = first_token_seconds
+    elif response.get('prompt_eval_duration') is not None:
+        sample['time_to_first_token'] = (response.get('load_duration', 0) + response['prompt_eval_duration']) / 1e9
+    return sample
+
+
+def record_generation(response: Dict, wall_seconds: float, first_token_seconds: Optional[float] = None):
+    """Record a finished generation against the current request (or as 'other' outside one)"""
+    sample = generation_sample(response, wall_seconds, first_token_seconds)
+    request = _current_request.get()
+    if request is not None:
+        request.add_sample(sample)
+    else:
+        get_llm_metrics().observe_generation(('other', response.get('model', ''), SUCCESS), sample)
+
+
+_default_metrics: Optional[LLMMetrics] = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_llm_metrics() -> LLMMetrics:
+    """Process-wide LLM metrics shared by the Ollama client and every LLMService instance"""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = LLMMetrics()
+        return _default_metrics
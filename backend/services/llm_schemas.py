@@ -0,0 +1,232 @@
+"""
+LLM Output Schemas - Typed models for validating and normalizing model responses
+Every LLM response is extracted with the incremental JSON parser and checked against these models
+"""
+
+import re
+from typing import Annotated, Any, Dict, List, Optional, Type, Union
+from pydantic import BaseModel, BeforeValidator, ConfigDict, ValidationError, model_validator
+from services.json_stream import extract_json
+
+NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def _to_number(value: Any) -> Any:
+    """Accept '$1,500', '150 USD' or '1500.0' where a number is expected"""
+    if isinstance(value, str):
+        match = NUMBER_PATTERN.search(value.replace(',', ''))
+        if match is None:
+            return value
+        number = float(match.group())
+        return int(number) if number.is_integer() else number
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _to_text(value: Any) -> Any:
+    """Flatten lists and non-string scalars the model sometimes emits for text fields"""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _to_text_list(value: Any) -> Any:
+    """Accept a single string or a list of mixed items where a list of strings is expected"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        items = []
+        for item in value:
+            if isinstance(item, dict):
+                item = ': '.join(str(v) for v in item.values())
+            items.append(item if isinstance(item, str) else str(item))
+        return items
+    return value
+
+
+def _to_bool(value: Any) -> Any:
+    """Map 'yes'/'indoor'/'outdoor' style answers onto booleans"""
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('true', 'yes', 'indoor', 'indoors'):
+            return True
+        if lowered in ('false', 'no', 'outdoor', 'outdoors'):
+            return False
+        return None
+    return value
+
+
+Number = Annotated[Union[int, float], BeforeValidator(_to_number)]
+Text = Annotated[str, BeforeValidator(_to_text)]
+TextList = Annotated[List[str], BeforeValidator(_to_text_list)]
+Flag = Annotated[Optional[bool], BeforeValidator(_to_bool)]
+
+
+class LLMModel(BaseModel):
+    """Base model: keep any extra fields the model adds"""
+    model_config = ConfigDict(extra='allow')
+
+
+class ItineraryDay(LLMModel):
+    day: Number
+    title: Text
+    morning: Text = ''
+    afternoon: Text = ''
+    evening: Text = ''
+    estimated_cost: Number = 0
+    tips: Text = ''
+
+    @model_validator(mode='after')
+    def has_activities(self):
+        if not (self.morning or self.afternoon or self.evening):
+            raise ValueError('day has no activities')
+        return self
+
+
+class Itinerary(LLMModel):
+    itinerary: List[Dict]
+    overview: Text = ''
+    total_estimated_cost: Optional[Number] = None
+    packing_suggestions: TextList = []
+    cultural_tips: TextList = []
+
+    @model_validator(mode='after')
+    def validate_days(self):
+        # Keep the valid days (a truncated tail leaves a partial last day)
+        self.itinerary = validate_items(ItineraryDay, self.itinerary)
+        if not self.itinerary:
+            raise ValueError('itinerary has no valid days')
+        if self.total_estimated_cost is None:
+            self.total_estimated_cost = sum(day.get('estimated_cost', 0) for day in self.itinerary)
+        return self
+
+
+class OutlineDay(LLMModel):
+    day: Number
+    title: Text
+    focus: Text = ''
+
+
+class ItineraryOutline(LLMModel):
+    days: List[Dict]
+    overview: Text = ''
+    packing_suggestions: TextList = []
+    cultural_tips: TextList = []
+
+    @model_validator(mode='after')
+    def validate_days(self):
+        self.days = validate_items(OutlineDay, self.days)
+        if not self.days:
+            raise ValueError('outline has no valid days')
+        return self
+
+
+class PatchOperation(LLMModel):
+    """One day-level edit from the chat assistant (see services/itinerary_patch.py)"""
+    op: Text
+    day: Number
+    slot: Optional[Text] = None
+    value: Any = None
+
+    @model_validator(mode='after')
+    def check_operation(self):
+        self.op = self.op.strip().lower()
+        self.slot = self.slot.strip().lower() if self.slot else None
+        if self.op not in ('replace', 'add', 'remove', 'set_cost'):
+            raise ValueError(f'unknown patch operation {self.op}')
+        if self.slot is not None and self.slot not in ('title', 'morning', 'afternoon', 'evening', 'tips'):
+            raise ValueError(f'unknown itinerary slot {self.slot}')
+        if self.op == 'set_cost':
+            self.value = _to_number(self.value)
+            if not isinstance(self.value, (int, float)) or isinstance(self.value, bool):
+                raise ValueError('set_cost needs a numeric value')
+            self.slot = None
+        elif self.op != 'remove' and self.slot is not None:
+            self.value = _to_text(self.value)
+            if not isinstance(self.value, str) or not self.value.strip():
+                raise ValueError('slot edits need a text value')
+        return self
+
+
+class Activity(LLMModel):
+    name: Text
+    description: Text = ''
+    duration: Text = ''
+    cost_estimate: Text = ''
+    best_time: Text = ''
+    indoor: Flag = None
+
+
+class CulturalInsights(LLMModel):
+    customs: TextList = []
+    etiquette: TextList = []
+    basic_phrases: Dict[str, Text] = {}
+    tipping_guide: Text = ''
+    safety_tips: TextList = []
+    local_insights: TextList = []
+
+    @model_validator(mode='after')
+    def has_content(self):
+        if not (self.customs or self.etiquette or self.basic_phrases or self.tipping_guide
+                or self.safety_tips or self.local_insights):
+            raise ValueError('no cultural insights')
+        return self
+
+
+class BudgetOptimizationItem(LLMModel):
+    category: Text = ''
+    current_cost: Optional[Number] = None
+    suggested_cost: Optional[Number] = None
+    suggestions: TextList = []
+
+
+class BudgetOptimization(LLMModel):
+    optimizations: List[BudgetOptimizationItem] = []
+    estimated_savings: Optional[Number] = None
+    revised_total: Optional[Number] = None
+
+    @model_validator(mode='after')
+    def has_content(self):
+        if not self.optimizations and self.revised_total is None:
+            raise ValueError('no budget optimizations')
+        return self
+
+
+def validate_output(model: Type[BaseModel], value: Any) -> Optional[Dict]:
+    """
+    Validate one decoded value against a model
+
+    Returns:
+        Normalized dict, or None if the value does not match
+    """
+    if not isinstance(value, dict):
+        return None
+    try:
+        return model.model_validate(value).model_dump()
+    except ValidationError:
+        return None
+
+
+def validate_items(model: Type[BaseModel], values: Any) -> List[Dict]:
+    """Validate each item of a list, dropping the ones that do not match"""
+    if not isinstance(values, list):
+        return []
+    items = (validate_output(model, value) for value in values)
+    return [item for item in items if item is not None]
+
+
+def parse_llm_object(text: str, model: Type[BaseModel]) -> Optional[Dict]:
+    """Extract and validate a JSON object from raw model output"""
+    return validate_output(model, extract_json(text, expect='{'))
+
+
+def parse_llm_list(text: str, model: Type[BaseModel]) -> List[Dict]:
+    """Extract a JSON array from raw model output, keeping the items that validate"""
+    return validate_items(model, extract_json(text, expect='['))
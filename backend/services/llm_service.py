@@ -4,51 +4,33 @@ Handles AI-powered itinerary generation and recommendations
 """
 
 import os
-from typing import Dict, List, Optional
+from concurrent.futures import TimeoutError as FutureTimeoutError, as_completed
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple
 import ollama
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_community.llms import Ollama
+from services.ollama_client import create_ollama_llm
+from services.cache_service import (
+    ResponseCache, get_response_cache, make_cache_key, template_version,
+    normalize_text, normalize_list, bucket
+)
+from services.conversation_store import (
+    ConversationState, conversation_store_from_env, estimate_tokens, fit_to_budget, prefix_key
+)
+from services.itinerary_patch import PatchError, apply_patch
+from services.json_stream import IncrementalJSONParser
+from services.llm_metrics import FALLBACK, PARSE_FAILURE, get_llm_metrics
+from services.activity_ranker import rank_activities
+from services.llm_schemas import (
+    Activity, BudgetOptimization, CulturalInsights, Itinerary, ItineraryDay, ItineraryOutline, PatchOperation,
+    parse_llm_list, parse_llm_object, validate_output
+)
+from services.semantic_cache import preference_scope, semantic_cache_from_env
+from services.singleflight import SingleFlight
 
-class LLMService:
-    """
-    Service class for interacting with Llama3:8b via Ollama
-    """
-    
-    def __init__(self):
-        """Initialize LLM service with Ollama configuration"""
-        self.base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
-        self.model = os.getenv('OLLAMA_MODEL', 'llama3:8b')
-        
-        # Initialize LangChain Ollama wrapper
-        try:
-            self.llm = Ollama(
-                base_url=self.base_url,
-                model=self.model,
-                temperature=0.7,
-                timeout=90  # 90 second timeout for LLM
-            )
-            print(f"✅ LLM Service initialized with model: {self.model}")
-        except Exception as e:
-            print(f"⚠️ Warning: Could not initialize Ollama: {e}")
-            print(f"Will use fallback responses")
-            self.llm = None
-    
-    def generate_itinerary(self, trip_data: Dict) -> Dict:
-        """
-        Generate personalized itinerary based on user preferences
-        
-        Args:
-            trip_data: Dictionary containing destination, dates, preferences, budget, etc.
-        
-        Returns:
-            Dictionary with generated itinerary including activities, timing, and recommendations
-        """
-        
-        # Create prompt template for itinerary generation
-        itinerary_template = PromptTemplate(
-            input_variables=["destination", "duration", "budget", "interests", "travel_style"],
-            template="""
+# Prompt templates (the cache keys include a fingerprint of each template)
+
+ITINERARY_TEMPLATE = """
             You are an expert travel planner. Create a detailed day-by-day itinerary for a trip with the following details:
             
             Destination: {destination}
@@ -78,84 +60,433 @@ class LLMService:
             
             Make it specific, practical, and tailored to the user's interests.
             """
-        )
+
+# Long trips are planned as a short outline, then every day is written concurrently
+ITINERARY_OUTLINE_TEMPLATE = """
+            You are an expert travel planner. Outline a {duration}-day trip with the following details:
+            
+            Destination: {destination}
+            Budget: ${budget}
+            Interests: {interests}
+            Travel Style: {travel_style}
+            
+            Give each day a short title and focus only, not the detailed activities.
+            Provide a structured JSON response with exactly {duration} entries in "days":
+            {{
+                "days": [
+                    {{
+                        "day": 1,
+                        "title": "Day title",
+                        "focus": "Area or theme of the day"
+                    }}
+                ],
+                "overview": "Brief trip overview",
+                "packing_suggestions": ["item1", "item2"],
+                "cultural_tips": ["tip1", "tip2"]
+            }}
+            """
+
+ITINERARY_DAY_TEMPLATE = """
+            You are an expert travel planner. Plan day {day} of a {duration}-day trip to {destination}.
+            
+            Day title: {title}
+            Focus: {focus}
+            Daily budget: ${daily_budget}
+            Interests: {interests}
+            Travel Style: {travel_style}
+            
+            The rest of the trip (do not repeat these days):
+            {other_days}
+            
+            Provide a structured JSON response with the following format:
+            {{
+                "day": {day},
+                "title": "{title}",
+                "morning": "Activity description with timing",
+                "afternoon": "Activity description with timing",
+                "evening": "Activity description with timing",
+                "estimated_cost": 150,
+                "tips": "Helpful tips for the day"
+            }}
+            
+            Make it specific, practical, and tailored to the user's interests.
+            """
+
+ACTIVITIES_TEMPLATE = """
+            Recommend 12-15 activities in {location} for someone interested in {preferences}.
+            Include both indoor and outdoor options, spread over morning, afternoon and evening.
+            
+            Provide response as JSON array:
+            [
+                {{
+                    "name": "Activity name",
+                    "description": "Brief description",
+                    "duration": "2-3 hours",
+                    "cost_estimate": "$$",
+                    "best_time": "Morning/Afternoon/Evening",
+                    "indoor": true/false
+                }}
+            ]
+            
+            Make recommendations specific and practical.
+            """
+
+CULTURAL_INSIGHTS_TEMPLATE = """
+            Provide cultural insights and practical travel tips for {destination}.
+            
+            Return as JSON:
+            {{
+                "customs": ["custom1", "custom2"],
+                "etiquette": ["etiquette1", "etiquette2"],
+                "basic_phrases": {{"hello": "translation", "thank_you": "translation"}},
+                "tipping_guide": "Tipping expectations",
+                "safety_tips": ["tip1", "tip2"],
+                "local_insights": ["insight1", "insight2"]
+            }}
+            """
+
+CHAT_TEMPLATE = """
+            You are a helpful AI travel assistant for a trip to {destination}.
+            
+            Current Itinerary Summary:
+            {itinerary}
+            
+            Previous conversation:
+            {history}
+            
+            User's question: {message}
+            
+            Provide a helpful, conversational response. If the user wants to modify the itinerary (add, remove, or change activities), respond with:
+            1. A friendly acknowledgment and explanation
+            2. Only the changes, as a JSON array of operations in this EXACT format at the end:
+            
+            ITINERARY_PATCH:
+            [
+                {{"op": "replace", "day": 2, "slot": "afternoon", "value": "New activity description"}},
+                {{"op": "add", "day": 2, "slot": "morning", "value": "Extra activity"}},
+                {{"op": "remove", "day": 3, "slot": "evening"}},
+                {{"op": "set_cost", "day": 2, "value": 180}}
+            ]
+            
+            Slots are title, morning, afternoon, evening and tips. To add, replace or remove a whole day use
+            {{"op": "add", "day": 4, "value": {{"title": "Day title", "morning": "...", "afternoon": "...", "evening": "...", "estimated_cost": 150}}}}
+            or {{"op": "remove", "day": 4}}. Never repeat the parts of the itinerary that do not change.
+            
+            If no itinerary modification is needed, just provide a helpful conversational response.
+            Be specific, friendly, and knowledgeable about travel.
+            """
+
+# Sent together with the Ollama context of the previous reply, so the instructions,
+# itinerary and earlier turns are not evaluated again
+CHAT_FOLLOWUP_TEMPLATE = """
+            User's next question: {message}
+            
+            Answer following the same instructions as before. Only include ITINERARY_PATCH: with the JSON operations if the itinerary must change.
+            """
+
+CHAT_SUMMARY_TEMPLATE = """
+            Update the running summary of a conversation between a traveller and their travel assistant.
+            Keep every decision, preference and requested change, and stay under {max_words} words.
+            
+            Current summary:
+            {summary}
+            
+            New messages:
+            {transcript}
+            
+            Reply with the updated summary only.
+            """
+
+BUDGET_TEMPLATE = """
+            Optimize this travel itinerary to fit a budget of ${budget}:
+            {current_itinerary}
+            
+            Provide budget optimization suggestions as JSON:
+            {{
+                "optimizations": [
+                    {{
+                        "category": "accommodation/food/transport/activities",
+                        "current_cost": 500,
+                        "suggested_cost": 350,
+                        "suggestions": ["suggestion1", "suggestion2"]
+                    }}
+                ],
+                "estimated_savings": 300,
+                "revised_total": 1700
+            }}
+            """
+
+# Prompts are compiled once per process and shared by every chain
+ITINERARY_PROMPT = PromptTemplate(
+    input_variables=["destination", "duration", "budget", "interests", "travel_style"],
+    template=ITINERARY_TEMPLATE
+)
+
+ITINERARY_OUTLINE_PROMPT = PromptTemplate(
+    input_variables=["destination", "duration", "budget", "interests", "travel_style"],
+    template=ITINERARY_OUTLINE_TEMPLATE
+)
+
+ITINERARY_DAY_PROMPT = PromptTemplate(
+    input_variables=["destination", "duration", "day", "title", "focus", "daily_budget",
+                     "interests", "travel_style", "other_days"],
+    template=ITINERARY_DAY_TEMPLATE
+)
+
+ACTIVITIES_PROMPT = PromptTemplate(
+    input_variables=["location", "preferences"],
+    template=ACTIVITIES_TEMPLATE
+)
+
+CULTURAL_INSIGHTS_PROMPT = PromptTemplate(
+    input_variables=["destination"],
+    template=CULTURAL_INSIGHTS_TEMPLATE
+)
+
+CHAT_PROMPT = PromptTemplate(
+    input_variables=["message", "destination", "itinerary", "history"],
+    template=CHAT_TEMPLATE
+)
+
+CHAT_FOLLOWUP_PROMPT = PromptTemplate(
+    input_variables=["message"],
+    template=CHAT_FOLLOWUP_TEMPLATE
+)
+
+CHAT_SUMMARY_PROMPT = PromptTemplate(
+    input_variables=["summary", "transcript", "max_words"],
+    template=CHAT_SUMMARY_TEMPLATE
+)
+
+BUDGET_PROMPT = PromptTemplate(
+    input_variables=["current_itinerary", "budget"],
+    template=BUDGET_TEMPLATE
+)
+
+# Activities returned per recommendation request (the cached pool holds 12-15)
+ACTIVITY_RECOMMENDATIONS = 7
+
+
+class LLMService:
+    """
+    Service class for interacting with Llama3:8b via Ollama
+    """
+    
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        """
+        Initialize LLM service with Ollama configuration
+        
+        Args:
+            cache: Response cache to use (defaults to the process-wide cache)
+        """
+        self.base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434')
+        # OLLAMA_BASE_URLS (comma-separated) spreads generations over several Ollama servers
+        self.base_urls = [
+            url.strip() for url in os.getenv('OLLAMA_BASE_URLS', self.base_url).split(',') if url.strip()
+        ]
+        self.model = os.getenv('OLLAMA_MODEL', 'llama3:8b')
+        self.cache = cache if cache is not None else get_response_cache()
+        self.budget_bucket = float(os.getenv('LLM_CACHE_BUDGET_BUCKET', 250))
         
-        # Create chain
-        chain = LLMChain(llm=self.llm, prompt=itinerary_template)
+        # Token and latency histograms of every generation, served at /api/metrics
+        self.metrics = get_llm_metrics()
         
-        # Prepare inputs
-        inputs = {
-            "destination": trip_data.get("destination", ""),
-            "duration": trip_data.get("duration", 5),
-            "budget": trip_data.get("budget", 2000),
-            "interests": ", ".join(trip_data.get("interests", [])),
-            "travel_style": trip_data.get("travel_style", "balanced")
+        # Identical concurrent requests share one generation
+        self.inflight = SingleFlight(wait_timeout=float(os.getenv('LLM_COALESCE_TIMEOUT', 300)))
+        
+        # Per-conversation chat state (rolling summary and reusable Ollama context)
+        self.conversations = conversation_store_from_env()
+        
+        # Trips at least this long are generated outline-first with days in parallel (0 disables)
+        self.parallel_min_days = int(os.getenv('ITINERARY_PARALLEL_MIN_DAYS', 8))
+        
+        # Initialize the shared Ollama client and build every chain once
+        try:
+            self.llm = create_ollama_llm(
+                base_urls=self.base_urls,
+                model=self.model,
+                timeout=90  # 90 second timeout for LLM
+            )
+            self.itinerary_chain = LLMChain(llm=self.llm, prompt=ITINERARY_PROMPT)
+            self.itinerary_outline_chain = LLMChain(llm=self.llm, prompt=ITINERARY_OUTLINE_PROMPT)
+            self.itinerary_day_chain = LLMChain(llm=self.llm, prompt=ITINERARY_DAY_PROMPT)
+            self.activities_chain = LLMChain(llm=self.llm, prompt=ACTIVITIES_PROMPT)
+            self.cultural_insights_chain = LLMChain(llm=self.llm, prompt=CULTURAL_INSIGHTS_PROMPT)
+            self.chat_chain = LLMChain(llm=self.llm, prompt=CHAT_PROMPT)
+            self.chat_summary_chain = LLMChain(llm=self.llm, prompt=CHAT_SUMMARY_PROMPT)
+            self.budget_chain = LLMChain(llm=self.llm, prompt=BUDGET_PROMPT)
+            print(f"✅ LLM Service initialized with model: {self.model}")
+        except Exception as e:
+            print(f"⚠️ Warning: Could not initialize Ollama: {e}")
+            print(f"Will use fallback responses")
+            self.llm = None
+        
+        # Similar (not just identical) activity and cultural insight requests share answers
+        self.semantic_cache = semantic_cache_from_env(self.llm.client if self.llm is not None else None)
+    
+    def warm_up(self) -> bool:
+        """
+        Load the model into Ollama's memory before the first user request
+        
+        Returns:
+            True if the model responded, False otherwise
+        """
+        if self.llm is None:
+            return False
+        
+        try:
+            print(f"🔥 Warming up model: {self.model}")
+            loaded = self.llm.warm_up()
+            print(f"✅ Model {self.model} is loaded on {loaded}/{len(self.base_urls)} backends (keep-alive: {self.llm.keep_alive})")
+            return True
+        except Exception as e:
+            print(f"⚠️ Model warm-up failed: {e}")
+            return False
+    
+    def stats(self) -> Dict:
+        """Model availability and Ollama client counters"""
+        return {
+            'model': self.model,
+            'available': self.llm is not None,
+            'client': self.llm.client.stats() if self.llm is not None else None,
+            'coalescing': self.inflight.stats(),
+            'conversations': self.conversations.stats(),
+            'semantic_cache': self.semantic_cache.stats()
         }
+    
+    def generate_itinerary(self, trip_data: Dict, fallback: bool = True) -> Dict:
+        """
+        Generate personalized itinerary based on user preferences
+        
+        Args:
+            trip_data: Dictionary containing destination, dates, preferences, budget, etc.
+            fallback: Return a basic template itinerary when generation fails (False raises instead)
+        
+        Returns:
+            Dictionary with generated itinerary including activities, timing, and recommendations
+        """
+        
+        # Prepare inputs
+        inputs = self._itinerary_inputs(trip_data)
         
         # Generate itinerary
         try:
             # Check if LLM is available
             if self.llm is None:
+                if not fallback:
+                    raise RuntimeError("LLM not available")
                 print("⚠️ LLM not available, using fallback itinerary")
+                self.metrics.record_outcome('itinerary', self.model, FALLBACK)
                 return self._generate_fallback_itinerary(trip_data)
             
-            print(f"🤖 Generating itinerary with AI for {inputs['destination']}...")
-            result = chain.run(**inputs)
-            print(f"✅ AI itinerary generated successfully")
-            return self._parse_llm_response(result, trip_data)
+            def generate():
+                if self._use_parallel(trip_data):
+                    print(f"🤖 Generating {inputs['duration']}-day itinerary in parallel for {inputs['destination']}...")
+                    return self._drain(self._parallel_itinerary(inputs, trip_data))
+                
+                print(f"🤖 Generating itinerary with AI for {inputs['destination']}...")
+                result = self.itinerary_chain.run(**inputs)
+                print(f"✅ AI itinerary generated successfully")
+                return self._parse_llm_response(result)
+            
+            itinerary = self._cached('itinerary', self._itinerary_cache_key(trip_data), generate)
+            if itinerary is None:
+                if not fallback:
+                    raise RuntimeError("Itinerary generation returned no usable result")
+                return self._generate_fallback_itinerary(trip_data)
+            
+            return itinerary
         except Exception as e:
+            if not fallback:
+                raise
             print(f"⚠️ Error generating itinerary: {str(e)}")
             print(f"📋 Using fallback itinerary instead")
             return self._generate_fallback_itinerary(trip_data)
     
-    def get_activity_recommendations(self, location: str, preferences: List[str], weather: Optional[str] = None) -> List[Dict]:
+    def stream_itinerary(self, trip_data: Dict) -> Iterator[Tuple[str, Any]]:
+        """
+        Generate an itinerary, yielding each part as soon as the model finishes it
+        
+        Args:
+            trip_data: Same trip dictionary accepted by generate_itinerary
+        
+        Yields:
+            (event, data) pairs: ('day', day_dict) for each itinerary day, then one
+            pair per remaining top-level field (overview, packing_suggestions, ...),
+            and finally ('itinerary', full_itinerary). Long trips generated in
+            parallel send the outline fields first and days in completion order.
+        """
+        
+        if self.llm is None:
+            print("⚠️ LLM not available, using fallback itinerary")
+            self.metrics.record_outcome('itinerary', self.model, FALLBACK)
+            yield from self._replay_itinerary(self._generate_fallback_itinerary(trip_data))
+            return
+        
+        inputs = self._itinerary_inputs(trip_data)
+        cache_key = self._itinerary_cache_key(trip_data)
+        cached = self.cache.get('itinerary', cache_key)
+        if cached is not None:
+            print(f"⚡ Serving cached itinerary for {inputs['destination']}")
+            yield from self._replay_itinerary(cached)
+            return
+        
+        # Generations made while streaming are attributed to this request in /api/metrics
+        # (closed before the final event, which consumers may stop reading after)
+        parallel = self._use_parallel(trip_data)
+        with self.metrics.track('itinerary', self.model) as request:
+            if parallel:
+                print(f"🤖 Streaming {inputs['duration']}-day itinerary in parallel for {inputs['destination']}...")
+                try:
+                    itinerary = yield from self._parallel_itinerary(inputs, trip_data)
+                except Exception as e:
+                    print(f"⚠️ Error generating itinerary outline: {str(e)}")
+                    itinerary = None
+                    request.outcome = FALLBACK
+            else:
+                itinerary = yield from self._stream_single_itinerary(inputs)
+            if itinerary is None and request.outcome != FALLBACK:
+                request.outcome = PARSE_FAILURE
+        
+        if itinerary is None:
+            print(f"📋 Using fallback itinerary instead")
+            yield 'itinerary', self._generate_fallback_itinerary(trip_data)
+            return
+        
+        print(f"✅ AI itinerary streamed successfully")
+        self.cache.set('itinerary', cache_key, itinerary)
+        if parallel:
+            yield 'total_estimated_cost', itinerary['total_estimated_cost']
+        yield 'itinerary', itinerary
+    
+    def get_activity_recommendations(self, location: str, preferences: List[str], weather: Optional[str] = None,
+                                     time_of_day: Optional[str] = None,
+                                     limit: Optional[int] = ACTIVITY_RECOMMENDATIONS) -> List[Dict]:
         """
         Get activity recommendations based on location, preferences, and weather
         
+        One weather-agnostic pool is generated and cached per location and
+        preferences; the weather and time of day only re-rank it locally.
+        
         Args:
             location: Current or target location
             preferences: List of user interests
             weather: Current weather condition (optional)
+            time_of_day: 'morning', 'afternoon' or 'evening' (optional)
+            limit: Activities to return at most (None for the whole pool)
         
         Returns:
-            List of recommended activities
+            List of recommended activities, best fitting first
         """
         
-        weather_context = f" considering the weather is {weather}" if weather else ""
-        
-        prompt = PromptTemplate(
-            input_variables=["location", "preferences", "weather_context"],
-            template="""
-            Recommend 5-7 activities in {location} for someone interested in {preferences}{weather_context}.
-            
-            Provide response as JSON array:
-            [
-                {{
-                    "name": "Activity name",
-                    "description": "Brief description",
-                    "duration": "2-3 hours",
-                    "cost_estimate": "$$",
-                    "best_time": "Morning/Afternoon/Evening",
-                    "indoor": true/false
-                }}
-            ]
-            
-            Make recommendations specific and practical.
-            """
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        cache_key, generate, semantic = self._activities_request(location, preferences)
         
         try:
-            result = chain.run(
-                location=location,
-                preferences=", ".join(preferences),
-                weather_context=weather_context
-            )
-            return self._parse_activities_response(result)
+            pool = self._cached('activities', cache_key, generate, semantic=semantic)
         except Exception as e:
             print(f"Error getting recommendations: {str(e)}")
             return []
+        return rank_activities(pool, weather=weather, time=time_of_day, limit=limit)
     
     def generate_cultural_insights(self, destination: str) -> Dict:
         """
@@ -168,136 +499,195 @@ class LLMService:
             Dictionary with cultural tips, customs, and local information
         """
         
-        prompt = PromptTemplate(
-            input_variables=["destination"],
-            template="""
-            Provide cultural insights and practical travel tips for {destination}.
-            
-            Return as JSON:
-            {{
-                "customs": ["custom1", "custom2"],
-                "etiquette": ["etiquette1", "etiquette2"],
-                "basic_phrases": {{"hello": "translation", "thank_you": "translation"}},
-                "tipping_guide": "Tipping expectations",
-                "safety_tips": ["tip1", "tip2"],
-                "local_insights": ["insight1", "insight2"]
-            }}
-            """
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        cache_key, generate, semantic = self._cultural_insights_request(destination)
         
         try:
-            result = chain.run(destination=destination)
-            return self._parse_cultural_response(result)
+            return self._cached('cultural_insights', cache_key, generate, semantic=semantic)
         except Exception as e:
             print(f"Error generating cultural insights: {str(e)}")
             return {}
     
-    def chat_with_assistant(self, message: str, trip_context: Dict, current_itinerary: Dict, conversation_history: List[Dict]) -> Dict:
+    def prewarm(self, endpoint: str, inputs: Dict, refresh: bool = False) -> str:
+        """
+        Make sure a response is in the cache, generating it if needed (used by prewarm_cache.py)
+        
+        Args:
+            endpoint: 'activities' or 'cultural_insights'
+            inputs: Keyword arguments of get_activity_recommendations or generate_cultural_insights
+            refresh: Regenerate even if a cached response exists (restarts its TTL)
+        
+        Returns:
+            'cached' if the response was already cached, 'generated' if it was stored,
+            'failed' if the model returned nothing usable
+        """
+        builders = {
+            'activities': self._activities_request,
+            'cultural_insights': self._cultural_insights_request
+        }
+        if endpoint not in builders:
+            raise ValueError(f"Cannot prewarm {endpoint} responses")
+        if self.llm is None:
+            raise RuntimeError("Ollama is not available")
+        
+        cache_key, generate, semantic = builders[endpoint](**inputs)
+        if not refresh and self.cache.get(endpoint, cache_key) is not None:
+            return 'cached'
+        
+        # Generate directly: a refresh must not be answered by the semantic cache
+        result = self.inflight.do(cache_key, lambda: self._tracked(endpoint, generate))
+        if not result:
+            return 'failed'
+        self.cache.set(endpoint, cache_key, result)
+        self._semantic_add(endpoint, *semantic, result)
+        return 'generated'
+    
+    def chat_with_assistant(self, message: str, trip_context: Dict, current_itinerary: Dict, conversation_history: List[Dict],
+                            conversation_id: Optional[str] = None) -> Dict:
         """
         Chat with AI assistant about the trip
         
+        A continuing conversation (same conversation_id and unchanged itinerary)
+        sends only the new message along with the Ollama context of the previous
+        reply. Otherwise the full prompt is built from a rolling summary of older
+        turns plus the most recent ones.
+        
         Args:
             message: User's message
             trip_context: Context about the trip (destination, dates, etc.)
             current_itinerary: Current itinerary state
-            conversation_history: Previous conversation messages
+            conversation_history: Previous conversation messages (used when the server has no state yet)
+            conversation_id: Id returned by the previous reply (optional)
         
         Returns:
-            Dictionary with response and optional itinerary updates
+            Dictionary with response, optional itinerary updates and the conversation_id
         """
         
-        # Build conversation context
-        history_text = "\n".join([
-            f"{msg.get('role', 'user')}: {msg.get('content', '')}"
-            for msg in conversation_history[-5:]  # Last 5 messages
-        ])
-        
-        prompt = PromptTemplate(
-            input_variables=["message", "destination", "itinerary", "history"],
-            template="""
-            You are a helpful AI travel assistant for a trip to {destination}.
-            
-            Current Itinerary Summary:
-            {itinerary}
-            
-            Previous conversation:
-            {history}
-            
-            User's question: {message}
-            
-            Provide a helpful, conversational response. If the user wants to modify the itinerary (add, remove, or change activities), respond with:
-            1. A friendly acknowledgment and explanation
-            2. A JSON object with the updated itinerary in this EXACT format at the end:
-            
-            ITINERARY_UPDATE:
-            {{
-                "itinerary": [
-                    {{
-                        "day": 1,
-                        "title": "Day title",
-                        "morning": "Activity description",
-                        "afternoon": "Activity description",
-                        "evening": "Activity description",
-                        "estimated_cost": 150,
-                        "tips": "Tips"
-                    }}
-                ],
-                "overview": "Trip overview",
-                "total_estimated_cost": 1500,
-                "packing_suggestions": ["item1", "item2"],
-                "cultural_tips": ["tip1", "tip2"]
-            }}
-            
-            If no itinerary modification is needed, just provide a helpful conversational response.
-            Be specific, friendly, and knowledgeable about travel.
-            """
-        )
+        state = self.conversations.get_or_create(conversation_id, conversation_history)
         
         try:
             if self.llm is None:
-                return self._generate_fallback_chat_response(message, trip_context, current_itinerary)
+                self.metrics.record_outcome('chat', self.model, FALLBACK)
+                return self._generate_fallback_chat_response(message, trip_context, current_itinerary, state.conversation_id)
             
-            chain = LLMChain(llm=self.llm, prompt=prompt)
+            destination = trip_context.get('destination', 'your destination')
             
             # Prepare itinerary summary
             itinerary_summary = self._summarize_itinerary(current_itinerary)
+            key = prefix_key(destination, itinerary_summary)
             
-            result = chain.run(
-                message=message,
-                destination=trip_context.get('destination', 'your destination'),
-                itinerary=itinerary_summary,
-                history=history_text
-            )
-            
-            # Check if response contains itinerary update
-            itinerary_update = None
-            response_text = result
+            with state.lock:
+                reused = self.conversations.can_reuse_context(state, key)
+                if reused:
+                    prompt = CHAT_FOLLOWUP_PROMPT.format(message=message)
+                    context = state.context
+                else:
+                    prompt = CHAT_PROMPT.format(
+                        message=message,
+                        destination=destination,
+                        itinerary=itinerary_summary,
+                        history=state.history_text()
+                    )
+                    context = None
+                backend = state.backend
             
-            if "ITINERARY_UPDATE:" in result:
-                parts = result.split("ITINERARY_UPDATE:")
-                response_text = parts[0].strip()
+            with self.metrics.track('chat', self.model) as request:
+                reply = self.llm.generate_raw(prompt, context=context, prefer=backend)
+                result = reply['response']
+                self.conversations.record_turn(reused, reply.get('prompt_eval_duration'))
                 
-                # Parse JSON update
-                import json
-                try:
-                    json_str = parts[1].strip()
-                    start_idx = json_str.find('{')
-                    end_idx = json_str.rfind('}') + 1
-                    if start_idx != -1 and end_idx > start_idx:
-                        itinerary_update = json.loads(json_str[start_idx:end_idx])
-                except Exception as e:
-                    print(f"Error parsing itinerary update: {e}")
+                # Check if response contains itinerary update
+                response_text, itinerary_update = self._parse_chat_update(result, current_itinerary)
+                if itinerary_update is None and ("ITINERARY_PATCH:" in result or "ITINERARY_UPDATE:" in result):
+                    request.outcome = PARSE_FAILURE
+            
+            with state.lock:
+                state.add_turn('user', message)
+                state.add_turn('assistant', response_text)
+                state.context = reply.get('context')
+                state.prefix_key = key
+                state.backend = reply.get('backend')
+            self._schedule_summary(state)
             
             return {
                 'response': response_text,
-                'itinerary_update': itinerary_update
+                'itinerary_update': itinerary_update,
+                'conversation_id': state.conversation_id
             }
             
         except Exception as e:
             print(f"Error in chat assistant: {str(e)}")
-            return self._generate_fallback_chat_response(message, trip_context, current_itinerary)
+            state.reset_context()
+            return self._generate_fallback_chat_response(message, trip_context, current_itinerary, state.conversation_id)
+    
+    def _parse_chat_update(self, result: str, current_itinerary: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        Split a chat reply into its text and optional itinerary update
+        
+        Returns:
+            (response_text, itinerary_update) where itinerary_update is None or
+            {'patch': operations or None, 'itinerary': merged_itinerary}
+        """
+        if "ITINERARY_PATCH:" in result:
+            response_text, patch_text = result.split("ITINERARY_PATCH:", 1)
+            operations = parse_llm_list(patch_text, PatchOperation)
+            if not operations:
+                print("Error parsing itinerary patch: no valid operations found")
+                return response_text.strip(), None
+            try:
+                merged = apply_patch(current_itinerary, operations)
+            except PatchError as e:
+                print(f"Error applying itinerary patch: {str(e)}")
+                return response_text.strip(), None
+            print(f"✏️ Applied {len(operations)} itinerary patch operations")
+            return response_text.strip(), {'patch': operations, 'itinerary': merged}
+        
+        if "ITINERARY_UPDATE:" in result:
+            # The model sometimes still sends the whole itinerary
+            response_text, update_text = result.split("ITINERARY_UPDATE:", 1)
+            itinerary = parse_llm_object(update_text, Itinerary)
+            if itinerary is None:
+                print("Error parsing itinerary update: no valid itinerary found")
+                return response_text.strip(), None
+            return response_text.strip(), {'patch': None, 'itinerary': itinerary}
+        
+        return result, None
+    
+    def _schedule_summary(self, state: ConversationState):
+        """Fold turns older than the recent window into the conversation summary in the background"""
+        with state.lock:
+            folded = self.conversations.turns_to_fold(state)
+            if not folded or state.summarizing:
+                return
+            state.summarizing = True
+            previous = state.summary
+        
+        budget = self.conversations.summary_tokens
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in folded)
+        
+        async def summarize():
+            with self.metrics.track('chat_summary', self.model):
+                return await self.chat_summary_chain.arun(
+                    summary=previous or "(none yet)",
+                    transcript=transcript,
+                    max_words=int(budget * 0.75)
+                )
+        
+        future = self.llm.client.submit(summarize())
+        
+        def apply(done):
+            with state.lock:
+                state.summarizing = False
+                try:
+                    summary = done.result().strip()
+                except BaseException as e:
+                    print(f"⚠️ Could not summarize conversation: {e}")
+                    return
+                state.summary = fit_to_budget(summary, budget)
+                del state.turns[:len(folded)]
+            self.conversations.record_summary()
+            print(f"📝 Conversation summary updated (~{estimate_tokens(state.summary)} tokens)")
+        
+        future.add_done_callback(apply)
     
     def _summarize_itinerary(self, itinerary: Dict) -> str:
         """Create a brief summary of the itinerary for context"""
@@ -315,7 +705,8 @@ class LLMService:
         
         return "\n".join(summary_lines)
     
-    def _generate_fallback_chat_response(self, message: str, trip_context: Dict, current_itinerary: Dict) -> Dict:
+    def _generate_fallback_chat_response(self, message: str, trip_context: Dict, current_itinerary: Dict,
+                                         conversation_id: Optional[str] = None) -> Dict:
         """Generate fallback response when LLM is unavailable"""
         message_lower = message.lower()
         destination = trip_context.get('destination', 'your destination')
@@ -341,7 +732,8 @@ class LLMService:
         
         return {
             'response': response,
-            'itinerary_update': None
+            'itinerary_update': None,
+            'conversation_id': conversation_id
         }
     
     def optimize_budget(self, itinerary: Dict, target_budget: float) -> Dict:
@@ -356,98 +748,341 @@ class LLMService:
             Optimized itinerary with budget suggestions
         """
         
-        prompt = PromptTemplate(
-            input_variables=["current_itinerary", "budget"],
-            template="""
-            Optimize this travel itinerary to fit a budget of ${budget}:
-            {current_itinerary}
-            
-            Provide budget optimization suggestions as JSON:
-            {{
-                "optimizations": [
-                    {{
-                        "category": "accommodation/food/transport/activities",
-                        "current_cost": 500,
-                        "suggested_cost": 350,
-                        "suggestions": ["suggestion1", "suggestion2"]
-                    }}
-                ],
-                "estimated_savings": 300,
-                "revised_total": 1700
-            }}
-            """
-        )
-        
-        chain = LLMChain(llm=self.llm, prompt=prompt)
+        cache_key = self._cache_key('budget', BUDGET_TEMPLATE, {
+            "itinerary": itinerary,
+            "budget": bucket(target_budget, self.budget_bucket)
+        })
         
         try:
-            result = chain.run(
-                current_itinerary=str(itinerary),
-                budget=target_budget
-            )
-            return self._parse_budget_response(result)
+            return self._cached('budget', cache_key, lambda: self._parse_budget_response(
+                self.budget_chain.run(
+                    current_itinerary=str(itinerary),
+                    budget=target_budget
+                )
+            ))
         except Exception as e:
             print(f"Error optimizing budget: {str(e)}")
             return {}
     
-    # Helper methods for parsing LLM responses
+    # Helper methods for itinerary generation
+    
+    def _itinerary_inputs(self, trip_data: Dict) -> Dict:
+        """Prompt inputs for the itinerary template"""
+        return {
+            "destination": trip_data.get("destination", ""),
+            "duration": trip_data.get("duration", 5),
+            "budget": trip_data.get("budget", 2000),
+            "interests": ", ".join(trip_data.get("interests", [])),
+            "travel_style": trip_data.get("travel_style", "balanced")
+        }
+    
+    def _itinerary_cache_key(self, trip_data: Dict) -> str:
+        """Cache key for an itinerary request"""
+        template = ITINERARY_TEMPLATE
+        if self._use_parallel(trip_data):
+            template = ITINERARY_OUTLINE_TEMPLATE + ITINERARY_DAY_TEMPLATE
+        return self._cache_key('itinerary', template, {
+            "destination": normalize_text(trip_data.get("destination", "")),
+            "duration": int(trip_data.get("duration", 5)),
+            "budget": bucket(trip_data.get("budget", 2000), self.budget_bucket),
+            "interests": normalize_list(trip_data.get("interests", [])),
+            "travel_style": normalize_text(trip_data.get("travel_style", "balanced"))
+        })
     
-    def _parse_llm_response(self, response: str, original_data: Dict) -> Dict:
-        """Parse and structure LLM response into itinerary format"""
-        import json
+    def _replay_itinerary(self, itinerary: Dict) -> Iterator[Tuple[str, Any]]:
+        """Yield a finished itinerary in the same event order stream_itinerary uses"""
+        for day in itinerary.get('itinerary', []):
+            yield 'day', day
+        for field, value in itinerary.items():
+            if field != 'itinerary':
+                yield field, value
+        yield 'itinerary', itinerary
+    
+    def _stream_single_itinerary(self, inputs: Dict) -> Generator[Tuple[str, Any], None, Optional[Dict]]:
+        """
+        Stream one itinerary generation, yielding days and top-level fields as they complete
+        
+        Returns:
+            The validated itinerary, or None if nothing usable was generated
+        """
+        parser = IncrementalJSONParser(max_depth=2, expect='{')
+        
         try:
-            # Try to extract JSON from response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-        except:
-            pass
+            print(f"🤖 Streaming itinerary with AI for {inputs['destination']}...")
+            for chunk in self.llm.stream(ITINERARY_PROMPT.format(**inputs)):
+                for path, value in parser.feed(chunk):
+                    if len(path) == 2 and path[0] == 'itinerary':
+                        day = validate_output(ItineraryDay, value)
+                        if day is not None:
+                            yield 'day', day
+                    elif len(path) == 1 and path[0] != 'itinerary':
+                        yield path[0], value
+                if parser.done:
+                    break
+        except Exception as e:
+            print(f"⚠️ Error streaming itinerary: {str(e)}")
         
-        return self._generate_fallback_itinerary(original_data)
+        # finish() repairs a truncated tail so the days already streamed are not thrown away
+        return validate_output(Itinerary, parser.finish())
     
-    def _parse_activities_response(self, response: str) -> List[Dict]:
-        """Parse activities recommendations response"""
-        import json
+    # Helper methods for parallel (outline-first) itinerary generation
+    
+    def _trip_numbers(self, trip_data: Dict) -> Optional[Tuple[int, float]]:
+        """(duration, budget) as numbers, or None if either is malformed"""
         try:
-            start_idx = response.find('[')
-            end_idx = response.rfind(']') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-        except:
-            pass
+            duration = int(trip_data.get("duration", 5))
+            budget = float(trip_data.get("budget", 2000))
+        except (TypeError, ValueError):
+            return None
+        return (duration, budget) if duration > 0 and budget >= 0 else None
+    
+    def _use_parallel(self, trip_data: Dict) -> bool:
+        """Whether a trip is long enough, and its numbers valid, to generate its days in parallel"""
+        numbers = self._trip_numbers(trip_data)
+        return numbers is not None and self.parallel_min_days > 0 and numbers[0] >= self.parallel_min_days
+    
+    def _parallel_itinerary(self, inputs: Dict, trip_data: Dict) -> Generator[Tuple[str, Any], None, Optional[Dict]]:
+        """
+        Generate an itinerary from a short outline call plus one concurrent call per day
+        
+        Every day is submitted to the Ollama client loop at once, so the client's
+        concurrency limit decides how many run side by side and the wall-clock time
+        is roughly the outline plus the slowest day.
+        
+        Yields:
+            The outline's overview, packing_suggestions and cultural_tips, then
+            ('day', day_dict) for each day as it finishes
+        
+        Returns:
+            The merged itinerary with a recomputed total_estimated_cost, or None if
+            the outline was unusable or no day could be generated
+        """
+        duration, budget = self._trip_numbers(trip_data)  # Validated by _use_parallel
+        outline = self._parse_outline_response(self.itinerary_outline_chain.run(**inputs))
+        if outline is None:
+            print("⚠️ Could not parse itinerary outline")
+            return None
+        
+        for field in ('overview', 'packing_suggestions', 'cultural_tips'):
+            yield field, outline[field]
         
-        return []
+        plan = self._outline_days(outline, duration, inputs['destination'])
+        daily_budget = int(budget / duration)
+        
+        client = self.llm.client
+        futures = {}
+        for day_num, (title, focus) in plan.items():
+            other_days = "\n".join(
+                f"Day {other}: {other_title}"
+                for other, (other_title, _) in plan.items() if other != day_num
+            )
+            coro = self.itinerary_day_chain.arun(
+                destination=inputs['destination'],
+                duration=duration,
+                day=day_num,
+                title=title,
+                focus=focus or title,
+                daily_budget=daily_budget,
+                interests=inputs['interests'],
+                travel_style=inputs['travel_style'],
+                other_days=other_days
+            )
+            futures[client.submit(coro)] = day_num
+        
+        # Template days stand in for failed ones; built only once a day actually fails
+        fallback_days: List[Dict] = []
+        
+        def fallback_day(day_num: int, title: str) -> Dict:
+            if not fallback_days:
+                trip = dict(trip_data, duration=duration, budget=budget)
+                fallback_days.extend(self._generate_fallback_itinerary(trip)['itinerary'])
+            return dict(fallback_days[day_num - 1], title=title)
+        
+        days: Dict[int, Dict] = {}
+        generated = 0
+        try:
+            for future in as_completed(futures, timeout=client.wait_timeout):
+                day_num = futures[future]
+                day = None
+                try:
+                    day = self._parse_day_response(future.result(), day_num, plan[day_num][0])
+                except Exception as e:
+                    print(f"⚠️ Error generating day {day_num}: {str(e)}")
+                if day is None:
+                    day = fallback_day(day_num, plan[day_num][0])
+                else:
+                    generated += 1
+                days[day_num] = day
+                yield 'day', day
+        except FutureTimeoutError:
+            print(f"⚠️ {len(plan) - len(days)} itinerary days did not finish in time")
+        finally:
+            # Stop generating days nobody is waiting for any more
+            for future in futures:
+                future.cancel()
+        
+        if generated == 0:
+            return None
+        
+        for day_num, (title, _) in plan.items():
+            if day_num not in days:
+                days[day_num] = fallback_day(day_num, title)
+                yield 'day', days[day_num]
+        
+        itinerary_days = [days[day_num] for day_num in sorted(days)]
+        print(f"✅ AI itinerary generated in parallel ({generated}/{len(plan)} days)")
+        return validate_output(Itinerary, {
+            "itinerary": itinerary_days,
+            "overview": outline['overview'],
+            "total_estimated_cost": sum(day.get('estimated_cost', 0) for day in itinerary_days),
+            "packing_suggestions": outline['packing_suggestions'],
+            "cultural_tips": outline['cultural_tips']
+        })
+    
+    def _outline_days(self, outline: Dict, duration: int, destination: str) -> Dict[int, Tuple[str, str]]:
+        """Map day numbers 1..duration to (title, focus), padding a short outline"""
+        plan = {}
+        for index in range(duration):
+            day_num = index + 1
+            if index < len(outline['days']):
+                entry = outline['days'][index]
+                plan[day_num] = (entry['title'], entry['focus'])
+            else:
+                plan[day_num] = (f"Day {day_num}: Discovering {destination}", '')
+        return plan
+    
+    @staticmethod
+    def _drain(events: Generator):
+        """Run an event generator to completion and return its return value"""
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+    
+    # Helper methods for response caching
+    
+    def _cache_key(self, endpoint: str, template: str, inputs: Dict) -> str:
+        """Build the cache key for a generation from its normalized prompt inputs"""
+        return make_cache_key(endpoint, self.model, template_version(template), inputs)
+    
+    def _activities_request(self, location: str, preferences: List[str]) -> Tuple[str, Callable, Tuple[Dict, str]]:
+        """Cache key, generator and semantic cache fields of an activity pool (weather is applied after)"""
+        cache_key = self._cache_key('activities', ACTIVITIES_TEMPLATE, {
+            "location": normalize_text(location),
+            "preferences": normalize_list(preferences)
+        })
+        
+        generate = lambda: self._parse_activities_response(
+            self.activities_chain.run(
+                location=location,
+                preferences=", ".join(preferences)
+            )
+        )
+        
+        # Only the location is matched by similarity; preferences (budget level included) must match exactly
+        semantic = ({'location': location}, preference_scope(preferences))
+        return cache_key, generate, semantic
+    
+    def _cultural_insights_request(self, destination: str) -> Tuple[str, Callable, Tuple[Dict, str]]:
+        """Cache key, generator and semantic cache fields of a cultural insights request"""
+        cache_key = self._cache_key('cultural_insights', CULTURAL_INSIGHTS_TEMPLATE, {
+            "destination": normalize_text(destination)
+        })
+        generate = lambda: self._parse_cultural_response(self.cultural_insights_chain.run(destination=destination))
+        return cache_key, generate, ({'destination': destination}, '')
+    
+    def _cached(self, endpoint: str, cache_key: str, generate: Callable,
+                semantic: Optional[Tuple[Dict, str]] = None):
+        """
+        Return a cached response or generate, cache and return a fresh one
+        
+        Concurrent misses for the same key are coalesced into a single
+        generation. Empty results (parse failures) are returned but never cached.
+        
+        Args:
+            semantic: (request fields, scope) to also look up and store the
+                      answer in the semantic cache, which matches similar requests
+        """
+        cached = self.cache.get(endpoint, cache_key)
+        if cached is not None:
+            print(f"⚡ Serving cached {endpoint} response")
+            return cached
+        
+        if semantic is not None:
+            similar = self._semantic_lookup(endpoint, *semantic)
+            if similar is not None:
+                # Promote to the exact-key cache so the next identical request skips embedding
+                self.cache.set(endpoint, cache_key, similar)
+                return similar
+        
+        def generate_and_store():
+            result = self._tracked(endpoint, generate)
+            if result:
+                self.cache.set(endpoint, cache_key, result)
+                if semantic is not None:
+                    self._semantic_add(endpoint, *semantic, result)
+            return result
+        
+        return self.inflight.do(cache_key, generate_and_store)
+    
+    def _tracked(self, endpoint: str, generate: Callable):
+        """Run a generation, recording its LLM calls in the metrics under endpoint with the parse outcome"""
+        with self.metrics.track(endpoint, self.model) as request:
+            result = generate()
+            if not result:
+                request.outcome = PARSE_FAILURE
+            return result
+    
+    def _semantic_lookup(self, endpoint: str, fields: Dict, scope: str):
+        """Cached answer of a similar request, or None"""
+        try:
+            found = self.semantic_cache.lookup(endpoint, fields, scope)
+        except Exception as e:
+            print(f"⚠️ Semantic cache lookup failed: {e}")
+            return None
+        if found is None:
+            return None
+        value, similarity = found
+        print(f"⚡ Serving semantically cached {endpoint} response (similarity {similarity:.2f})")
+        return value
+    
+    def _semantic_add(self, endpoint: str, fields: Dict, scope: str, value):
+        try:
+            self.semantic_cache.add(endpoint, fields, value, scope)
+        except Exception as e:
+            print(f"⚠️ Could not add to semantic cache: {e}")
+    
+    # Helper methods for parsing LLM responses
+    
+    def _parse_llm_response(self, response: str) -> Optional[Dict]:
+        """Parse and structure LLM response into itinerary format, None if unparseable"""
+        return parse_llm_object(response, Itinerary)
+    
+    def _parse_outline_response(self, response: str) -> Optional[Dict]:
+        """Parse the outline of a long itinerary, None if unparseable"""
+        return parse_llm_object(response, ItineraryOutline)
+    
+    def _parse_day_response(self, response: str, day_num: int, title: str) -> Optional[Dict]:
+        """Parse one generated day, pinning its number to the requested slot"""
+        day = parse_llm_object(response, ItineraryDay)
+        if day is None:
+            return None
+        day['day'] = day_num
+        day['title'] = day['title'] or title
+        return day
+    
+    def _parse_activities_response(self, response: str) -> List[Dict]:
+        """Parse activities recommendations response"""
+        return parse_llm_list(response, Activity)
     
     def _parse_cultural_response(self, response: str) -> Dict:
         """Parse cultural insights response"""
-        import json
-        try:
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-        except:
-            pass
-        
-        return {}
+        return parse_llm_object(response, CulturalInsights) or {}
     
     def _parse_budget_response(self, response: str) -> Dict:
         """Parse budget optimization response"""
-        import json
-        try:
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-        except:
-            pass
-        
-        return {}
+        return parse_llm_object(response, BudgetOptimization) or {}
     
     def _generate_fallback_itinerary(self, trip_data: Dict) -> Dict:
         """Generate basic fallback itinerary if LLM fails"""
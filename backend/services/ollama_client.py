@@ -0,0 +1,459 @@
+"""
+Ollama Client - Shared, connection-pooled access to the Ollama API
+An asyncio client on a per-worker event loop multiplexes every generation over one
+HTTP connection pool, bounds in-flight generations and exposes a LangChain LLM adapter
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Coroutine, Dict, Iterator, List, Optional, Union
+import httpx
+import ollama
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.llm_metrics import record_generation
+
+
+class OllamaBackend:
+    """
+    One Ollama server in the client's pool
+
+    Tracks outstanding generations and a rolling latency for routing. The
+    backend's circuit breaker ejects it after repeated failures and readmits
+    it through half-open trial calls or the health probe.
+    """
+
+    def __init__(self, base_url: str, max_concurrency: int, breaker: CircuitBreaker):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.latency_ms: Optional[float] = None
+
+        self.client: Optional[ollama.AsyncClient] = None
+
+    @property
+    def utilization(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+    def record_latency(self, seconds: float, alpha: float = 0.2):
+        """Fold one generation's duration into the rolling average"""
+        latency_ms = seconds * 1000
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += alpha * (latency_ms - self.latency_ms)
+
+    def stats(self) -> Dict:
+        return {
+            'base_url': self.base_url,
+            'state': self.breaker.state,
+            'max_concurrency': self.max_concurrency,
+            'in_flight': self.in_flight,
+            'utilization': round(self.utilization, 3),
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None
+        }
+
+
+class AsyncOllamaClient:
+    """
+    asyncio-based Ollama client running on a dedicated event loop thread
+
+    Request threads submit coroutines to the loop and wait on futures, so
+    all network I/O shares one pooled httpx.AsyncClient per backend. Each
+    backend runs at most `max_concurrency` generations at once; the rest
+    wait in one queue on the loop and are routed to the least-loaded
+    healthy backend as soon as any slot frees up.
+    """
+
+    def __init__(self, base_urls: Union[str, List[str]], timeout: float = 90, max_concurrency: int = 4,
+                 max_connections: int = 32, wait_timeout: float = 300,
+                 breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None):
+        """
+        Initialize the client (the event loop starts lazily on first use)
+
+        Args:
+            base_urls: Ollama server URL, or a list (or comma-separated string) of them
+            timeout: HTTP timeout in seconds for a single Ollama request
+            max_concurrency: Maximum generations in flight at once per backend
+            max_connections: Size of each backend's HTTP connection pool
+            wait_timeout: Maximum seconds a caller waits, queueing included
+            breaker_factory: Builds the circuit breaker for a backend URL (optional)
+        """
+        if isinstance(base_urls, str):
+            base_urls = [url.strip() for url in base_urls.split(',') if url.strip()]
+        if not base_urls:
+            raise ValueError("At least one Ollama base URL is required")
+
+        breaker_factory = breaker_factory or (lambda url: CircuitBreaker(name=f'ollama {url}'))
+        self.backends = [OllamaBackend(url, max_concurrency, breaker_factory(url)) for url in base_urls]
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.wait_timeout = wait_timeout
+
+        self.waiting = 0
+        self.rejected = 0
+        self.failovers = 0
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._capacity: Optional[asyncio.Condition] = None
+
+    # Event loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread, restarting it in a forked worker"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='ollama-client-loop', daemon=True)
+            thread.start()
+
+            self._pid = os.getpid()
+            self._loop = loop
+            for backend in self.backends:
+                backend.client = ollama.AsyncClient(
+                    host=backend.base_url,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+            self._capacity = asyncio.Condition()
+            return loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the client loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def close(self):
+        """Close the connection pools and stop the loop"""
+        with self._lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None:
+            return
+        if self._pid == os.getpid():
+            for backend in self.backends:
+                asyncio.run_coroutine_threadsafe(backend.client._client.aclose(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+
+    # Coroutine API (must run on the client loop, e.g. via submit)
+
+    def _pick(self, candidates: List[OllamaBackend], prefer: Optional[str] = None) -> Optional[OllamaBackend]:
+        """
+        Claim the least-loaded healthy backend with a free slot
+
+        A free `prefer` backend (e.g. the one holding a conversation's KV
+        cache) wins over less loaded ones.
+
+        Returns:
+            The backend, or None if every healthy backend is busy
+
+        Raises:
+            CircuitOpenError: If every candidate backend is ejected
+        """
+        healthy = [backend for backend in candidates if backend.breaker.available()]
+        if not healthy:
+            self.rejected += 1
+            errors = '; '.join(f"{backend.base_url}: {backend.breaker.last_error}" for backend in candidates)
+            raise CircuitOpenError(f"No healthy Ollama backend ({errors})")
+
+        free = [backend for backend in healthy if backend.in_flight < backend.max_concurrency]
+        free.sort(key=lambda backend: (backend.base_url != prefer, backend.utilization, backend.latency_ms or 0))
+        for backend in free:
+            try:
+                backend.breaker.allow()
+            except CircuitOpenError:
+                continue
+            backend.in_flight += 1
+            return backend
+        return None
+
+    @asynccontextmanager
+    async def _slot(self, candidates: Optional[List[OllamaBackend]] = None, prefer: Optional[str] = None):
+        """
+        Wait for a free generation slot on the least-loaded healthy backend
+
+        Fails immediately with CircuitOpenError while every backend is known to be down.
+        """
+        candidates = candidates or self.backends
+        backend = self._pick(candidates, prefer)
+        if backend is None:
+            self.waiting += 1
+            try:
+                async with self._capacity:
+                    while backend is None:
+                        await self._capacity.wait()
+                        backend = self._pick(candidates, prefer)
+            finally:
+                self.waiting -= 1
+
+        started = time.perf_counter()
+        try:
+            yield backend
+            backend.completed += 1
+            backend.record_latency(time.perf_counter() - started)
+            backend.breaker.record_success()
+        except Exception as e:
+            backend.failed += 1
+            backend.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled by the caller; says nothing about backend health
+            backend.cancelled += 1
+            backend.breaker.release()
+            raise
+        finally:
+            backend.in_flight -= 1
+            async with self._capacity:
+                self._capacity.notify_all()
+
+    async def generate(self, prefer: Optional[str] = None, **kwargs) -> Dict:
+        """
+        Run one non-streaming generation
+
+        A backend that cannot be reached is skipped and the generation is
+        retried on another one. The response's 'backend' field names the
+        server that answered.
+        """
+        candidates = list(self.backends)
+        while True:
+            try:
+                async with self._slot(candidates, prefer) as backend:
+                    started = time.perf_counter()
+                    response = await backend.client.generate(stream=False, **kwargs)
+                    record_generation(response, time.perf_counter() - started)
+                    response['backend'] = backend.base_url
+                    return response
+            except httpx.TransportError:
+                candidates.remove(backend)
+                if not candidates:
+                    raise
+                self.failovers += 1
+
+    async def generate_stream(self, **kwargs) -> AsyncIterator[Dict]:
+        """Run one streaming generation, yielding Ollama's partial responses"""
+        async with self._slot() as backend:
+            started = time.perf_counter()
+            first_token = None
+            final = None
+            stream = await backend.client.generate(stream=True, **kwargs)
+            try:
+                async for part in stream:
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    if part.get('done'):
+                        final = part
+                    yield part
+            finally:
+                # Closing the stream drops the HTTP response, which stops generation in Ollama
+                await stream.aclose()
+                if first_token is not None:
+                    # A stream abandoned early still reports its latency, just not Ollama's counters
+                    record_generation(final or {'model': kwargs.get('model', '')},
+                                      time.perf_counter() - started, first_token)
+
+    async def embeddings(self, **kwargs) -> Dict:
+        """Embed a prompt with an Ollama embedding model"""
+        async with self._slot() as backend:
+            return await backend.client.embeddings(**kwargs)
+
+    async def broadcast(self, **kwargs) -> int:
+        """Run one generation on every backend (e.g. to load the model), returning how many succeeded"""
+        async def run(backend: OllamaBackend) -> Dict:
+            async with self._slot([backend]):
+                return await backend.client.generate(stream=False, **kwargs)
+
+        results = await asyncio.gather(*(run(backend) for backend in self.backends), return_exceptions=True)
+        return sum(1 for result in results if not isinstance(result, BaseException))
+    # Blocking API for WSGI request threads
+
+    def generate_sync(self, timeout: Optional[float] = None, **kwargs) -> Dict:
+        """
+        Run a generation and wait for the result
+
+        The generation is cancelled if the wait times out or the calling
+        thread is interrupted, so abandoned requests free their slot.
+        """
+        future = self.submit(self.generate(**kwargs))
+        try:
+            return future.result(timeout or self.wait_timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Ollama generation did not finish within {timeout or self.wait_timeout}s")
+        finally:
+            future.cancel()
+
+    def stream_sync(self, timeout: Optional[float] = None, **kwargs) -> Iterator[Dict]:
+        """
+        Run a streaming generation, yielding partial responses as they arrive
+
+        Closing the iterator early (e.g. when an SSE client disconnects)
+        cancels the generation on the loop.
+        """
+        parts: queue.Queue = queue.Queue()
+
+        async def pump():
+            try:
+                async for part in self.generate_stream(**kwargs):
+                    parts.put(('part', part))
+                parts.put(('done', None))
+            except Exception as e:
+                parts.put(('error', e))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                try:
+                    kind, value = parts.get(timeout=timeout or self.wait_timeout)
+                except queue.Empty:
+                    raise TimeoutError("Timed out waiting for Ollama to stream a token")
+                if kind == 'part':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    return
+        finally:
+            future.cancel()
+
+    def stats(self) -> Dict:
+        """Pool-wide and per-backend concurrency counters"""
+        backends = [backend.stats() for backend in self.backends]
+        return {
+            'max_concurrency': sum(backend.max_concurrency for backend in self.backends),
+            'max_connections': self.max_connections,
+            'in_flight': sum(backend['in_flight'] for backend in backends),
+            'waiting': self.waiting,
+            'completed': sum(backend['completed'] for backend in backends),
+            'failed': sum(backend['failed'] for backend in backends),
+            'cancelled': sum(backend['cancelled'] for backend in backends),
+            'rejected': self.rejected,
+            'failovers': self.failovers,
+            'backends': backends
+        }
+
+
+class OllamaLLM(LLM):
+    """
+    LangChain LLM that routes every request through the shared AsyncOllamaClient
+
+    Every request carries an Ollama keep-alive so the model stays resident,
+    which the LangChain community wrapper cannot do.
+    """
+
+    client: Any
+    model: str
+    temperature: float = 0.7
+    keep_alive: Optional[str] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "wanderguide-ollama"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {'model': self.model, 'temperature': self.temperature}
+
+    def _params(self, prompt: str, stop: Optional[List[str]]) -> Dict:
+        options = {'temperature': self.temperature}
+        if stop:
+            options['stop'] = stop
+        return {
+            'model': self.model,
+            'prompt': prompt,
+            'options': options,
+            'keep_alive': self.keep_alive
+        }
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None,
+              run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        return self.client.generate_sync(**self._params(prompt, stop))['response']
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None,
+                     run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> str:
+        future = self.client.submit(self.client.generate(**self._params(prompt, stop)))
+        return (await asyncio.wrap_future(future))['response']
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        for part in self.client.stream_sync(**self._params(prompt, stop)):
+            text = part.get('response', '')
+            if run_manager:
+                run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
+
+    def generate_raw(self, prompt: str, context: Optional[List[int]] = None,
+                     prefer: Optional[str] = None) -> Dict:
+        """
+        Run a generation outside LangChain and return Ollama's full response
+
+        Args:
+            prompt: Prompt text (only the new part when continuing from `context`)
+            context: Token context returned by a previous response
+            prefer: Backend URL to favour, e.g. the one that produced `context`
+
+        Returns:
+            Ollama's response dict, including 'context', 'prompt_eval_count'
+            and 'prompt_eval_duration'
+        """
+        params = self._params(prompt, None)
+        if context:
+            params['context'] = context
+        return self.client.generate_sync(prefer=prefer, **params)
+
+    def warm_up(self) -> int:
+        """Load the model into memory on every backend with an empty prompt"""
+        future = self.client.submit(self.client.broadcast(model=self.model, prompt='', keep_alive=self.keep_alive))
+        loaded = future.result(self.client.wait_timeout)
+        if not loaded:
+            raise RuntimeError("No Ollama backend loaded the model")
+        return loaded
+
+
+def create_ollama_llm(base_urls: Union[str, List[str]], model: str, timeout: float = 90) -> OllamaLLM:
+    """
+    Build the shared LLM client for this worker
+
+    Args:
+        base_urls: Ollama server URL(s) to balance generations across
+        model: Model name
+        timeout: Per-request timeout in seconds
+    """
+    client = AsyncOllamaClient(
+        base_urls=base_urls,
+        timeout=timeout,
+        max_concurrency=int(os.getenv('OLLAMA_MAX_CONCURRENCY', 4)),
+        max_connections=int(os.getenv('OLLAMA_MAX_CONNECTIONS', 32)),
+        wait_timeout=float(os.getenv('OLLAMA_WAIT_TIMEOUT', 300)),
+        breaker_factory=lambda url: CircuitBreaker(
+            name=f'ollama {url}',
+            failure_threshold=int(os.getenv('OLLAMA_BREAKER_FAILURES', 3)),
+            recovery_timeout=float(os.getenv('OLLAMA_BREAKER_RECOVERY', 30))
+        )
+    )
+    return OllamaLLM(
+        client=client,
+        model=model,
+        temperature=0.7,
+        keep_alive=os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+    )
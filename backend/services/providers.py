@@ -0,0 +1,293 @@
+"""
+Booking Providers - Concurrent, deadline-bounded searches across several sources
+Every provider of a kind is queried at once; whatever has answered by the deadline is
+merged (duplicates across sources collapse to the cheapest offer) and the rest is reported
+as skipped, with per-provider latency and timeout rates kept to spot chronically slow sources
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from services.fetcher import Fetcher
+from services.site_parsers import FLIGHTS, HOTELS, KINDS, Site
+
+# A provider timing out on more than this share of at least SLOW_MIN_CALLS searches is flagged as slow
+SLOW_TIMEOUT_RATE = 0.2
+SLOW_MIN_CALLS = 20
+
+# Latencies kept per provider for the percentiles
+LATENCY_WINDOW = 500
+
+
+class Provider:
+    """
+    One source of flights, hotels and/or activities
+    """
+
+    name = ''
+    kinds: Tuple[str, ...] = ()
+
+    def search(self, kind: str, query: Dict, timeout: Optional[float] = None) -> List[Dict]:
+        """Results in the ScraperService dict shapes within timeout seconds (when given); raise on failure"""
+        raise NotImplementedError
+
+
+class SiteProvider(Provider):
+    """A scraped site: fetch its search page and parse it"""
+
+    def __init__(self, site: Site, fetcher: Fetcher):
+        self.site = site
+        self.fetcher = fetcher
+        self.name = site.name
+        self.kinds = (site.kind,)
+
+    def search(self, kind: str, query: Dict, timeout: Optional[float] = None) -> List[Dict]:
+        page = self.fetcher.fetch(self.site.url, self.site.parser.search_params(kind, query), timeout=timeout)
+        return self.site.parser.parse(kind, page.text, query)
+
+
+class CallableProvider(Provider):
+    """A source backed by plain functions per kind (e.g. the simulated demo data)"""
+
+    def __init__(self, name: str, handlers: Dict[str, Callable[[Dict], List[Dict]]]):
+        self.name = name
+        self.handlers = handlers
+        self.kinds = tuple(handlers)
+
+    def search(self, kind: str, query: Dict, timeout: Optional[float] = None) -> List[Dict]:
+        return self.handlers[kind](query)
+
+
+class ProviderResults(list):
+    """
+    Merged results of one fan-out search
+
+    A list of result dicts that also says which providers answered and which
+    were skipped (`{'provider': name, 'reason': 'timeout' | 'error'}`).
+    """
+
+    def __init__(self, results: Iterable[Dict] = (), providers: Optional[List[str]] = None,
+                 skipped: Optional[List[Dict]] = None):
+        super().__init__(results)
+        self.providers = providers or []
+        self.skipped = skipped or []
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.skipped)
+
+    def coverage(self) -> Dict:
+        """JSON summary for responses"""
+        return {'partial': self.partial, 'providers': self.providers, 'skipped': self.skipped}
+
+
+class ProviderStats:
+    """Call outcomes and recent latencies of one provider"""
+
+    def __init__(self):
+        self.calls = 0
+        self.succeeded = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(share: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(int(share * len(latencies)), len(latencies) - 1)] * 1000, 1)
+
+        timeout_rate = self.timeouts / self.calls if self.calls else 0.0
+        return {
+            'calls': self.calls,
+            'succeeded': self.succeeded,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'timeout_rate': round(timeout_rate, 3),
+            'error_rate': round(self.errors / self.calls, 3) if self.calls else 0.0,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'slow': self.calls >= SLOW_MIN_CALLS and timeout_rate > SLOW_TIMEOUT_RATE
+        }
+
+
+def _normalize(value) -> str:
+    return re.sub(r'[^a-z0-9]+', '', str(value or '').lower())
+
+
+def result_identity(kind: str, result: Dict) -> str:
+    """
+    What makes two results from different sources the same offer
+
+    Flights: airline and flight numbers plus the departure day of each leg;
+    hotels and activities: the normalized name.
+    """
+    if kind == FLIGHTS:
+        legs = [result.get('outbound') or {}, result.get('return') or {}]
+        return '|'.join(
+            [_normalize(result.get('airline_code'))]
+            + [f"{_normalize(leg.get('flight_number'))}@{str((leg.get('departure') or {}).get('time', ''))[:10]}"
+               for leg in legs if leg]
+        )
+    return _normalize(result.get('name'))
+
+
+def result_price(kind: str, result: Dict) -> float:
+    price = result.get('price')
+    if kind == FLIGHTS:
+        price = (price or {}).get('amount')
+    elif kind == HOTELS:
+        price = (price or {}).get('total')
+    try:
+        return float(price)
+    except (TypeError, ValueError):
+        return float('inf')
+
+
+def merge_results(kind: str, batches: List[Tuple[str, List[Dict]]]) -> List[Dict]:
+    """
+    Merge per-provider results, collapsing offers several providers list
+
+    The cheapest copy wins and gets a `sources` list naming every provider
+    that had it. Results sharing an identity within one provider are distinct
+    listings and are all kept.
+    """
+    merged: Dict[str, Dict] = {}
+    order: List[str] = []
+    for provider, results in batches:
+        for index, result in enumerate(results):
+            key = result_identity(kind, result)
+            existing = merged.get(key)
+            if existing is not None and provider in existing['sources']:
+                key = f"{key}#{provider}#{index}"
+                existing = None
+            if existing is None:
+                merged[key] = dict(result, sources=[provider])
+                order.append(key)
+                continue
+            sources = existing['sources'] + [provider]
+            if result_price(kind, result) < result_price(kind, existing):
+                merged[key] = dict(result, sources=sources)
+            else:
+                existing['sources'] = sources
+    return [merged[key] for key in order]
+
+
+class ProviderFanOut:
+    """
+    Queries every provider of a kind concurrently under a deadline
+    """
+
+    def __init__(self, providers: List[Provider], deadline: float = 8.0, workers: int = 16):
+        """
+        Initialize the fan-out
+
+        Args:
+            providers: Sources to query
+            deadline: Seconds a search waits for providers before answering with what it has
+            workers: Provider calls running at once across all searches
+        """
+        self.providers = providers
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='provider')
+        self._lock = threading.Lock()
+        self._stats: Dict[str, ProviderStats] = {provider.name: ProviderStats() for provider in providers}
+
+    def providers_for(self, kind: str) -> List[Provider]:
+        return [provider for provider in self.providers if kind in provider.kinds]
+
+    def search(self, kind: str, query: Dict, deadline: Optional[float] = None) -> ProviderResults:
+        """
+        Search every provider of a kind and merge what arrives in time
+
+        Args:
+            kind: 'flights', 'hotels' or 'activities'
+            query: Search parameters
+            deadline: Seconds to wait (default: the fan-out's deadline)
+
+        Returns:
+            Merged results; providers that failed or missed the deadline are listed as skipped
+        """
+        providers = self.providers_for(kind)
+        deadline = self.deadline if deadline is None else deadline
+        expires = time.perf_counter() + deadline
+        futures = {}
+        for provider in providers:
+            with self._lock:
+                self._stats[provider.name].calls += 1
+            futures[self._executor.submit(self._call, provider, kind, query, expires)] = provider
+
+        done, _ = wait(futures, timeout=deadline)
+
+        batches, answered, skipped = [], [], []
+        for future, provider in futures.items():
+            if future not in done:
+                # Calls still queued behind other searches are dropped; a running one is left to
+                # finish (within its own timeout) and still records its latency
+                future.cancel()
+                with self._lock:
+                    self._stats[provider.name].timeouts += 1
+                skipped.append({'provider': provider.name, 'reason': 'timeout'})
+                continue
+            results = future.result()
+            if results is None:
+                skipped.append({'provider': provider.name, 'reason': 'error'})
+            else:
+                batches.append((provider.name, results))
+                answered.append(provider.name)
+
+        if skipped:
+            print(f"⚠️  {kind} search skipped {', '.join(entry['provider'] for entry in skipped)}")
+        return ProviderResults(merge_results(kind, batches), answered, skipped)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def _call(self, provider: Provider, kind: str, query: Dict, expires: float) -> Optional[List[Dict]]:
+        """Run one provider search in the time left before expires, recording its latency; None on failure"""
+        started = time.perf_counter()
+        if started >= expires:
+            return None  # Picked up after the search answered without it (already counted as a timeout)
+        try:
+            results = provider.search(kind, query, timeout=expires - started)
+        except Exception as e:
+            print(f"❌ Provider {provider.name} failed on {kind}: {e}")
+            results = None
+        finished = time.perf_counter()
+        with self._lock:
+            stats = self._stats[provider.name]
+            stats.latencies.append(finished - started)
+            if results is None:
+                stats.errors += 1
+            elif finished <= expires:
+                stats.succeeded += 1  # Late answers were already counted as timeouts
+        return results
+
+
+def build_providers(sites: List[Site], fetcher: Fetcher,
+                    simulated: Dict[str, Callable[[Dict], List[Dict]]]) -> List[Provider]:
+    """
+    One provider per configured site, plus the simulated source for kinds no site covers
+    """
+    providers: List[Provider] = [SiteProvider(site, fetcher) for site in sites]
+    covered = {site.kind for site in sites}
+    fallback = {kind: handler for kind, handler in simulated.items() if kind in KINDS and kind not in covered}
+    if fallback:
+        providers.append(CallableProvider('simulated', fallback))
+    return providers
+
+
+def fan_out_from_env(providers: List[Provider]) -> ProviderFanOut:
+    """Build a fan-out from SCRAPER_DEADLINE and SCRAPER_PROVIDER_WORKERS"""
+    return ProviderFanOut(
+        providers,
+        deadline=float(os.getenv('SCRAPER_DEADLINE', 8)),
+        workers=int(os.getenv('SCRAPER_PROVIDER_WORKERS', 16))
+    )
@@ -0,0 +1,243 @@
+"""
+Response Pipeline - Fast JSON encoding and negotiated compression for API responses
+JSON bodies are encoded with orjson when it is installed (the standard library otherwise) and
+compressed with brotli or gzip, whichever the client prefers, once they pass a size threshold;
+bodies above a larger threshold are compressed and sent in chunks instead of buffered whole
+"""
+
+import json
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterator, Optional
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # In requirements.txt; without it only gzip is offered
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+# Encodings offered, in the server's order of preference for equal client q-values
+ENCODINGS = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+
+# Content types worth compressing (streamed bodies such as Server-Sent Events are left alone)
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'image/svg+xml', 'text/')
+
+# Statuses whose bodies are never compressed
+SKIP_STATUSES = (204, 206, 304)
+
+# orjson writes dates and dataclasses itself in its own formats; Flask's default() is kept for them
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson is not None else 0
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False, indent: bool = False, ensure_ascii: bool = False) -> bytes:
+    """
+    Encode obj as UTF-8 JSON
+
+    Args:
+        obj: Value to encode (dates, decimals, UUIDs and dataclasses as Flask encodes them)
+        sort_keys: Sort object keys
+        indent: Pretty-print with two spaces instead of the compact form
+        ensure_ascii: Escape non-ASCII characters (standard library encoder only)
+
+    Returns:
+        The encoded document
+    """
+    if orjson is not None and not ensure_ascii:
+        option = ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+        except TypeError:
+            pass  # e.g. an integer wider than 64 bits; the standard library handles it
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=DefaultJSONProvider.default, sort_keys=sort_keys,
+                      indent=2 if indent else None, separators=separators,
+                      ensure_ascii=ensure_ascii).encode('utf-8')
+
+
+def dumps_text(obj: Any) -> str:
+    """Compact JSON text, for bodies built outside jsonify (e.g. Server-Sent Events)"""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with dumps_bytes and hands the bytes straight to the response
+    """
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if set(kwargs) - {'indent', 'separators', 'sort_keys', 'ensure_ascii', 'default'}:
+            return super().dumps(obj, **kwargs)  # Options only the standard library knows
+        return dumps_bytes(
+            obj,
+            sort_keys=kwargs.get('sort_keys', self.sort_keys),
+            indent=bool(kwargs.get('indent')),
+            ensure_ascii=kwargs.get('ensure_ascii', self.ensure_ascii)
+        ).decode('utf-8')
+
+    def response(self, *args, **kwargs) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent, ensure_ascii=self.ensure_ascii)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def _gzip_chunks(data: bytes, level: int, chunk_size: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    for start in range(0, len(data), chunk_size):
+        chunk = compressor.compress(data[start:start + chunk_size])
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def _brotli_chunks(data: bytes, quality: int, chunk_size: int) -> Iterator[bytes]:
+    compressor = brotli.Compressor(quality=quality)
+    for start in range(0, len(data), chunk_size):
+        chunk = compressor.process(data[start:start + chunk_size])
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+class ResponseCompressor:
+    """
+    after_request hook compressing eligible responses with the negotiated encoding
+    """
+
+    def __init__(self, min_size: int = 1024, stream_size: int = 256 * 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, chunk_size: int = 64 * 1024):
+        """
+        Initialize the compressor
+
+        Args:
+            min_size: Bodies smaller than this many bytes are sent as they are
+            stream_size: Bodies of at least this many bytes are compressed and sent chunk by chunk
+            gzip_level: zlib level (1 fastest - 9 smallest)
+            brotli_quality: Brotli quality (0 fastest - 11 smallest; 4-5 suits dynamic responses)
+            chunk_size: Bytes compressed per chunk when streaming
+        """
+        self.min_size = min_size
+        self.stream_size = stream_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._counters = {'compressed': 0, 'streamed': 0, 'skipped_small': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self._by_encoding = {encoding: 0 for encoding in ENCODINGS}
+
+    def init_app(self, app: Flask):
+        app.after_request(self)
+
+    def negotiate(self, accept_encoding) -> Optional[str]:
+        """Best encoding the client accepts (werkzeug Accept), None for identity"""
+        return accept_encoding.best_match(ENCODINGS)
+
+    def __call__(self, response: Response) -> Response:
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in SKIP_STATUSES
+                or 'Content-Encoding' in response.headers
+                or not (response.mimetype or '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+
+        data = response.get_data()
+        response.vary.add('Accept-Encoding')
+        if len(data) < self.min_size:
+            self._count(skipped_small=1)
+            return response
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.headers['Content-Encoding'] = encoding
+        if len(data) >= self.stream_size:
+            # Chunked transfer: the first compressed bytes leave before the rest is compressed
+            response.response = self._stream(data, encoding)
+            response.headers.pop('Content-Length', None)
+            self._count(encoding, streamed=1)  # Bytes are counted once the stream is sent
+            return response
+
+        body = b''.join(self._chunks(data, encoding, len(data)))
+        response.set_data(body)
+        self._count(encoding, bytes_in=len(data), bytes_out=len(body))
+        return response
+
+    def _chunks(self, data: bytes, encoding: str, chunk_size: int) -> Iterator[bytes]:
+        if encoding == BROTLI:
+            return _brotli_chunks(data, self.brotli_quality, chunk_size)
+        return _gzip_chunks(data, self.gzip_level, chunk_size)
+
+    def _stream(self, data: bytes, encoding: str) -> Iterator[bytes]:
+        sent = 0
+        for chunk in self._chunks(data, encoding, self.chunk_size):
+            sent += len(chunk)
+            yield chunk
+        with self._lock:
+            self._counters['bytes_in'] += len(data)
+            self._counters['bytes_out'] += sent
+
+    def _count(self, encoding: Optional[str] = None, **counters: int):
+        with self._lock:
+            if encoding is not None:
+                self._by_encoding[encoding] += 1
+                self._counters['compressed'] += 1
+            for name, value in counters.items():
+                self._counters[name] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters['by_encoding'] = dict(self._by_encoding)
+        counters['ratio'] = round(counters['bytes_out'] / counters['bytes_in'], 3) if counters['bytes_in'] else None
+        counters['json_encoder'] = 'orjson' if orjson is not None else 'json'
+        counters['min_size'] = self.min_size
+        return counters
+
+
+def response_compressor_from_env() -> Optional[ResponseCompressor]:
+    """Build a compressor from the RESPONSE_COMPRESSION* env vars (None when disabled)"""
+    if os.getenv('RESPONSE_COMPRESSION', 'true').lower() == 'false':
+        return None
+    return ResponseCompressor(
+        min_size=int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+        stream_size=int(os.getenv('RESPONSE_COMPRESSION_STREAM_SIZE', 256 * 1024)),
+        gzip_level=int(os.getenv('RESPONSE_COMPRESSION_GZIP_LEVEL', 6)),
+        brotli_quality=int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', 4))
+    )
+
+
+def init_response_pipeline(app: Flask) -> Optional[ResponseCompressor]:
+    """
+    Install the fast JSON provider and the compressor on an app
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The compressor, or None when compression is disabled
+    """
+    app.json = FastJSONProvider(app)
+    compressor = response_compressor_from_env()
+    if compressor is not None:
+        compressor.init_app(app)
+        print(f"✅ Response compression enabled: {', '.join(ENCODINGS)}")
+        if brotli is None:
+            print("⚠️  brotli is not installed, only gzip is offered (pip install -r requirements.txt)")
+    return compressor
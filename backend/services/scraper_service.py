@@ -5,23 +5,63 @@ Handles scraping of flight and accommodation information from various sources
 
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
 import json
+import os
 import random
+from services.fare_calendar import AIRLINES, FareCalendar, date_window, fare_calendar_from_env, parse_date
+from services.fetcher import Fetcher, fetcher_from_env
+from services.hotel_index import HotelIndex, HotelIndexCache
+from services.providers import Provider, ProviderResults, build_providers, fan_out_from_env
+from services.site_parsers import ACTIVITIES, FLIGHTS, HOTELS, Site, sites_from_env
 
 class ScraperService:
     """
     Service for web scraping flight and hotel information
-    Note: This uses simulated data for demo purposes. 
-    In production, integrate with actual booking APIs or implement proper scraping.
+    Every search fans out to all providers of its kind at once (see services/providers.py).
+    Note: Kinds with no site configured (SCRAPER_SITES) use simulated data for demo purposes.
     """
     
-    def __init__(self):
-        """Initialize scraper service"""
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+    def __init__(self, fares: Optional[FareCalendar] = None, fetcher: Optional[Fetcher] = None,
+                 sites: Optional[List[Site]] = None, providers: Optional[List[Provider]] = None):
+        """
+        Initialize scraper service
+        
+        Args:
+            fares: Per-route, per-day fare cache shared by flight searches and fare calendars
+            fetcher: Pooled, rate-limited HTTP fetcher (default: from SCRAPER_* settings)
+            sites: Sites to scrape (default: SCRAPER_SITES)
+            providers: Sources to search (default: one per site plus the simulated data
+                       for kinds no site covers)
+        """
+        self.fares = fares if fares is not None else fare_calendar_from_env()
+        self.fetcher = fetcher if fetcher is not None else fetcher_from_env()
+        self.sites = sites if sites is not None else sites_from_env()
+        for site in self.sites:
+            if site.rate is not None or site.concurrency is not None:
+                self.fetcher.configure_host(site.host, rate=site.rate, concurrency=site.concurrency)
+        
+        if providers is None:
+            providers = build_providers(self.sites, self.fetcher, {
+                FLIGHTS: self._simulated_flights,
+                HOTELS: self._simulated_hotels,
+                ACTIVITIES: self._simulated_activities
+            })
+        self.providers = fan_out_from_env(providers)
+        self.hotel_indexes = HotelIndexCache(ttl=float(os.getenv('HOTEL_INDEX_TTL', 600)))
+    
+    def search(self, kind: str, query: Dict, deadline: Optional[float] = None) -> ProviderResults:
+        """
+        Search every provider of a kind concurrently
+        
+        Args:
+            kind: 'flights', 'hotels' or 'activities'
+            query: Search parameters (the route's query params)
+            deadline: Seconds to wait for providers (default: SCRAPER_DEADLINE)
+        
+        Returns:
+            Merged, deduplicated results; `.skipped` lists providers that failed or missed the deadline
+        """
+        return self.providers.search(kind, query, deadline)
     
     def search_flights(self, origin: str, destination: str, 
                       departure_date: str, return_date: Optional[str] = None,
@@ -37,24 +77,40 @@ class ScraperService:
             passengers: Number of passengers
         
         Returns:
-            List of flight options with pricing and details
+            List of flight options with pricing and details (a ProviderResults)
         """
         
-        # In production, this would scrape actual flight booking sites
-        # For now, generating realistic mock data
+        # Reject bad dates here rather than as a failure of every provider
+        parse_date(departure_date)
+        if return_date:
+            parse_date(return_date)
+        
+        flights = self.search(FLIGHTS, {
+            'origin': origin,
+            'destination': destination,
+            'departure_date': departure_date,
+            'return_date': return_date,
+            'passengers': passengers
+        })
+        
+        # Sort by price
+        flights.sort(key=lambda x: x["price"]["amount"])
+        
+        return flights
+    
+    def _simulated_flights(self, query: Dict) -> List[Dict]:
+        """Realistic mock flights for demo purposes"""
+        origin, destination = query['origin'], query['destination']
+        departure_date, return_date = query['departure_date'], query.get('return_date')
         
         flight_options = []
-        airlines = [
-            {"name": "SkyLine Airways", "code": "SKY"},
-            {"name": "Global Wings", "code": "GLW"},
-            {"name": "Pacific Air", "code": "PAC"},
-            {"name": "Euro Express", "code": "EEX"},
-            {"name": "Continental Flights", "code": "CON"}
-        ]
         
-        base_price = self._calculate_base_price(origin, destination)
+        # Quote from the fare calendar so prices match /flights/calendar for the same days
+        fares = self.fares.daily_fares(origin, destination, [parse_date(departure_date)])[0]
+        if return_date:
+            fares = fares + self.fares.daily_fares(destination, origin, [parse_date(return_date)])[0]
         
-        for i, airline in enumerate(airlines):
+        for i, airline in enumerate(AIRLINES):
             # Generate outbound flight
             outbound_departure = self._generate_time()
             outbound_arrival = self._add_flight_duration(outbound_departure, 
@@ -81,7 +137,7 @@ class ScraperService:
                     "flight_number": f"{airline['code']}{random.randint(100, 999)}"
                 },
                 "price": {
-                    "amount": base_price + random.randint(-100, 300) + (i * 50),
+                    "amount": int(fares[i]),
                     "currency": "USD",
                     "per_person": True
                 },
@@ -124,11 +180,41 @@ class ScraperService:
             
             flight_options.append(flight_option)
         
-        # Sort by price
-        flight_options.sort(key=lambda x: x["price"]["amount"])
-        
         return flight_options
     
+    def fare_calendar(self, origin: str, destination: str, departure_date: str,
+                      return_date: Optional[str] = None, flex_days: int = 3,
+                      passengers: int = 1, top: int = 5) -> Dict:
+        """
+        Cheapest fares for every combination of nearby travel days
+        
+        Args:
+            origin: Departure airport/city code
+            destination: Arrival airport/city code
+            departure_date: Preferred departure date (YYYY-MM-DD)
+            return_date: Preferred return date for round trips (optional)
+            flex_days: Days either side of each preferred date to price
+            passengers: Number of passengers (cheapest cells include the total)
+            top: Number of cheapest combinations to list
+        
+        Returns:
+            Departure (and return) dates, the per-person price grid and the cheapest cells
+        """
+        departure_days = date_window(departure_date, flex_days)
+        return_days = date_window(return_date, flex_days) if return_date else None
+        
+        calendar = self.fares.matrix(origin, destination, departure_days, return_days, top=top)
+        for cell in calendar['cheapest']:
+            cell['total'] = cell['price'] * passengers
+        
+        return {
+            'departure_dates': [day.isoformat() for day in departure_days],
+            'return_dates': [day.isoformat() for day in return_days] if return_days else None,
+            'currency': 'USD',
+            'per_person': True,
+            **calendar
+        }
+    
     def search_hotels(self, destination: str, check_in: str, check_out: str,
                      guests: int = 2, rooms: int = 1) -> List[Dict]:
         """
@@ -142,8 +228,52 @@ class ScraperService:
             rooms: Number of rooms
         
         Returns:
-            List of hotel options with pricing and amenities
+            List of hotel options with pricing and amenities (a ProviderResults)
+        """
+        
+        parse_date(check_in)
+        parse_date(check_out)
+        
+        hotels = self.search(HOTELS, {
+            'destination': destination,
+            'check_in': check_in,
+            'check_out': check_out,
+            'guests': guests,
+            'rooms': rooms
+        })
+        
+        # Sort by rating and price
+        hotels.sort(key=lambda x: (-x["rating"], x["price"]["total"]))
+        
+        return hotels
+    
+    def hotel_index(self, destination: str, check_in: str, check_out: str,
+                    guests: int = 2, rooms: int = 1) -> HotelIndex:
         """
+        Columnar index of a hotel search, built once and reused for filtering and paging
+        
+        Args:
+            destination: Destination city
+            check_in: Check-in date (YYYY-MM-DD)
+            check_out: Check-out date (YYYY-MM-DD)
+            guests: Number of guests
+            rooms: Number of rooms
+        
+        Returns:
+            The search's hotel index (built by search_hotels on a miss)
+        """
+        key = json.dumps([' '.join(destination.lower().split()), check_in, check_out, guests, rooms])
+        
+        def build() -> HotelIndex:
+            hotels = self.search_hotels(destination, check_in, check_out, guests, rooms)
+            return HotelIndex(hotels, hotels.coverage())
+        
+        return self.hotel_indexes.get_or_build(key, build)
+    
+    def _simulated_hotels(self, query: Dict) -> List[Dict]:
+        """Realistic mock hotels for demo purposes"""
+        destination, check_in, check_out = query['destination'], query['check_in'], query['check_out']
+        guests, rooms = query.get('guests', 2), query.get('rooms', 1)
         
         # Calculate number of nights
         check_in_date = datetime.strptime(check_in, "%Y-%m-%d")
@@ -214,9 +344,6 @@ class ScraperService:
             
             hotel_options.append(hotel_option)
         
-        # Sort by rating and price
-        hotel_options.sort(key=lambda x: (-x["rating"], x["price"]["total"]))
-        
         return hotel_options
     
     def get_activity_deals(self, destination: str) -> List[Dict]:
@@ -227,9 +354,15 @@ class ScraperService:
             destination: Destination city
         
         Returns:
-            List of activities and experiences
+            List of activities and experiences (a ProviderResults)
         """
         
+        return self.search(ACTIVITIES, {'destination': destination})
+    
+    def _simulated_activities(self, query: Dict) -> List[Dict]:
+        """Realistic mock activities for demo purposes"""
+        destination = query['destination']
+        
         activity_types = [
             "City Tour", "Food Tour", "Museum Visit", "Adventure Activity",
             "Cultural Experience", "Water Sports", "Day Trip", "Nightlife Experience"
@@ -268,11 +401,6 @@ class ScraperService:
     
     # Helper methods
     
-    def _calculate_base_price(self, origin: str, destination: str) -> int:
-        """Calculate base flight price based on distance approximation"""
-        # Simple logic for demo - in production, would use actual distance/pricing
-        return random.randint(200, 800)
-    
     def _estimate_duration(self, origin: str, destination: str) -> str:
         """Estimate flight duration"""
         hours = random.randint(2, 12)
@@ -0,0 +1,418 @@
+"""
+Semantic Cache - Nearest-neighbour lookup of LLM answers for similar requests
+Embeds normalized request fields and serves a cached answer when a previous request
+was similar enough ("Paris, France" vs "PARIS france"); preferences only match exactly, after
+reordering and synonym folding, so a different interest or budget level is never served
+"""
+
+import atexit
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from services.cache_service import DEFAULT_TTLS, DEFAULT_TTL
+
+# Words, and runs of '$' so price levels like "$" and "$$$$" stay distinct
+WORD_PATTERN = re.compile(r"\$+|[a-z0-9]+")
+
+# Preference words that mean the same thing for recommendations
+SYNONYMS = {
+    'cuisine': 'food', 'dining': 'food', 'eating': 'food', 'foodie': 'food', 'culinary': 'food',
+    'restaurant': 'food',
+    'historical': 'history', 'historic': 'history', 'heritage': 'history',
+    'gallery': 'art',
+    'outdoor': 'nature', 'outdoors': 'nature', 'hiking': 'nature', 'park': 'nature',
+    'bar': 'nightlife', 'club': 'nightlife', 'clubbing': 'nightlife',
+    'shop': 'shopping', 'market': 'shopping',
+    'cheap': 'budget', 'affordable': 'budget', 'inexpensive': 'budget',
+    'expensive': 'luxury', 'upscale': 'luxury',
+}
+
+# Words that do not change what a preference asks for ("historical sites" is "history")
+FILLER_WORDS = {'and', 'the', 'of', 'site', 'place', 'spot', 'thing', 'activity', 'experience'}
+
+# Relative weight of each request field in the similarity score
+# (activity preferences are not embedded: they must match exactly, see preference_scope)
+FIELD_WEIGHTS = {'location': 1.0, 'destination': 1.0}
+
+
+def _words(text: str) -> List[str]:
+    """Lower-case words with a light plural strip and synonym folding"""
+    words = []
+    for word in WORD_PATTERN.findall(str(text or '').lower()):
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 4 and word.endswith(('ches', 'shes', 'sses', 'xes')):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(SYNONYMS.get(word, word))
+    return words
+
+
+def preference_scope(preferences: List[str]) -> str:
+    """
+    Exact-match scope for a preference list
+
+    Two lists share a scope only when they fold to the same set of words, so
+    ['museums', 'food'] matches ['Cuisine', 'museum'] but never ['museums'],
+    and 'low budget' never matches 'high budget' or '$' matches '$$$$'.
+    """
+    words = {word for preference in preferences for word in _words(preference) if word not in FILLER_WORDS}
+    return ' '.join(sorted(words))
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: hashed words and character trigrams, one block per field
+
+    Hashing uses crc32, so vectors are stable across processes and can be
+    persisted. Every field is embedded into its own normalized block scaled by
+    the square root of its weight, which makes the cosine similarity of two
+    requests the weighted average of their per-field similarities. In a
+    location, the first comma-separated part (the city) counts twice as much
+    as the rest (region, country).
+    """
+
+    name = 'hashing'
+
+    def __init__(self, dim: int = 256, field_weights: Optional[Dict[str, float]] = None):
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self.dim = dim * len(self.field_weights)
+        self.block = dim
+
+    def _block(self, field: str, value: Any) -> np.ndarray:
+        vector = np.zeros(self.block, dtype=np.float32)
+        if isinstance(value, (list, tuple)):
+            parts = [(' '.join(str(item) for item in value), 1.0)]
+        elif field in ('location', 'destination'):
+            parts = [(part, 1.0 if index == 0 else 0.5) for index, part in enumerate(str(value or '').split(','))]
+        else:
+            parts = [(str(value or ''), 1.0)]
+
+        for text, weight in parts:
+            for word in _words(text):
+                vector[zlib.crc32(word.encode()) % self.block] += weight
+                padded = f" {word} "
+                for i in range(len(padded) - 2):
+                    vector[zlib.crc32(padded[i:i + 3].encode()) % self.block] += 0.3 * weight
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, fields: Dict[str, Any]) -> np.ndarray:
+        """Embed request fields into one unit vector"""
+        blocks = []
+        total = sum(self.field_weights[field] for field in self.field_weights if field in fields) or 1.0
+        for field, weight in self.field_weights.items():
+            if field in fields:
+                blocks.append(self._block(field, fields[field]) * np.sqrt(weight / total))
+            else:
+                blocks.append(np.zeros(self.block, dtype=np.float32))
+        return np.concatenate(blocks).astype(np.float32)
+
+
+class OllamaEmbedder:
+    """
+    Embedder backed by an Ollama embedding model (e.g. nomic-embed-text)
+
+    Captures real synonyms at the cost of one embedding call per lookup.
+    """
+
+    def __init__(self, client, model: str):
+        self.client = client
+        self.model = model
+        self.name = f"ollama:{model}"
+        self.dim: Optional[int] = None
+
+    def embed(self, fields: Dict[str, Any]) -> np.ndarray:
+        text = '; '.join(
+            f"{field}: {', '.join(map(str, value)) if isinstance(value, (list, tuple)) else value}"
+            for field, value in sorted(fields.items())
+        )
+        response = self.client.submit(self.client.embeddings(model=self.model, prompt=text)).result(self.client.wait_timeout)
+        vector = np.asarray(response['embedding'], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        self.dim = vector.shape[0]
+        return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """
+    Brute-force cosine index over the cached answers of one endpoint
+
+    Vectors are rows of a float32 matrix, so a lookup is a single
+    matrix-vector product; that stays well under a millisecond for the few
+    thousand entries one endpoint holds. Entries only match inside their
+    scope (e.g. the same weather) and expire after the endpoint's TTL; when
+    full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, dim: int, max_entries: int, ttl: float):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.expires_at = np.zeros(0, dtype=np.float64)
+        self.last_used = np.zeros(0, dtype=np.float64)
+        self.scope_codes = np.zeros(0, dtype=np.int32)
+        self.scope_names: List[str] = []
+        self.entries: List[Dict] = []
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def scopes(self) -> List[str]:
+        return [self.scope_names[code] for code in self.scope_codes]
+
+    def _scope_code(self, scope: str) -> int:
+        if scope not in self.scope_names:
+            self.scope_names.append(scope)
+        return self.scope_names.index(scope)
+
+    def search(self, vector: np.ndarray, scope: str) -> Optional[Tuple[int, float]]:
+        """Index and similarity of the nearest live entry in the scope"""
+        if not self.entries:
+            return None
+        scores = self.vectors @ vector
+        if scope not in self.scope_names:
+            return None
+        scores[self.expires_at < time.time()] = -1.0
+        scores[self.scope_codes != self.scope_names.index(scope)] = -1.0
+        index = int(np.argmax(scores))
+        if scores[index] < 0:
+            return None
+        return index, float(scores[index])
+
+    def touch(self, index: int):
+        self.last_used[index] = time.time()
+
+    def add(self, vector: np.ndarray, scope: str, entry: Dict, created_at: Optional[float] = None):
+        now = time.time()
+        created_at = created_at or now
+        if created_at + self.ttl < now:
+            return
+
+        # Drop expired entries first, then the least recently used one
+        expired = np.nonzero(self.expires_at < now)[0]
+        if len(expired):
+            self._remove(expired)
+        while len(self.entries) >= self.max_entries:
+            self._remove([int(np.argmin(self.last_used))])
+            self.evictions += 1
+
+        entry = dict(entry, created_at=created_at)
+        self.vectors = np.vstack([self.vectors, vector[np.newaxis, :]])
+        self.expires_at = np.append(self.expires_at, created_at + self.ttl)
+        self.last_used = np.append(self.last_used, now)
+        self.scope_codes = np.append(self.scope_codes, np.int32(self._scope_code(scope)))
+        self.entries.append(entry)
+
+    def _remove(self, indices):
+        keep = np.ones(len(self.entries), dtype=bool)
+        keep[list(indices)] = False
+        self.vectors = self.vectors[keep]
+        self.expires_at = self.expires_at[keep]
+        self.last_used = self.last_used[keep]
+        self.scope_codes = self.scope_codes[keep]
+        self.entries = [entry for entry, kept in zip(self.entries, keep) if kept]
+
+
+class SemanticCache:
+    """
+    Per-endpoint semantic indexes with optional persistence
+
+    The index is saved as one <path>.npz holding the vectors and the answers
+    every `save_every` inserts and on save(). Each worker process keeps its
+    own copy; the files are loaded at startup.
+    """
+
+    def __init__(self, embedder=None, threshold: float = 0.92, max_entries: int = 5000,
+                 path: Optional[str] = None, ttls: Optional[Dict[str, float]] = None,
+                 save_every: int = 20, enabled: bool = True):
+        """
+        Initialize the cache
+
+        Args:
+            embedder: Object with embed(fields) -> unit vector (defaults to HashingEmbedder)
+            threshold: Minimum cosine similarity to serve a cached answer
+            max_entries: Entries kept per endpoint
+            path: File prefix for persistence (None keeps the index in memory only)
+            ttls: Per-endpoint time-to-live in seconds
+            save_every: Inserts between automatic saves
+            enabled: Turn lookups and inserts off without touching callers
+        """
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.save_every = save_every
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, SemanticIndex] = {}
+        self._unsaved = 0
+        self.lookups = 0
+        self.hits = 0
+        self.inserts = 0
+        self.hit_scores: deque = deque(maxlen=1000)
+
+        if self.enabled and self.path:
+            self.load()
+
+    def _index(self, endpoint: str, dim: int) -> SemanticIndex:
+        index = self._indexes.get(endpoint)
+        if index is None or index.dim != dim:
+            index = SemanticIndex(dim, self.max_entries, self.ttls.get(endpoint, DEFAULT_TTL))
+            self._indexes[endpoint] = index
+        return index
+
+    def lookup(self, endpoint: str, fields: Dict[str, Any], scope: str = '') -> Optional[Tuple[Any, float]]:
+        """
+        Find a cached answer for a similar request
+
+        Returns:
+            (value, similarity) or None
+        """
+        if not self.enabled:
+            return None
+        vector = self.embedder.embed(fields)
+        with self._lock:
+            self.lookups += 1
+            index = self._indexes.get(endpoint)
+            if index is None or index.dim != vector.shape[0]:
+                return None
+            found = index.search(vector, scope)
+            if found is None or found[1] < self.threshold:
+                return None
+            position, score = found
+            index.touch(position)
+            self.hits += 1
+            self.hit_scores.append(score)
+            value = index.entries[position]['value']
+        # Stored answers are never modified, so the copy can be taken outside the lock
+        return copy.deepcopy(value), score
+
+    def add(self, endpoint: str, fields: Dict[str, Any], value: Any, scope: str = ''):
+        """Remember an answer for a request"""
+        if not self.enabled:
+            return
+        vector = self.embedder.embed(fields)
+        # Keep a private copy: the caller goes on to hand `value` out and may modify it
+        entry = {'fields': fields, 'value': copy.deepcopy(value)}
+        with self._lock:
+            self._index(endpoint, vector.shape[0]).add(vector, scope, entry)
+            self.inserts += 1
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def save(self):
+        """Write the indexes to disk atomically"""
+        if not self.path:
+            return
+        with self._lock:
+            arrays = {f"{endpoint}__vectors": index.vectors for endpoint, index in self._indexes.items()}
+            meta = {
+                'embedder': self.embedder.name,
+                'indexes': {
+                    endpoint: {'scopes': index.scopes, 'entries': index.entries}
+                    for endpoint, index in self._indexes.items()
+                }
+            }
+            self._unsaved = 0
+
+        # Vectors and answers go in one file under a per-process temp name, so workers
+        # saving at the same time never interleave writes or mix each other's halves
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, __meta__=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp_path, self.path + '.npz')
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self):
+        """Load persisted indexes, skipping expired entries and other embedders' vectors"""
+        try:
+            with np.load(self.path + '.npz') as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            meta = json.loads(str(arrays.pop('__meta__')))
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ Could not load semantic cache index: {e}")
+            return
+
+        if meta.get('embedder') != self.embedder.name:
+            print(f"⚠️ Semantic cache index was built with {meta.get('embedder')}, starting empty")
+            return
+
+        loaded = 0
+        with self._lock:
+            for endpoint, data in meta.get('indexes', {}).items():
+                vectors = arrays[f"{endpoint}__vectors"]
+                if not len(vectors):
+                    continue
+                index = self._index(endpoint, vectors.shape[1])
+                for vector, scope, entry in zip(vectors, data['scopes'], data['entries']):
+                    index.add(vector, scope, entry, created_at=entry.get('created_at'))
+                loaded += len(index)
+        print(f"✅ Loaded {loaded} semantic cache entries from {self.path}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'embedder': self.embedder.name,
+                'threshold': self.threshold,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 3) if self.lookups else None,
+                'inserts': self.inserts,
+                'avg_hit_similarity': round(float(np.mean(self.hit_scores)), 3) if self.hit_scores else None,
+                'indexes': {
+                    endpoint: {'entries': len(index), 'evictions': index.evictions}
+                    for endpoint, index in self._indexes.items()
+                }
+            }
+
+
+def semantic_cache_from_env(client=None) -> SemanticCache:
+    """
+    Build the semantic cache from LLM_SEMANTIC_* environment variables
+
+    Args:
+        client: AsyncOllamaClient used when LLM_SEMANTIC_EMBEDDER=ollama:<model>
+    """
+    embedder_name = os.getenv('LLM_SEMANTIC_EMBEDDER', 'hashing')
+    embedder = None
+    if embedder_name.startswith('ollama:'):
+        if client is not None:
+            embedder = OllamaEmbedder(client, embedder_name.split(':', 1)[1])
+        else:
+            print("⚠️ Ollama embedder requested without an Ollama client, using hashing embedder")
+
+    cache = SemanticCache(
+        embedder=embedder,
+        threshold=float(os.getenv('LLM_SEMANTIC_THRESHOLD', 0.92)),
+        max_entries=int(os.getenv('LLM_SEMANTIC_MAX_ENTRIES', 5000)),
+        path=os.getenv('LLM_SEMANTIC_INDEX_PATH') or None,
+        enabled=os.getenv('LLM_SEMANTIC_CACHE_ENABLED', 'true').lower() != 'false'
+    )
+    if cache.enabled and cache.path:
+        atexit.register(cache.save)
+    return cache
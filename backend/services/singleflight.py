@@ -0,0 +1,105 @@
+"""
+Single-Flight - Coalesces identical in-flight requests into one execution
+Concurrent callers with the same key wait for the first caller's result instead of repeating the work
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class _Call:
+    """State of one in-flight execution"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Thread-safe request coalescer keyed by canonical request keys
+    """
+
+    def __init__(self, wait_timeout: Optional[float] = None):
+        """
+        Initialize the coalescer
+
+        Args:
+            wait_timeout: Default seconds a follower waits for the leader (None waits forever)
+        """
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn once per key among concurrent callers
+
+        The first caller executes fn; callers arriving while it runs wait for
+        and receive a copy of its result, or re-raise its exception. Followers
+        copy a snapshot taken before the leader returns, so nothing the leader's
+        caller does with its result can reach them.
+
+        Args:
+            key: Canonical request key
+            fn: Zero-argument function producing the result
+            timeout: Seconds this caller is willing to wait as a follower
+
+        Raises:
+            TimeoutError: If a follower's wait exceeds its timeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if leader:
+            try:
+                result = fn()
+                call.result = copy.deepcopy(result)
+                return result
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        wait = self.wait_timeout if timeout is None else timeout
+        if not call.done.wait(wait):
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"Timed out after {wait}s waiting for an identical in-flight request")
+
+        if call.error is not None:
+            raise call.error
+        # Followers get their own copy of the snapshot so callers can't mutate each other's results
+        return copy.deepcopy(call.result)
+
+    def stats(self) -> Dict:
+        """Coalescing counters"""
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'in_flight': len(self._calls),
+                'waiting': sum(call.waiters for call in self._calls.values())
+            }
@@ -0,0 +1,266 @@
+"""
+Trip Planner - Builds a complete trip from one request as a dependency graph of stages
+Itinerary generation, booking searches, weather and cultural insights run in parallel;
+weather-dependent recommendations start as soon as the forecast is in. Each stage's result
+is reported as it finishes, so total time approaches the critical path, not the serial sum
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from services.llm_service import LLMService
+from services.scraper_service import ScraperService
+from services.weather_service import MAX_FORECAST_DAYS, ForecastProvider, dominant_condition
+
+# Stage outcomes
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+TIMED_OUT = 'timeout'
+
+# Days ahead the trip starts when the request has no start_date
+DEFAULT_LEAD_DAYS = 30
+
+# Hotels returned by the plan (the best rated first, as /api/bookings/hotels sorts them)
+HOTEL_LIMIT = 10
+
+
+class Stage:
+    """
+    One unit of work in a plan
+
+    `run` receives the results of the stages named in `depends_on`, by name.
+    """
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Any], depends_on: Tuple[str, ...] = ()):
+        self.name = name
+        self.run = run
+        self.depends_on = depends_on
+
+
+def run_stages(executor: ThreadPoolExecutor, stages: List[Stage], timeout: float) -> Iterator[Dict]:
+    """
+    Execute stages as soon as their dependencies succeed
+
+    A stage whose dependency failed or timed out is skipped. Stages still running
+    at the timeout are reported as timed out and left to finish in the background.
+
+    Yields:
+        `{"stage", "status", "started_ms", "elapsed_ms", "result" | "error"}` in completion order
+    """
+    started = time.perf_counter()
+    expires = started + timeout
+    waiting = {stage.name: stage for stage in stages}
+    results: Dict[str, Any] = {}
+    statuses: Dict[str, str] = {}
+    running: Dict[Future, Tuple[Stage, float]] = {}
+
+    def offset_ms(moment: float) -> float:
+        return round((moment - started) * 1000, 1)
+
+    while waiting or running:
+        for name, stage in list(waiting.items()):
+            if any(dependency not in statuses for dependency in stage.depends_on):
+                continue
+            del waiting[name]
+            failed = [dependency for dependency in stage.depends_on if statuses[dependency] != SUCCEEDED]
+            if failed:
+                statuses[name] = SKIPPED
+                yield {'stage': name, 'status': SKIPPED, 'started_ms': None, 'elapsed_ms': 0.0,
+                       'error': f'{failed[0]} did not succeed'}
+                continue
+            inputs = {dependency: results[dependency] for dependency in stage.depends_on}
+            running[executor.submit(stage.run, inputs)] = (stage, time.perf_counter())
+
+        if not running:
+            continue
+        done, _ = wait(running, timeout=max(expires - time.perf_counter(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        finished = time.perf_counter()
+        for future in done:
+            stage, stage_started = running.pop(future)
+            event = {'stage': stage.name, 'started_ms': offset_ms(stage_started),
+                     'elapsed_ms': round((finished - stage_started) * 1000, 1)}
+            try:
+                results[stage.name] = future.result()
+                statuses[stage.name] = SUCCEEDED
+                event.update(status=SUCCEEDED, result=results[stage.name])
+            except Exception as e:
+                print(f"❌ Trip stage {stage.name} failed: {e}")
+                statuses[stage.name] = FAILED
+                event.update(status=FAILED, error=str(e))
+            yield event
+
+    for future, (stage, stage_started) in running.items():
+        future.cancel()
+        yield {'stage': stage.name, 'status': TIMED_OUT, 'started_ms': offset_ms(stage_started),
+               'elapsed_ms': round((time.perf_counter() - stage_started) * 1000, 1),
+               'error': f'Not finished within {timeout} seconds'}
+    for name in waiting:
+        yield {'stage': name, 'status': TIMED_OUT, 'started_ms': None, 'elapsed_ms': 0.0,
+               'error': f'Not started within {timeout} seconds'}
+
+
+def critical_path_ms(stages: List[Stage], events: Dict[str, Dict]) -> float:
+    """Longest chain of stage run times through the dependency graph"""
+    finish: Dict[str, float] = {}
+    for stage in stages:  # Stages are listed after their dependencies
+        before = max((finish.get(dependency, 0.0) for dependency in stage.depends_on), default=0.0)
+        finish[stage.name] = before + events.get(stage.name, {}).get('elapsed_ms', 0.0)
+    return round(max(finish.values(), default=0.0), 1)
+
+
+class TripPlanner:
+    """
+    Runs trip plans on a shared, bounded thread pool
+    """
+
+    def __init__(self, llm_service: LLMService, scraper_service: ScraperService,
+                 weather: ForecastProvider, workers: int = 32, timeout: float = 300.0):
+        """
+        Initialize the planner
+
+        Args:
+            llm_service: Itinerary, cultural insight and recommendation generation
+            scraper_service: Flight, hotel and activity searches
+            weather: Forecasts (shared with /api/weather, so both report the same weather)
+            workers: Stages running at once across all plans
+            timeout: Seconds a plan waits for its stages
+        """
+        self.llm_service = llm_service
+        self.scraper_service = scraper_service
+        self.weather = weather
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='trip-stage')
+        self._lock = threading.Lock()
+        self.plans = 0
+        self.stage_failures = 0
+
+    def stages(self, trip: Dict) -> List[Stage]:
+        """
+        The stage graph for a trip request
+
+        Args:
+            trip: The /api/itinerary/generate body plus optional `origin` (enables
+                  flight search), `start_date` (YYYY-MM-DD) and `rooms`
+
+        Returns:
+            Stages in dependency order
+
+        Raises:
+            ValueError: For a malformed start_date or duration
+        """
+        destination = trip['destination']
+        duration = int(trip['duration'])
+        if duration < 1:
+            raise ValueError('duration must be at least 1 day')
+        start = (datetime.strptime(trip['start_date'], '%Y-%m-%d').date() if trip.get('start_date')
+                 else datetime.now().date() + timedelta(days=DEFAULT_LEAD_DAYS))
+        check_in = start.strftime('%Y-%m-%d')
+        check_out = (start + timedelta(days=duration)).strftime('%Y-%m-%d')
+        travelers = int(trip.get('travelers', 1))
+        interests = trip.get('interests', [])
+        llm, scraper, weather = self.llm_service, self.scraper_service, self.weather
+
+        def hotels(_):
+            index = scraper.hotel_index(destination, check_in, check_out, travelers, int(trip.get('rooms', 1)))
+            page = index.query(limit=HOTEL_LIMIT, include_facets=False)
+            return {'total': page['total'], 'hotels': page['hotels'], 'coverage': index.coverage}
+
+        def flights(_):
+            results = scraper.search_flights(trip['origin'], destination, check_in, check_out, travelers)
+            return {'flights': list(results), 'coverage': results.coverage()}
+
+        def activities(_):
+            results = scraper.get_activity_deals(destination)
+            return {'activities': list(results), 'coverage': results.coverage()}
+
+        # The LLM service answers failures with a template itinerary or an empty result;
+        # those stages raise instead, so a plan without the model reports them as failed
+        def itinerary(_):
+            return llm.generate_itinerary(trip, fallback=False)
+
+        def cultural_insights(_):
+            insights = llm.generate_cultural_insights(destination)
+            if not insights:
+                raise RuntimeError('No cultural insights generated')
+            return insights
+
+        def recommendations(inputs):
+            condition = dominant_condition(inputs['weather'])
+            recommended = llm.get_activity_recommendations(destination, interests, weather=condition)
+            if not recommended:
+                raise RuntimeError('No activity recommendations generated')
+            return {'weather': condition, 'activities': recommended}
+
+        stages = [
+            Stage('itinerary', itinerary),
+            Stage('hotels', hotels),
+            Stage('activities', activities),
+            Stage('weather', lambda _: weather.forecast(destination, min(duration, MAX_FORECAST_DAYS), start)),
+            Stage('cultural_insights', cultural_insights),
+            Stage('recommendations', recommendations, depends_on=('weather',))
+        ]
+        if trip.get('origin'):
+            stages.insert(1, Stage('flights', flights))
+        return stages
+
+    def plan(self, trip: Dict) -> Iterator[Tuple[str, Any]]:
+        """
+        Run every stage of a trip, yielding events as stages finish
+
+        Yields:
+            ('stage', stage result) per stage, then ('complete', {'stages', 'timings'})
+            where timings compares the wall time with the serial sum and the critical path
+
+        Raises:
+            ValueError: From stages() (before anything runs)
+        """
+        stages = self.stages(trip)
+        with self._lock:
+            self.plans += 1
+
+        def events() -> Iterator[Tuple[str, Any]]:
+            started = time.perf_counter()
+            finished: Dict[str, Dict] = {}
+            for event in run_stages(self._executor, stages, self.timeout):
+                finished[event['stage']] = event
+                if event['status'] in (FAILED, TIMED_OUT):
+                    with self._lock:
+                        self.stage_failures += 1
+                yield 'stage', event
+
+            total_ms = round((time.perf_counter() - started) * 1000, 1)
+            print(f"🧭 Trip plan for {trip['destination']} finished in {total_ms} ms")
+            yield 'complete', {
+                'stages': {name: event['status'] for name, event in finished.items()},
+                'timings': {
+                    'total_ms': total_ms,
+                    'serial_ms': round(sum(event['elapsed_ms'] for event in finished.values()), 1),
+                    'critical_path_ms': critical_path_ms(stages, finished),
+                    'stages': {name: {'started_ms': event['started_ms'], 'elapsed_ms': event['elapsed_ms']}
+                               for name, event in finished.items()}
+                }
+            }
+
+        return events()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'plans': self.plans, 'stage_failures': self.stage_failures, 'timeout': self.timeout}
+
+
+def trip_planner_from_env(llm_service: LLMService, scraper_service: ScraperService,
+                          weather: ForecastProvider) -> TripPlanner:
+    """Build a planner from TRIP_PLANNER_WORKERS and TRIP_PLAN_TIMEOUT"""
+    return TripPlanner(
+        llm_service,
+        scraper_service,
+        weather,
+        workers=int(os.getenv('TRIP_PLANNER_WORKERS', 32)),
+        timeout=float(os.getenv('TRIP_PLAN_TIMEOUT', 300))
+    )
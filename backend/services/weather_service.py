@@ -0,0 +1,208 @@
+"""
+Weather Service - Forecasts for trip destinations
+Days come from a pluggable backend (a deterministic seeded generator offline; in production,
+register one for a weather API like OpenWeatherMap) and are cached per (destination, date)
+until the next forecast refresh, so the UI, itineraries and trip plans see the same weather
+"""
+
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+# Longest forecast served
+MAX_FORECAST_DAYS = 14
+
+WEATHER_CONDITIONS = ['Sunny', 'Partly Cloudy', 'Cloudy', 'Rainy', 'Clear']
+
+# Forecast backends by the name used in WEATHER_BACKEND
+BACKENDS: Dict[str, Type['ForecastBackend']] = {}
+
+
+def register_backend(name: str) -> Callable[[Type['ForecastBackend']], Type['ForecastBackend']]:
+    """Class decorator adding a backend to BACKENDS under the name used in WEATHER_BACKEND"""
+    def decorator(cls: Type['ForecastBackend']) -> Type['ForecastBackend']:
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def normalize_destination(destination: str) -> str:
+    return ' '.join(destination.lower().split())
+
+
+class ForecastBackend:
+    """
+    Source of daily forecasts
+    """
+
+    name = ''
+
+    def daily(self, destination: str, days: List[date]) -> List[Dict]:
+        """One forecast dict per requested day, in order; raise on failure"""
+        raise NotImplementedError
+
+
+@register_backend('seeded')
+class SeededForecastBackend(ForecastBackend):
+    """
+    Mock forecasts that depend only on the destination and the day
+
+    Each destination gets its own climate (temperature range and rain chance)
+    and each day is drawn from a generator seeded by (destination, day).
+    """
+
+    def daily(self, destination: str, days: List[date]) -> List[Dict]:
+        key = normalize_destination(destination)
+        climate = random.Random(zlib.crc32(key.encode('utf-8')))
+        mean_high = climate.randint(14, 30)
+        rain_chance = climate.uniform(0.1, 0.4)
+
+        forecast = []
+        for day in days:
+            rng = random.Random(zlib.crc32(f"{key}|{day.isoformat()}".encode('utf-8')))
+            if rng.random() < rain_chance:
+                condition = 'Rainy'
+            else:
+                condition = rng.choice([condition for condition in WEATHER_CONDITIONS if condition != 'Rainy'])
+            high = mean_high + rng.randint(-4, 4) - (3 if condition == 'Rainy' else 0)
+
+            forecast.append({
+                'date': day.strftime('%Y-%m-%d'),
+                'condition': condition,
+                'temperature': {
+                    'high': high,
+                    'low': high - rng.randint(6, 11),
+                    'unit': 'C'
+                },
+                'precipitation': rng.randint(40, 90) if condition == 'Rainy' else rng.randint(0, 20),
+                'humidity': rng.randint(40, 80),
+                'wind_speed': rng.randint(5, 25),
+                'icon': get_weather_icon(condition)
+            })
+        return forecast
+
+
+class ForecastProvider:
+    """
+    Forecast lookups through a per-(destination, date) cache
+    """
+
+    def __init__(self, backend: Optional[ForecastBackend] = None, refresh_interval: float = 6 * 3600,
+                 max_entries: int = 50000):
+        """
+        Initialize the provider
+
+        Args:
+            backend: Forecast source (default: the seeded mock)
+            refresh_interval: Seconds between forecast updates; cached days expire at the
+                              next multiple of it (e.g. 00, 06, 12 and 18 UTC for 6 hours)
+            max_entries: Destination-days kept at most (least recently used are evicted)
+        """
+        self.backend = backend or SeededForecastBackend()
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, date], Tuple[Dict, float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.backend_calls = 0
+
+    def next_refresh(self, now: Optional[float] = None) -> float:
+        """Epoch time the current forecast is replaced"""
+        now = time.time() if now is None else now
+        if self.refresh_interval <= 0:
+            return now
+        return (now // self.refresh_interval + 1) * self.refresh_interval
+
+    def forecast(self, destination: str, days: int = 7, start: Optional[date] = None) -> List[Dict]:
+        """
+        Daily forecast for a destination
+
+        Args:
+            destination: City name
+            days: Number of days (capped at MAX_FORECAST_DAYS)
+            start: First day (default: today)
+
+        Returns:
+            One dict per day with condition, temperature, precipitation, humidity, wind and icon
+        """
+        start = start or datetime.now().date()
+        wanted = [start + timedelta(days=offset) for offset in range(max(min(days, MAX_FORECAST_DAYS), 0))]
+        key = normalize_destination(destination)
+        now = time.time()
+
+        found: Dict[date, Dict] = {}
+        with self._lock:
+            for day in wanted:
+                entry = self._entries.get((key, day))
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end((key, day))
+                    found[day] = entry[0]
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+
+        missing = [day for day in wanted if day not in found]
+        if missing:
+            # One backend call for every missing day
+            fetched = self.backend.daily(destination, missing)
+            expires = self.next_refresh(now)
+            with self._lock:
+                self.backend_calls += 1
+                for day, forecast in zip(missing, fetched):
+                    found[day] = forecast
+                    self._entries[(key, day)] = (forecast, expires)
+                    self._entries.move_to_end((key, day))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return [found[day] for day in wanted]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend.name,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'backend_calls': self.backend_calls,
+                'refresh_interval': self.refresh_interval
+            }
+
+
+def dominant_condition(forecast: List[Dict]) -> Optional[str]:
+    """Most frequent condition of a forecast (the earliest on ties), None when empty"""
+    counts = Counter(day['condition'] for day in forecast)
+    return max(counts, key=lambda condition: counts[condition]) if counts else None
+
+
+def get_weather_icon(condition: str) -> str:
+    """Map weather condition to icon identifier"""
+    icons = {
+        'Sunny': '☀️',
+        'Partly Cloudy': '⛅',
+        'Cloudy': '☁️',
+        'Rainy': '🌧️',
+        'Clear': '🌤️'
+    }
+    return icons.get(condition, '🌤️')
+
+
+def forecast_provider_from_env() -> ForecastProvider:
+    """Build a provider from WEATHER_BACKEND, WEATHER_REFRESH_INTERVAL and WEATHER_CACHE_MAX_ENTRIES"""
+    name = os.getenv('WEATHER_BACKEND', 'seeded')
+    if name not in BACKENDS:
+        print(f"⚠️  Unknown WEATHER_BACKEND '{name}', using seeded forecasts")
+        name = 'seeded'
+    return ForecastProvider(
+        BACKENDS[name](),
+        refresh_interval=float(os.getenv('WEATHER_REFRESH_INTERVAL', 6 * 3600)),
+        max_entries=int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 50000))
+    )
@@ -34,6 +34,7 @@ export default function TripChatbot({ tripContext, currentItinerary, onItinerary
   ])
   const [inputMessage, setInputMessage] = useState('')
   const [isLoading, setIsLoading] = useState(false)
+  const [conversationId, setConversationId] = useState<string | null>(null)
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLInputElement>(null)
 
@@ -65,7 +66,8 @@ export default function TripChatbot({ tripContext, currentItinerary, onItinerary
         message: inputMessage,
         trip_context: tripContext,
         current_itinerary: currentItinerary,
-        conversation_history: messages.slice(-5) // Send last 5 messages for context
+        conversation_history: messages.slice(-5), // Used by the server only when it has no state for this conversation
+        conversation_id: conversationId
       }, {
         timeout: 30000
       })
@@ -80,9 +82,13 @@ export default function TripChatbot({ tripContext, currentItinerary, onItinerary
 
       setMessages(prev => [...prev, assistantMessage])
 
-      // If there's an itinerary update, apply it
+      if (response.data.conversation_id) {
+        setConversationId(response.data.conversation_id)
+      }
+
+      // If there's an itinerary update, apply it (the server has already merged the patch)
       if (response.data.itinerary_update) {
-        onItineraryUpdate(response.data.itinerary_update)
+        onItineraryUpdate(response.data.itinerary_update.itinerary)
       }
     } catch (error: any) {
       console.error('Chat error:', error)